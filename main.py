@@ -1,7 +1,24 @@
-from src.report_generator import generate_reports
+import argparse
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
 
-if __name__ == "__main__":
-    marketing, service = generate_reports("data/adjectives_with_service_ratings.csv")
+from dotenv import load_dotenv
+
+DEFAULT_INPUT = "data/adjectives_with_service_ratings.csv"
+MANIFEST_NAME = "manifest.json"
+
+
+def run_single():
+    # 기존 동작: 샘플 CSV 하나로 현재 폴더에 리포트 생성
+    from src.report_generator import generate_reports
+
+    marketing, service = generate_reports(DEFAULT_INPUT)
 
     with open("marketing_report.txt", "w", encoding="utf-8") as f:
         f.write(marketing)
@@ -10,3 +27,189 @@ if __name__ == "__main__":
         f.write(service)
 
     print("리포트 생성 완료! marketing_report.txt / service_report.txt 확인하세요.")
+
+
+# -----------------------------------
+# 배치 모드
+# -----------------------------------
+def collect_inputs(patterns: list[str]) -> list[Path]:
+    """파일 / 폴더(하위 *.csv 전체) / glob 패턴 → 중복 없는 CSV 경로 목록"""
+    paths = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            paths.extend(sorted(path.rglob("*.csv")))
+        elif path.is_file():
+            paths.append(path)
+        else:
+            paths.extend(Path(p) for p in sorted(glob.glob(pattern, recursive=True)))
+    return list(dict.fromkeys(p.resolve() for p in paths if p.suffix.lower() == ".csv"))
+
+
+def output_names(paths: list[Path]) -> dict:
+    """입력별 출력 폴더 이름 (파일명이 겹치면 상위 폴더 이름을 붙임)"""
+    stems = [p.stem for p in paths]
+    return {
+        p: f"{p.parent.name}__{p.stem}" if stems.count(p.stem) > 1 else p.stem
+        for p in paths
+    }
+
+
+def file_hash(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def prompt_version(segmented: bool) -> str:
+    from src.report_engine import SEGMENT_PROMPT_VERSION
+    from src.report_generator import REPORT_PROMPT_VERSION
+
+    return f"segment-{SEGMENT_PROMPT_VERSION}" if segmented else f"report-{REPORT_PROMPT_VERSION}"
+
+
+def load_manifest(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return {entry["input"]: entry for entry in json.load(f).get("inputs", [])}
+
+
+def write_manifest(path: Path, entries: dict, started: float):
+    manifest = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "elapsed_sec": round(time.time() - started, 3),
+        "token_usage": {
+            key: sum(entry.get("token_usage", {}).get(key, 0) for entry in entries.values() if entry.get("status") == "ok")
+            for key in ("prompt_tokens", "completion_tokens", "requests")
+        },
+        "inputs": sorted(entries.values(), key=lambda entry: entry["input"]),
+    }
+    # 중간에 중단돼도 매니페스트가 깨지지 않도록 임시 파일에 쓴 뒤 교체
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _init_worker(gpt_concurrency: int, rpm_limit: int, tpm_limit: int):
+    # gpt_client를 import하기 전에 프로세스별 동시 호출 수/할당량을 지정 (전체 = 워커 수 × 이 값)
+    os.environ["GPT_MAX_CONCURRENCY"] = str(gpt_concurrency)
+    os.environ["GPT_RPM_LIMIT"] = str(rpm_limit)
+    os.environ["GPT_TPM_LIMIT"] = str(tpm_limit)
+    os.environ["GPT_DEFAULT_PRIORITY"] = "batch"
+
+
+def process_file(path: str, out_dir: str, segmented: bool) -> dict:
+    """워커 프로세스: CSV 하나 → 리포트 2개 작성, 소요 시간/토큰 사용량 반환"""
+    from src.gpt_client import token_usage
+    from src.report_generator import generate_reports, generate_segmented_reports
+
+    started = time.perf_counter()
+    usage_before = dict(token_usage)
+    if segmented:
+        marketing, service = generate_segmented_reports(path)
+    else:
+        marketing, service = generate_reports(path)
+    llm_sec = time.perf_counter() - started
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    outputs = {"marketing": out / "marketing_report.txt", "service": out / "service_report.txt"}
+    outputs["marketing"].write_text(marketing or "", encoding="utf-8")
+    outputs["service"].write_text(service or "", encoding="utf-8")
+
+    return {
+        "outputs": {name: str(p) for name, p in outputs.items()},
+        "timings": {"generate_sec": round(llm_sec, 3), "total_sec": round(time.perf_counter() - started, 3)},
+        "token_usage": {key: token_usage[key] - usage_before[key] for key in token_usage},
+    }
+
+
+def run_batch(args):
+    load_dotenv()
+    started = time.time()
+    inputs = collect_inputs(args.inputs)
+    if not inputs:
+        print("처리할 CSV 파일이 없습니다.")
+        return
+
+    out_root = Path(args.out_dir)
+    out_root.mkdir(parents=True, exist_ok=True)
+    manifest_path = Path(args.manifest) if args.manifest else out_root / MANIFEST_NAME
+    previous = load_manifest(manifest_path)
+    version = prompt_version(args.map_reduce)
+    names = output_names(inputs)
+
+    # 내용 해시와 프롬프트 버전이 지난 실행과 같고 출력이 남아 있으면 건너뜀
+    entries, pending = {}, []
+    for path in inputs:
+        entry = {"input": str(path), "content_hash": file_hash(path), "prompt_version": version,
+                 "output_dir": str(out_root / names[path])}
+        prev = previous.get(str(path))
+        unchanged = (
+            prev is not None and prev.get("status") in ("ok", "skipped")
+            and prev.get("content_hash") == entry["content_hash"]
+            and prev.get("prompt_version") == version
+            and all(Path(p).exists() for p in prev.get("outputs", {}).values())
+        )
+        if unchanged and not args.force:
+            entries[str(path)] = {**prev, "status": "skipped"}
+        else:
+            entries[str(path)] = entry
+            pending.append(path)
+
+    print(f">>> 입력 {len(inputs)}개 중 {len(pending)}개 생성, {len(inputs) - len(pending)}개 변경 없음")
+    if not pending:
+        write_manifest(manifest_path, entries, started)
+        return
+
+    # 배포 할당량(분당 요청/토큰)은 워커 프로세스끼리 나눠 사용
+    from src.rate_limiter import GPT_RPM_LIMIT, GPT_TPM_LIMIT
+
+    # 워커마다 동시 GPT 호출이 최소 1개이므로, 워커 수를 전체 동시 호출 한도 이하로 제한
+    workers = max(1, min(args.workers, len(pending), args.llm_concurrency))
+    gpt_concurrency = max(1, args.llm_concurrency // workers)
+    quota = (gpt_concurrency, -(-GPT_RPM_LIMIT // workers), -(-GPT_TPM_LIMIT // workers))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=quota) as pool:
+        futures = {
+            pool.submit(process_file, str(path), entries[str(path)]["output_dir"], args.map_reduce): path
+            for path in pending
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            path = futures[future]
+            entry = entries[str(path)]
+            try:
+                entry.update(future.result(), status="ok")
+                print(f"  ▶ [{done}/{len(pending)}] {path.name} 완료 ({entry['timings']['total_sec']:.1f}초)")
+            except Exception as e:
+                entry.update(status="error", error=str(e))
+                print(f"  ▶ [{done}/{len(pending)}] {path.name} 실패: {e}")
+            write_manifest(manifest_path, entries, started)
+
+    failed = sum(1 for entry in entries.values() if entry["status"] == "error")
+    print(f"배치 완료! 매니페스트: {manifest_path} (실패 {failed}개)")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="리뷰 CSV → GPT 마케팅/서비스 리포트 생성")
+    parser.add_argument("inputs", nargs="*", help="CSV 파일, 폴더 또는 glob 패턴 (없으면 샘플 CSV 하나만 처리)")
+    parser.add_argument("--out-dir", default="reports", help="입력별 리포트를 저장할 폴더")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="동시에 처리할 파일 수")
+    parser.add_argument("--llm-concurrency", type=int, default=int(os.getenv("GPT_MAX_CONCURRENCY", "4")),
+                        help="전체 워커를 합친 동시 GPT 요청 수")
+    parser.add_argument("--map-reduce", action="store_true", help="세그먼트별 요약 후 종합하는 방식으로 생성")
+    parser.add_argument("--force", action="store_true", help="변경되지 않은 입력도 다시 생성")
+    parser.add_argument("--manifest", help="매니페스트 JSON 경로 (기본: <out-dir>/manifest.json)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.inputs:
+        run_batch(args)
+    else:
+        run_single()
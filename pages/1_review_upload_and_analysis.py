@@ -1,12 +1,17 @@
+import logging
+
 import streamlit as st
-import plotly.graph_objects as go
 import pandas as pd
-import numpy as np
-import re
-from collections import Counter
-import matplotlib.pyplot as plt
-import seaborn as sns
-from wordcloud import WordCloud
+from src.analysis_cache import analysis_cache, content_hash
+from src.review_cube import SERVICE_COLUMNS
+from src.keyword_index import KeywordIndex
+from src.wordcloud_cache import request_wordcloud
+from src.near_duplicates import first_in_group
+from src.review_analysis import append_analysis, build_analysis, build_cluster_stats, dup_groups_of
+from src.dataset_store import dataset_store
+from src.snapshot_store import snapshot_store
+
+logger = logging.getLogger(__name__)
 
 st.set_page_config(page_title="리뷰 분석", page_icon="📊")
 st.title("항공사 좌석별 리뷰 데이터 분석")
@@ -71,725 +76,580 @@ st.markdown("""
 # </style>
 """, unsafe_allow_html=True)
 
-# 세션에서 파일 불러오기
-if "uploaded_file" not in st.session_state:
-    st.warning("메인 페이지에서 CSV 파일을 먼저 업로드해주세요.")
-    st.stop()
-
-uploaded_file = st.session_state["uploaded_file"]
-uploaded_file.seek(0)
-df = pd.read_csv(uploaded_file)
-
-# 1. 데이터 전처리 함수
-def preprocess_data(df):
-    # 컬럼명 공백 제거
-    df.columns = df.columns.str.strip()
-    
-    # SeatType 열의 내용을 한글로 변경
-    seat_type_mapping = {
-        'Business Class': '비즈니스',
-        'Economy Class': '이코노미',
-        'First Class': '퍼스트',
-        'Premium Economy': '프리미엄 이코노미'
-    }
-    df['SeatType'] = df['SeatType'].map(seat_type_mapping).fillna(df['SeatType'])
-    
-    # 날짜 생성: 홀수 행은 2025년 5월, 짝수 행은 2025년 6월
-    df['year'] = 2025
-    df['month'] = df.index.map(lambda x: 5 if x % 2 == 0 else 6)
-    
-    # Recommended를 추천/비추천으로 매핑
-    df['sentiment'] = df['Recommended'].map({'yes': '추천', 'no': '비추천'})
-    
-    # 명사(Nouns) 전처리
-    df['Nouns'] = df['Nouns'].fillna('').apply(lambda x: [word.strip() for word in str(x).split(',')])
-    
-    return df
-
-# 2. 리뷰 데이터 생성 함수
-def build_review_data(df):
-    review_data = {}
-    
-    for (year, month, seat_class), group in df.groupby(['year', 'month', 'SeatType']):
-        if year not in review_data:
-            review_data[year] = {}
-        if month not in review_data[year]:
-            review_data[year][month] = {}
-        
-        good_data = group[group['sentiment'] == '추천']
-        bad_data = group[group['sentiment'] == '비추천']
-        
-        # 여행객 유형 분포
-        traveller_dist = group['TypeOfTraveller'].value_counts(normalize=True).to_dict()
-        
-        # 감성 분포
-        sentiment_dist = group['sentiment'].value_counts(normalize=True).to_dict()
-        
-        review_data[year][month][seat_class] = {
-            "traveller_dist": traveller_dist,
-            "sentiment_dist": sentiment_dist
-        }
-    
-    return review_data
-
-# 3. 강점/약점 분석 함수
-def build_strengths_weaknesses(df):
-    strengths = {}
-    weaknesses = {}
-    
-    for seat_class in df['SeatType'].unique():
-        # 긍정 리뷰 명사 추출
-        good_nouns = []
-        for nouns in df[(df['SeatType'] == seat_class) & (df['sentiment'] == '추천')]['Nouns']:
-            good_nouns.extend(nouns)
-        
-        # 부정 리뷰 명사 추출
-        bad_nouns = []
-        for nouns in df[(df['SeatType'] == seat_class) & (df['sentiment'] == '비추천')]['Nouns']:
-            bad_nouns.extend(nouns)
-        
-        # 상위 5개 명사 추출 (빈도순)
-        top_good = [word for word, _ in Counter(good_nouns).most_common(5)] if good_nouns else ["데이터 없음"]
-        top_bad = [word for word, _ in Counter(bad_nouns).most_common(5)] if bad_nouns else ["데이터 없음"]
-        
-        strengths[seat_class] = ", ".join(top_good)
-        weaknesses[seat_class] = ", ".join(top_bad)
-    
-    return strengths, weaknesses
-
-# 4. 평점 데이터 생성 함수
-def build_rating_data(df):
-    rating_data = {}
-    # 서비스 항목 컬럼
-    service_columns = ['SeatComfort', 'CabinStaffService', 'Food&Beverages', 'GroundService', 'InflightEntertainment']
-    
-    for (year, month, seat_class), group in df.groupby(['year', 'month', 'SeatType']):
-        if year not in rating_data:
-            rating_data[year] = {}
-        if month not in rating_data[year]:
-            rating_data[year][month] = {}
-        
-        # 서비스 항목별 평균 평점 계산
-        avg_ratings = {}
-        for col in service_columns:
-            if col in group.columns:
-                avg_ratings[col] = group[col].mean()
-            else:
-                avg_ratings[col] = 0.0  # 컬럼이 없는 경우 기본값
-        
-        # 전체 평점
-        avg_ratings['OverallRating'] = group['OverallRating'].mean()
-        
-        rating_data[year][month][seat_class] = avg_ratings
-    
-    return rating_data
-
-# 5. 여행객 유형 데이터 생성
-def build_traveller_data(df):
-    traveller_data = {}
-    
-    for (year, month), group in df.groupby(['year', 'month']):
-        if year not in traveller_data:
-            traveller_data[year] = {}
-        if month not in traveller_data[year]:
-            traveller_data[year][month] = {}
-        
-        # 좌석 타입별 여행객 유형 분포
-        for seat_class in group['SeatType'].unique():
-            class_group = group[group['SeatType'] == seat_class]
-            dist = class_group['TypeOfTraveller'].value_counts(normalize=True).to_dict()
-            traveller_data[year][month][seat_class] = dist
-    
-    return traveller_data
-
-# 6. 전체 여행객 유형 분포 계산
-def build_overall_traveller_dist(df):
-    return df['TypeOfTraveller'].value_counts(normalize=True).to_dict()
-
-# 6. 데이터 전처리 및 분석
+# 세션에서 데이터셋 핸들 불러오기 (업로드가 없으면 저장된 분석 스냅샷 중에서 선택)
+dataset = st.session_state.get("dataset")
+# 직전 실행에서 새 리뷰를 추가했다면 합친 데이터셋으로 전환
+appended_hash = st.session_state.pop("appended_dataset_hash", None)
+if dataset is None:
+    snapshots = {meta["dataset_hash"]: meta for meta in snapshot_store.list("analysis")}
+    if not snapshots:
+        st.warning("메인 페이지에서 CSV 파일을 먼저 업로드해주세요.")
+        st.stop()
+    st.info("업로드된 파일이 없어 저장된 분석 스냅샷을 불러옵니다.")
+    if appended_hash in snapshots:
+        st.session_state["snapshot_hash"] = appended_hash
+    dataset_hash = st.selectbox(
+        "💾 저장된 분석 스냅샷",
+        list(snapshots),
+        format_func=lambda h: f"{snapshots[h].get('name', h[:12])} ({snapshots[h]['processed_rows']:,}행)",
+        key="snapshot_hash",
+    )
+else:
+    # 업로드 파일 내용 해시 (새 리뷰를 추가했다면 합친 데이터셋의 해시)
+    if st.session_state.get("dataset_base_hash") != dataset.dataset_hash:
+        st.session_state["dataset_hash"] = dataset.dataset_hash
+        st.session_state["dataset_base_hash"] = dataset.dataset_hash
+        st.session_state.pop("appended_dataset", None)
+    if appended_hash:
+        st.session_state["dataset_hash"] = appended_hash
+    dataset_hash = st.session_state["dataset_hash"]
+
+# 1. 분석 결과를 스냅샷으로 저장 (저장 실패는 분석 결과 표시에 영향을 주지 않음)
+def save_snapshot(dataset_hash, analysis, name):
+    try:
+        snapshot_store.save_analysis(dataset_hash, analysis, name=name)
+    except Exception as e:
+        logger.exception("분석 스냅샷 저장 실패")
+        st.warning(f"분석 결과를 디스크에 저장하지 못했습니다. 다음 실행 시 다시 분석합니다. ({e})")
+
+# 2. 디스크 스냅샷이 있으면 불러오고, 없으면 dataset_hash의 원본으로 분석 후 스냅샷으로 저장
+def load_or_build_analysis(dataset_hash, source):
+    analysis = snapshot_store.load_analysis(dataset_hash)
+    if analysis is not None:
+        return analysis
+    if source is None or source.dataset_hash != dataset_hash:
+        raise ValueError("분석할 원본 데이터가 없습니다. 메인 페이지에서 CSV 파일을 다시 업로드해주세요.")
+    # 공유 DataFrame은 그대로 두고 얕은 복사본에 전처리 컬럼을 추가
+    analysis = build_analysis(source.frame().copy(deep=False))
+    save_snapshot(dataset_hash, analysis, source.name)
+    return analysis
+
+# 분석할 원본: 업로드 파일 또는 새 리뷰를 합친 데이터 (세션 핸들이 없으면 데이터셋 저장소에서 찾음)
+source = next(
+    (handle for handle in (dataset, st.session_state.get("appended_dataset"))
+     if handle is not None and handle.dataset_hash == dataset_hash),
+    None,
+) or dataset_store.handle(dataset_hash)
+
+# 3. 데이터 전처리 및 분석 (업로드 파일 해시 기준 캐시)
 try:
-    # 데이터 전처리
-    processed_df = preprocess_data(df)
+    analysis = analysis_cache.get_or_build(dataset_hash, lambda: load_or_build_analysis(dataset_hash, source))
     
-    # 분석 데이터 생성
-    review_data = build_review_data(processed_df)
-    strengths, weaknesses = build_strengths_weaknesses(processed_df)
-    rating_data = build_rating_data(processed_df)
-    traveller_data = build_traveller_data(processed_df)
-    overall_traveller_dist = build_overall_traveller_dist(processed_df)
+    processed_df = analysis["processed_df"]
+    cube = analysis["cube"]
+    keywords = analysis["keywords"]
+    keyword_index = analysis["keyword_index"]
+    strengths = analysis["strengths"]
+    weaknesses = analysis["weaknesses"]
     
     # 디버깅 정보 출력
     # st.success("리뷰 분석 완료!")
     
 except Exception as e:
     st.error(f"리뷰 csv 분석 중 오류 발생: {str(e)}")
-    st.write("데이터프레임 컬럼 목록:", df.columns.tolist())
-    st.stop()
-
-# --- UI 및 시각화  -------------------------------------
-# 좌석 종류 선택
-seat_classes = processed_df['SeatType'].unique().tolist()
-
-# 좌석 종류를 버튼 스타일로 표시
-# st.markdown("**좌석 종류를 골라주세요.**")
-
-st.markdown(' <div class="select_box">', unsafe_allow_html=True)
-cols = st.columns(len(seat_classes))
-if 'selected_seat_class' not in st.session_state:
-    st.session_state.selected_seat_class = seat_classes[0]
-
-
-for i, seat_type in enumerate(seat_classes):
-    with cols[i]:
-        # 선택된 버튼에 특별한 스타일 적용 -> 스타일 무너져서 사용 X
-        # if st.session_state.selected_seat_class == seat_type:
-        #     st.markdown('<span class="selected-button">', unsafe_allow_html=True)
-        #     if st.button(
-        #         seat_type, 
-        #         key=f"seat_{seat_type}",
-        #         use_container_width=True
-        #     ):
-        #         st.session_state.selected_seat_class = seat_type
-        #     st.markdown('</span>', unsafe_allow_html=True)
-        # else:
-            if st.button(
-                seat_type, 
-                key=f"seat_{seat_type}",
-                use_container_width=True
-            ):
-                st.session_state.selected_seat_class = seat_type
-
-seat_class = st.session_state.selected_seat_class
-st.markdown('</div>', unsafe_allow_html=True)
-
-# 연도 및 월 선택
-st.markdown(' <div class="date_box">', unsafe_allow_html=True)
-col1, col2 = st.columns(2)
-with col1:
-    available_years = list(review_data.keys())
-    selected_year = st.selectbox("**연도를 선택해주세요.**", available_years)
-with col2:
-    if selected_year in review_data:
-        available_months = list(review_data[selected_year].keys())
-        selected_month = st.selectbox("**월을 선택해주세요.**", available_months)
-    else:
-        st.warning("선택한 연도에 데이터가 없습니다.")
-        st.stop()
-
-st.markdown(' </div>', unsafe_allow_html=True)
-
-# 선택한 데이터 가져오기
-current_review = review_data[selected_year][selected_month].get(seat_class)
-current_rating = rating_data[selected_year][selected_month].get(seat_class)
-current_traveller = traveller_data[selected_year][selected_month].get(seat_class)
-
-# 데이터가 없는 경우 에러 처리
-if not current_review or not current_rating or not current_traveller:
-    st.warning("선택한 조건에 해당하는 데이터가 없습니다.")
+    if dataset is not None:
+        st.write("데이터프레임 컬럼 목록:", dataset.frame().columns.tolist())
     st.stop()
 
-# 1. 리뷰 요약 섹션 -----------------------------------
-st.markdown(f""" --- """)
-st.markdown(f""" ## :blue[{selected_year}년 {selected_month}월 {seat_class}의 리뷰 요약] """)
+# 4. 새 리뷰(예: 다음 달 CSV) 추가: 새 행만 집계해 기존 분석 결과에 더함
+with st.sidebar.expander("📅 새 리뷰 추가"):
+    new_reviews = st.file_uploader("추가할 리뷰 CSV", type=["csv"], key="append_file")
+    if new_reviews is not None and st.button("분석에 추가", key="append_button"):
+        new_hash = content_hash(dataset_hash.encode() + new_reviews.getvalue())
+        with st.spinner("새 리뷰 반영 중..."):
+            new_df = pd.read_csv(new_reviews)
+            base_name = source.name if source is not None and source.name else next(
+                (meta.get("name") for meta in snapshot_store.list() if meta["dataset_hash"] == dataset_hash), None)
+            name = f"{base_name or dataset_hash[:12]} + {new_reviews.name}"
+            # 합친 원본도 데이터셋 저장소에 보관 (캐시/스냅샷이 없어져도 합친 데이터로 다시 분석)
+            if source is not None:
+                st.session_state["appended_dataset"] = dataset_store.put(
+                    new_hash, pd.concat([source.frame(), new_df], ignore_index=True), name=name
+                )
+            appended = analysis_cache.get_or_build(
+                new_hash, lambda: append_analysis(analysis, new_df.copy(deep=False))
+            )
+            save_snapshot(new_hash, appended, name)
+        st.session_state["appended_dataset_hash"] = new_hash
+        st.rerun()
 
-# 추천 분포 파이 차트
-# st.subheader("추천 / 비추천 분석")
-# sentiment_labels = list(current_review['sentiment_dist'].keys())
-# sentiment_values = list(current_review['sentiment_dist'].values())
+# --- UI 및 시각화  -------------------------------------
+# 구간마다 st.fragment로 나눠, 구간 안의 위젯을 누르면 그 구간만 다시 실행
+# (각 구간은 필요한 값을 인자로 받음 → 구간만 다시 실행될 때는 마지막 전체 실행의 인자를 재사용)
+
+# 0. 좌석/연도/월 선택 -----------------------------------
+# 선택이 바뀌면 아래 구간이 모두 다시 그려져야 하므로 fragment로 나누지 않고 전체 실행에서 그림
+# (fragment로 두면 선택할 때마다 fragment 실행 + 전체 재실행으로 두 번 실행됨)
+def selector(seat_classes, cube):
+    """(좌석, 연도, 월) 선택 값 반환"""
+    # 좌석 종류를 버튼 스타일로 표시
+    # st.markdown("**좌석 종류를 골라주세요.**")
+
+    st.markdown(' <div class="select_box">', unsafe_allow_html=True)
+    cols = st.columns(len(seat_classes))
+    if st.session_state.get('selected_seat_class') not in seat_classes:
+        st.session_state.selected_seat_class = seat_classes[0]
+
+    for i, seat_type in enumerate(seat_classes):
+        with cols[i]:
+            # 선택된 버튼에 특별한 스타일 적용 -> 스타일 무너져서 사용 X
+            # if st.session_state.selected_seat_class == seat_type:
+            #     st.markdown('<span class="selected-button">', unsafe_allow_html=True)
+            #     if st.button(
+            #         seat_type, 
+            #         key=f"seat_{seat_type}",
+            #         use_container_width=True
+            #     ):
+            #         st.session_state.selected_seat_class = seat_type
+            #     st.markdown('</span>', unsafe_allow_html=True)
+            # else:
+                if st.button(
+                    seat_type, 
+                    key=f"seat_{seat_type}",
+                    use_container_width=True
+                ):
+                    st.session_state.selected_seat_class = seat_type
+
+    seat_class = st.session_state.selected_seat_class
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    # 연도 및 월 선택
+    st.markdown(' <div class="date_box">', unsafe_allow_html=True)
+    col1, col2 = st.columns(2)
+    with col1:
+        available_years = cube.years()
+        selected_year = st.selectbox("**연도를 선택해주세요.**", available_years)
+    with col2:
+        available_months = cube.months(selected_year)
+        if available_months:
+            selected_month = st.selectbox("**월을 선택해주세요.**", available_months)
+        else:
+            st.warning("선택한 연도에 데이터가 없습니다.")
+            st.stop()
+
+    st.markdown(' </div>', unsafe_allow_html=True)
+
+    return seat_class, selected_year, selected_month
+
+
+# 1~2. 리뷰 요약 / 여행객 유형 분석 -----------------------------------
+@st.fragment
+def summary(selection_key, strengths, weaknesses, current_traveller):
+    _, seat_class, selected_year, selected_month = selection_key
+    st.markdown(f""" --- """)
+    st.markdown(f""" ## :blue[{selected_year}년 {selected_month}월 {seat_class}의 리뷰 요약] """)
+
+    # 추천 분포 파이 차트
+    # st.subheader("추천 / 비추천 분석")
+    # current_sentiment = cube.sentiment_dist(selected_year, selected_month, seat_class)
+    # sentiment_labels = list(current_sentiment.keys())
+    # sentiment_values = list(current_sentiment.values())
+
+    # fig_sentiment = go.Figure(data=[go.Pie(
+    #     labels=sentiment_labels,
+    #     values=sentiment_values,
+    #     hole=0.3,
+    #     marker_colors=['lightcoral', 'lightgreen']
+    # )])
+    # st.plotly_chart(fig_sentiment)
+
+    # 강점/약점 표시
+    st.success(f"**우리 항공사의 마케팅 포인트:** {strengths[seat_class]}")
+    st.error(f"**우리 항공사의 개선 사항:** {weaknesses[seat_class]}")
+
+    # 2. 여행객 유형 분석 -----------------------------------
+    st.markdown("---")
+    st.subheader("여행객 유형 분포")
+
+    # 여행객 유형 파이 차트
+    fig_traveller = cached_figure(('traveller',) + selection_key, lambda: traveller_pie(current_traveller))
+    st.plotly_chart(fig_traveller)
+
+
+# 3~4. 서비스 평점 레이더 차트 / 전월 대비 변화 -----------------------------------
+@st.fragment
+def rating_sections(selection_key, cube, current_rating):
+    _, seat_class, selected_year, selected_month = selection_key
+    # 3. 서비스 평점 레이더 차트 -----------------------------------
+    st.markdown("---")
+    st.subheader("서비스 항목별 평점 분석")
+
+    # 레이더 차트 데이터 준비
+    service_categories = SERVICE_COLUMNS
+    current_ratings = [current_rating[cat] for cat in service_categories]
+
+    # 이전 달 데이터 가져오기
+    prev_month = selected_month - 1
+    prev_ratings = None
+
+    if prev_month > 0:
+        prev_rating_data = cube.ratings(selected_year, prev_month, seat_class)
+        if prev_rating_data:
+            prev_ratings = [prev_rating_data[cat] for cat in service_categories]
+
+    # 레이더 차트 생성
+    fig_radar = cached_figure(('radar',) + selection_key, lambda: service_radar(
+        seat_class, service_categories, selected_month, current_ratings, prev_month, prev_ratings
+    ))
 
-# fig_sentiment = go.Figure(data=[go.Pie(
-#     labels=sentiment_labels,
-#     values=sentiment_values,
-#     hole=0.3,
-#     marker_colors=['lightcoral', 'lightgreen']
-# )])
-# st.plotly_chart(fig_sentiment)
+    st.plotly_chart(fig_radar)
 
-# 강점/약점 표시
-st.success(f"**우리 항공사의 마케팅 포인트:** {strengths[seat_class]}")
-st.error(f"**우리 항공사의 개선 사항:** {weaknesses[seat_class]}")
+    # 4. 전월 대비 평점 변화 분석 -----------------------------------
+    st.markdown("---")
+    st.subheader("전월 대비 평점 변화 분석")
 
-# 2. 여행객 유형 분석 -----------------------------------
-st.markdown("---")
-st.subheader("여행객 유형 분포")
+    if prev_ratings:
+        # 평점 변화 계산
+        rating_changes = [current - prev for current, prev in zip(current_ratings, prev_ratings)]
 
-# 여행객 유형 파이 차트
-traveller_labels = list(current_traveller.keys())
-traveller_values = list(current_traveller.values())
+        # 변화 시각화
+        fig_change = cached_figure(('rating_change',) + selection_key, lambda: rating_change_bar(
+            service_categories, rating_changes, selected_month, prev_month
+        ))
+        st.plotly_chart(fig_change)
 
-fig_traveller = go.Figure(data=[go.Pie(
-    labels=traveller_labels,
-    values=traveller_values,
-    hole=0.3
-)])
-st.plotly_chart(fig_traveller)
+        # 개선 여부 분석
+        improvements = [cat for cat, change in zip(service_categories, rating_changes) if change > 0]
+        declines = [cat for cat, change in zip(service_categories, rating_changes) if change < 0]
 
-# 3. 서비스 평점 레이더 차트 -----------------------------------
-st.markdown("---")
-st.subheader("서비스 항목별 평점 분석")
-
-# 레이더 차트 데이터 준비
-service_categories = ['SeatComfort', 'CabinStaffService', 'Food&Beverages', 'GroundService', 'InflightEntertainment']
-current_ratings = [current_rating[cat] for cat in service_categories]
-
-# 이전 달 데이터 가져오기
-prev_month = selected_month - 1
-prev_ratings = None
-
-if prev_month > 0 and selected_year in rating_data and prev_month in rating_data[selected_year]:
-    prev_rating_data = rating_data[selected_year][prev_month].get(seat_class)
-    if prev_rating_data:
-        prev_ratings = [prev_rating_data[cat] for cat in service_categories]
-
-# 레이더 차트 생성
-fig_radar = go.Figure()
-
-fig_radar.add_trace(go.Scatterpolar(
-    r=current_ratings,
-    theta=service_categories,
-    fill='toself',
-    name=f'{selected_month}월',
-    line_color='blue'
-))
-
-if prev_ratings:
-    fig_radar.add_trace(go.Scatterpolar(
-        r=prev_ratings,
-        theta=service_categories,
-        fill='toself',
-        name=f'{prev_month}월',
-        line_color='red'
-    ))
+        if improvements:
+            st.success(f"**개선된 서비스:** {', '.join(improvements)}")
+        if declines:
+            st.error(f"**악화된 서비스:** {', '.join(declines)}")
+    else:
+        st.info("이전 달 데이터가 없어 비교 분석을 수행할 수 없습니다.")
 
-fig_radar.update_layout(
-    polar=dict(
-        radialaxis=dict(
-            visible=True,
-            range=[0, 5]
-        )),
-    showlegend=True,
-    title=f"{seat_class} 서비스 항목별 평점 비교",
-    height=500
-)
 
-st.plotly_chart(fig_radar)
+# 5. 명사 워드클라우드 및 막대그래프 -----------------------------------
+@st.fragment
+def keyword_section(selection_key, dedup_keywords, keywords, good_mask, bad_mask, good_freq, bad_freq):
+    good_cloud_key = selection_key + ('추천', dedup_keywords)
+    bad_cloud_key = selection_key + ('비추천', dedup_keywords)
+    st.markdown("---")
+    st.subheader("리뷰 키워드 분석")
+
+    # 시각화 방식 선택 버튼
+    col_btn1, col_btn2 = st.columns(2)
+    with col_btn1:
+        show_wordcloud = st.button("워드 클라우드로 보기")
+    with col_btn2:
+        show_chart = st.button("그래프로 보기")
+
+    # 세션 상태 초기화
+    if 'visualization_mode' not in st.session_state:
+        st.session_state.visualization_mode = 'wordcloud'
+
+    # 버튼 클릭에 따른 모드 변경
+    if show_wordcloud:
+        st.session_state.visualization_mode = 'wordcloud'
+    elif show_chart:
+        st.session_state.visualization_mode = 'chart'
 
-# 4. 전월 대비 평점 변화 분석 -----------------------------------
-st.markdown("---")
-st.subheader("전월 대비 평점 변화 분석")
+    col1, col2 = st.columns(2)
 
-if prev_ratings:
-    # 평점 변화 계산
-    rating_changes = [current - prev for current, prev in zip(current_ratings, prev_ratings)]
-    
-    # 변화 시각화
-    fig_change = go.Figure()
-    fig_change.add_trace(go.Bar(
-        x=service_categories,
-        y=rating_changes,
-        marker_color=np.where(np.array(rating_changes) >= 0, 'green', 'red'),
-        text=[f"{change:.2f}" for change in rating_changes],
-        textposition='auto'
-    ))
-    
-    fig_change.update_layout(
-        title=f"{prev_month}월 대비 {selected_month}월 평점 변화",
-        yaxis_title="평점 변화",
-        height=400
-    )
-    
-    st.plotly_chart(fig_change)
-    
-    # 개선 여부 분석
-    improvements = [cat for cat, change in zip(service_categories, rating_changes) if change > 0]
-    declines = [cat for cat, change in zip(service_categories, rating_changes) if change < 0]
-    
-    if improvements:
-        st.success(f"**개선된 서비스:** {', '.join(improvements)}")
-    if declines:
-        st.error(f"**악화된 서비스:** {', '.join(declines)}")
-else:
-    st.info("이전 달 데이터가 없어 비교 분석을 수행할 수 없습니다.")
+    if st.session_state.visualization_mode == 'wordcloud':
+        # 워드클라우드 표시
+        with col1:
+            st.markdown("#### :green[추천해요]")
+            if good_freq:
+                # 긍정 리뷰용 green 계열 워드클라우드 (캐시된 PNG)
+                st.image(request_wordcloud(good_cloud_key, good_freq, 'green').result())
+            else:
+                st.info("긍정 리뷰 데이터가 없습니다.")
 
-# 5. 명사 워드클라우드 및 막대그래프 -----------------------------------
-st.markdown("---")
-st.subheader("리뷰 키워드 분석")
-
-# 시각화 방식 선택 버튼
-col_btn1, col_btn2 = st.columns(2)
-with col_btn1:
-    show_wordcloud = st.button("워드 클라우드로 보기")
-with col_btn2:
-    show_chart = st.button("그래프로 보기")
-
-# 세션 상태 초기화
-if 'visualization_mode' not in st.session_state:
-    st.session_state.visualization_mode = 'wordcloud'
-
-# 버튼 클릭에 따른 모드 변경
-if show_wordcloud:
-    st.session_state.visualization_mode = 'wordcloud'
-elif show_chart:
-    st.session_state.visualization_mode = 'chart'
-
-# 긍정/부정 리뷰 데이터 추출
-good_df = processed_df[(processed_df['SeatType'] == seat_class) & 
-                      (processed_df['sentiment'] == '추천') &
-                      (processed_df['year'] == selected_year) &
-                      (processed_df['month'] == selected_month)]
-
-bad_df = processed_df[(processed_df['SeatType'] == seat_class) & 
-                     (processed_df['sentiment'] == '비추천') &
-                     (processed_df['year'] == selected_year) &
-                     (processed_df['month'] == selected_month)]
-
-# 긍정 리뷰 명사 추출 및 빈도 계산
-good_nouns = []
-for nouns in good_df['Nouns']:
-    good_nouns.extend(nouns)
-good_counter = Counter(good_nouns)
-
-# 부정 리뷰 명사 추출 및 빈도 계산
-bad_nouns = []
-for nouns in bad_df['Nouns']:
-    bad_nouns.extend(nouns)
-bad_counter = Counter(bad_nouns)
-
-col1, col2 = st.columns(2)
-
-if st.session_state.visualization_mode == 'wordcloud':
-    # 워드클라우드 표시
-    with col1:
-        st.markdown("#### :green[추천해요]")
-        if good_nouns:
-            text = ' '.join(good_nouns)
-            # 긍정 리뷰용 green 계열 색상 함수
-            def green_color_func(word, font_size, position, orientation, random_state=None, **kwargs):
-                return f"hsl({np.random.randint(90, 150)}, {np.random.randint(70, 100)}%, {np.random.randint(30, 70)}%)"
-            
-            wordcloud = WordCloud(
-                width=400, 
-                height=300, 
-                background_color='white',
-                color_func=green_color_func
-            ).generate(text)
-            plt.figure(figsize=(10, 8))
-            plt.imshow(wordcloud, interpolation='bilinear')
-            plt.axis("off")
-            st.pyplot(plt)
-        else:
-            st.info("긍정 리뷰 데이터가 없습니다.")
+        with col2:
+            st.markdown("#### :red[추천하지 않아요]")
+            if bad_freq:
+                # 부정 리뷰용 red 계열 워드클라우드 (캐시된 PNG)
+                st.image(request_wordcloud(bad_cloud_key, bad_freq, 'red').result())
+            else:
+                st.info("부정 리뷰 데이터가 없습니다.")
 
-    with col2:
-        st.markdown("#### :red[추천하지 않아요]")
-        if bad_nouns:
-            text = ' '.join(bad_nouns)
-            # 부정 리뷰용 red 계열 색상 함수
-            def red_color_func(word, font_size, position, orientation, random_state=None, **kwargs):
-                return f"hsl({np.random.randint(0, 30)}, {np.random.randint(70, 100)}%, {np.random.randint(30, 70)}%)"
-            
-            wordcloud = WordCloud(
-                width=400, 
-                height=300, 
-                background_color='white',
-                color_func=red_color_func
-            ).generate(text)
-            plt.figure(figsize=(10, 8))
-            plt.imshow(wordcloud, interpolation='bilinear')
-            plt.axis("off")
-            st.pyplot(plt)
-        else:
-            st.info("부정 리뷰 데이터가 없습니다.")
+    else:
+        # 막대그래프 표시
+        with col1:
+            if good_freq:
+                # 상위 10개 키워드
+                fig_good = cached_figure(('keywords',) + selection_key + ('추천', dedup_keywords), lambda: keyword_bar(
+                    keywords.top_k(good_mask, 10), 'green', "긍정 키워드 빈도"
+                ))
+                st.plotly_chart(fig_good, use_container_width=True)
+            else:
+                st.info("긍정 리뷰 데이터가 없습니다.")
 
-else:
-    # 막대그래프 표시
-    with col1:
-        if good_counter:
-            # 상위 10개 키워드
-            top_good = good_counter.most_common(10)
-            words, counts = zip(*top_good)
-            
-            fig_good = go.Figure(go.Bar(
-                x=list(counts),
-                y=list(words),
-                orientation='h',
-                marker_color='green',
-                text=list(counts),
-                textposition='auto'
-            ))
-            fig_good.update_layout(
-                title="긍정 키워드 빈도",
-                xaxis_title="빈도",
-                height=400,
-                yaxis={'categoryorder': 'total ascending'}
+        with col2:
+            if bad_freq:
+                # 상위 10개 키워드
+                fig_bad = cached_figure(('keywords',) + selection_key + ('비추천', dedup_keywords), lambda: keyword_bar(
+                    keywords.top_k(bad_mask, 10), 'red', "부정 키워드 빈도"
+                ))
+                st.plotly_chart(fig_bad, use_container_width=True)
+            else:
+                st.info("부정 리뷰 데이터가 없습니다.")
+
+
+# 키워드로 원본 리뷰 찾기 (역색인 검색)
+@st.fragment
+def keyword_search(selection_key, keyword_index, processed_df):
+    _, seat_class, selected_year, selected_month = selection_key
+    with st.expander("🔎 키워드로 리뷰 찾기"):
+        search_words = st.multiselect("키워드", keyword_index.vocabulary, key="search_words")
+        col_mode, col_sentiment, col_cluster = st.columns(3)
+        with col_mode:
+            search_mode = st.radio("조건", ["AND", "OR"], horizontal=True, key="search_mode")
+        with col_sentiment:
+            search_sentiment = st.selectbox("추천 여부", ["전체", "추천", "비추천"], key="search_sentiment")
+        with col_cluster:
+            search_cluster = st.selectbox("클러스터", ["전체"] + sorted(keyword_index.levels('ClusterID')), key="search_cluster")
+
+        if search_words:
+            search_rows = keyword_index.search(
+                search_words,
+                mode=search_mode.lower(),
+                filters={
+                    'SeatType': seat_class,
+                    'year': selected_year,
+                    'month': selected_month,
+                    'sentiment': None if search_sentiment == "전체" else search_sentiment,
+                    'ClusterID': None if search_cluster == "전체" else search_cluster,
+                },
             )
-            st.plotly_chart(fig_good, use_container_width=True)
-        else:
-            st.info("긍정 리뷰 데이터가 없습니다.")
+            page_size = 20
+            page_count = max(1, -(-len(search_rows) // page_size))
+            st.markdown(f"**검색 결과: {len(search_rows)}건**")
+            search_page = st.number_input("페이지", min_value=1, max_value=page_count, value=1, key="search_page")
+            st.dataframe(KeywordIndex.page(processed_df, search_rows, search_page - 1, page_size))
 
-    with col2:
-        if bad_counter:
-            # 상위 10개 키워드
-            top_bad = bad_counter.most_common(10)
-            words, counts = zip(*top_bad)
-            
-            fig_bad = go.Figure(go.Bar(
-                x=list(counts),
-                y=list(words),
-                orientation='h',
-                marker_color='red',
-                text=list(counts),
-                textposition='auto'
-            ))
-            fig_bad.update_layout(
-                title="부정 키워드 빈도",
-                xaxis_title="빈도",
-                height=400,
-                yaxis={'categoryorder': 'total ascending'}
-            )
-            st.plotly_chart(fig_bad, use_container_width=True)
-        else:
-            st.info("부정 리뷰 데이터가 없습니다.")
 
 # 6. 전체 클러스터링 분석 섹션 -----------------------------------
-st.markdown("---")
-# 클러스터링 분석 섹션 표시 상태 초기화
-if 'show_clustering' not in st.session_state:
-    st.session_state.show_clustering = False
-
-# 분석 결과 보러 가기 버튼
-if st.button("분석 결과 보러 가기", key="main_report_button"):
-    st.session_state.show_clustering = True
-
-# 클러스터링 분석 섹션 표시
-if st.session_state.show_clustering:
-    st.subheader("전체 고객 군집 분석 (K-means 클러스터링)")
-    st.markdown("**BERT 기반 텍스트 클러스터링으로 발견된 24개 고객 군집 (2개 추천여부 × 4개 좌석타입 × 3개 클러스터)**")
-
-    # 전체 클러스터 데이터 사용
-    cluster_df = processed_df.copy()
-
-    # 클러스터별 통계 계산 (좌석타입과 추천여부 포함)
-    cluster_stats = []
-    for (seat_type, recommended, cluster_id), group in cluster_df.groupby(['SeatType', 'sentiment', 'ClusterID']):
-        # 기본 통계
-        stats = {
-            'SeatType': seat_type,
-            'Sentiment': recommended,
-            'ClusterID': cluster_id,
-            'UniqueID': f"{seat_type}_{recommended}_{cluster_id}",
-            'Count': len(group),
-            'AvgOverallRating': group['OverallRating'].mean(),
-            'RecommendationRate': (group['sentiment'] == '추천').mean() * 100,
-            'DominantTraveller': group['TypeOfTraveller'].mode().iloc[0] if len(group) > 0 else 'N/A'
-        }
-    
-        # 서비스 항목별 평균 점수
-        service_cols = ['SeatComfort', 'CabinStaffService', 'Food&Beverages', 'GroundService', 'InflightEntertainment']
-        for col in service_cols:
-            stats[col] = group[col].mean()
-    
-        cluster_stats.append(stats)
-
-    cluster_stats_df = pd.DataFrame(cluster_stats)
+@st.fragment
+def clustering(dataset_hash, cube, group_keywords):
+    st.markdown("---")
+    # 클러스터링 분석 섹션 표시 상태 초기화
+    if 'show_clustering' not in st.session_state:
+        st.session_state.show_clustering = False
+
+    # 분석 결과 보러 가기 버튼
+    if st.button("분석 결과 보러 가기", key="main_report_button"):
+        st.session_state.show_clustering = True
+
+    # 클러스터링 분석 섹션 표시
+    if st.session_state.show_clustering:
+        st.subheader("전체 고객 군집 분석 (K-means 클러스터링)")
+        st.markdown("**BERT 기반 텍스트 클러스터링으로 발견된 24개 고객 군집 (2개 추천여부 × 4개 좌석타입 × 3개 클러스터)**")
+
+        # 군집별 통계/대표 키워드는 큐브와 그룹별 키워드 빈도에서 한 번에 계산 (원본 데이터 복사·반복 필터링 없음)
+        cluster_stats_df = build_cluster_stats(cube, group_keywords)
+
+        # 1) 전체 클러스터 분포 시각화 
+        # st.markdown("#### 📊 전체 클러스터 분포")
+
+        # col1, col2 = st.columns(2)
+
+        # with col1:
+        #     # 좌석 타입별 클러스터 개수 및 고객 수
+        #     seat_summary = cluster_stats_df.groupby('SeatType').agg({
+        #         'Count': 'sum',
+        #         'ClusterID': 'count'
+        #     }).reset_index()
+        #     seat_summary.columns = ['SeatType', 'TotalCustomers', 'ClusterCount']
+
+        #     fig_seat_dist = go.Figure()
+        #     fig_seat_dist.add_trace(go.Bar(
+        #         x=seat_summary['SeatType'],
+        #         y=seat_summary['TotalCustomers'],
+        #         marker_color=['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4'],
+        #         text=seat_summary['TotalCustomers'],
+        #         textposition='auto',
+        #         name='총 고객 수'
+        #     ))
+        #     fig_seat_dist.update_layout(
+        #         title="좌석 타입별 총 고객 수",
+        #         xaxis_title="좌석 타입",
+        #         yaxis_title="고객 수",
+        #         height=400
+        #     )
+        #     st.plotly_chart(fig_seat_dist, use_container_width=True)
+
+        # with col2:
+        #     # 추천/비추천 분포
+        #     sentiment_summary = cluster_stats_df.groupby('Sentiment')['Count'].sum().reset_index()
+
+        #     fig_sentiment_dist = go.Figure(data=[go.Pie(
+        #         labels=sentiment_summary['Sentiment'],
+        #         values=sentiment_summary['Count'],
+        #         hole=0.4,
+        #         marker_colors=['lightcoral', 'lightgreen'],
+        #         textinfo='label+percent+value'
+        #     )])
+        #     fig_sentiment_dist.update_layout(
+        #         title="전체 추천/비추천 분포",
+        #         height=400
+        #     )
+        #     st.plotly_chart(fig_sentiment_dist, use_container_width=True)
+
+        # 2) 클러스터별 평점 분포 히트맵
+        st.markdown("#### 🔥 24개 군집 평점 히트맵")
+
+        fig_heatmap_all = cached_figure((dataset_hash, 'cluster_heatmap'), lambda: cluster_heatmap(cluster_stats_df))
+        st.plotly_chart(fig_heatmap_all, use_container_width=True)
+
+        # 3) 서비스 항목별 클러스터 성과 분석
+        st.markdown("#### 🎯 서비스 항목별 클러스터 성과")
 
-    # 1) 전체 클러스터 분포 시각화 
-    # st.markdown("#### 📊 전체 클러스터 분포")
-
-    # col1, col2 = st.columns(2)
+        service_cols = ['SeatComfort', 'CabinStaffService', 'Food&Beverages', 'GroundService', 'InflightEntertainment']
+        service_labels = ['좌석 편안함', '승무원 서비스', '식음료', '지상 서비스', '기내 엔터테인먼트']
+
+        # 각 서비스 항목별 최고/최저 클러스터 찾기
+        service_analysis = {}
+        for i, col in enumerate(service_cols):
+            best_idx = cluster_stats_df[col].idxmax()
+            worst_idx = cluster_stats_df[col].idxmin()
+
+            service_analysis[service_labels[i]] = {
+                'best': {
+                    'cluster': cluster_stats_df.loc[best_idx, 'UniqueID'],
+                    'score': cluster_stats_df.loc[best_idx, col],
+                    'seat_type': cluster_stats_df.loc[best_idx, 'SeatType'],
+                    'sentiment': cluster_stats_df.loc[best_idx, 'Sentiment']
+                },
+                'worst': {
+                    'cluster': cluster_stats_df.loc[worst_idx, 'UniqueID'],
+                    'score': cluster_stats_df.loc[worst_idx, col],
+                    'seat_type': cluster_stats_df.loc[worst_idx, 'SeatType'],
+                    'sentiment': cluster_stats_df.loc[worst_idx, 'Sentiment']
+                }
+            }
 
-    # with col1:
-    #     # 좌석 타입별 클러스터 개수 및 고객 수
-    #     seat_summary = cluster_stats_df.groupby('SeatType').agg({
-    #         'Count': 'sum',
-    #         'ClusterID': 'count'
-    #     }).reset_index()
-    #     seat_summary.columns = ['SeatType', 'TotalCustomers', 'ClusterCount']
-    
-    #     fig_seat_dist = go.Figure()
-    #     fig_seat_dist.add_trace(go.Bar(
-    #         x=seat_summary['SeatType'],
-    #         y=seat_summary['TotalCustomers'],
-    #         marker_color=['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4'],
-    #         text=seat_summary['TotalCustomers'],
-    #         textposition='auto',
-    #         name='총 고객 수'
-    #     ))
-    #     fig_seat_dist.update_layout(
-    #         title="좌석 타입별 총 고객 수",
-    #         xaxis_title="좌석 타입",
-    #         yaxis_title="고객 수",
-    #         height=400
-    #     )
-    #     st.plotly_chart(fig_seat_dist, use_container_width=True)
-
-    # with col2:
-    #     # 추천/비추천 분포
-    #     sentiment_summary = cluster_stats_df.groupby('Sentiment')['Count'].sum().reset_index()
-    
-    #     fig_sentiment_dist = go.Figure(data=[go.Pie(
-    #         labels=sentiment_summary['Sentiment'],
-    #         values=sentiment_summary['Count'],
-    #         hole=0.4,
-    #         marker_colors=['lightcoral', 'lightgreen'],
-    #         textinfo='label+percent+value'
-    #     )])
-    #     fig_sentiment_dist.update_layout(
-    #         title="전체 추천/비추천 분포",
-    #         height=400
-    #     )
-    #     st.plotly_chart(fig_sentiment_dist, use_container_width=True)
-
-    # 2) 클러스터별 평점 분포 히트맵
-    st.markdown("#### 🔥 24개 군집 평점 히트맵")
-
-    # 히트맵을 위한 데이터 준비
-    heatmap_data = cluster_stats_df.pivot_table(
-        index=['SeatType', 'Sentiment'], 
-        columns='ClusterID', 
-        values='AvgOverallRating'
-    ).fillna(0)
-
-    # 인덱스를 문자열로 변환
-    heatmap_labels = [f"{seat}_{sent}" for seat, sent in heatmap_data.index]
-
-    fig_heatmap_all = go.Figure(data=go.Heatmap(
-        z=heatmap_data.values,
-        x=[f"클러스터 {i}" for i in heatmap_data.columns],
-        y=heatmap_labels,
-        colorscale='RdYlGn',
-        text=np.round(heatmap_data.values, 2),
-        texttemplate="%{text}",
-        textfont={"size":10},
-        colorbar=dict(title="평점")
-    ))
+        # 서비스별 최고/최저 성과 표시
+        for service, data in service_analysis.items():
+            col1, col2 = st.columns(2)
+            with col1:
+                st.success(f"""
+                **🏆 {service} 최고 성과**
+                - 클러스터: {data['best']['cluster']}
+                - 점수: {data['best']['score']:.2f}
+                - 좌석: {data['best']['seat_type']} ({data['best']['sentiment']})
+                """)
+            with col2:
+                st.error(f"""
+                **⚠️ {service} 개선 필요**
+                - 클러스터: {data['worst']['cluster']}
+                - 점수: {data['worst']['score']:.2f}
+                - 좌석: {data['worst']['seat_type']} ({data['worst']['sentiment']})
+                """)
+
+        # 4) 상위/하위 성과 클러스터 TOP 5
+        st.markdown("#### 🏅 전체 성과 순위")
 
-    fig_heatmap_all.update_layout(
-        title="24개 군집별 전체 평점 히트맵",
-        height=600,
-        xaxis_title="클러스터 ID",
-        yaxis_title="좌석타입_추천여부"
-    )
-    st.plotly_chart(fig_heatmap_all, use_container_width=True)
+        col1, col2 = st.columns(2)
 
-    # 3) 서비스 항목별 클러스터 성과 분석
-    st.markdown("#### 🎯 서비스 항목별 클러스터 성과")
+        with col1:
+            st.markdown("**⭐ TOP 5 우수 클러스터**")
+            top_clusters = cluster_stats_df.nlargest(5, 'AvgOverallRating')[
+                ['UniqueID', 'SeatType', 'Sentiment', 'AvgOverallRating', 'Count', 'DominantTraveller']
+            ]
+            for idx, row in top_clusters.iterrows():
+                st.success(f"""
+                **{row['UniqueID']}**
+                - 평점: {row['AvgOverallRating']:.2f} | 고객수: {row['Count']}명
+                - 주요 여행객: {row['DominantTraveller']}
+                """)
 
-    service_cols = ['SeatComfort', 'CabinStaffService', 'Food&Beverages', 'GroundService', 'InflightEntertainment']
-    service_labels = ['좌석 편안함', '승무원 서비스', '식음료', '지상 서비스', '기내 엔터테인먼트']
+        with col2:
+            st.markdown("**⚠️ 개선 필요 클러스터 TOP 5**")
+            bottom_clusters = cluster_stats_df.nsmallest(5, 'AvgOverallRating')[
+                ['UniqueID', 'SeatType', 'Sentiment', 'AvgOverallRating', 'Count', 'DominantTraveller']
+            ]
+            for idx, row in bottom_clusters.iterrows():
+                st.error(f"""
+                **{row['UniqueID']}**
+                - 평점: {row['AvgOverallRating']:.2f} | 고객수: {row['Count']}명
+                - 주요 여행객: {row['DominantTraveller']}
+                """)
+
+        # 5) 클러스터 세부 정보 (선택적 확장)
+        st.markdown("#### 🔍 클러스터 세부 분석")
+
+        # 좌석 타입별로 그룹화하여 표시
+        for seat_type in cluster_stats_df['SeatType'].unique():
+            seat_clusters = cluster_stats_df[cluster_stats_df['SeatType'] == seat_type]
+
+            with st.expander(f"📋 {seat_type} 클러스터 상세 정보"):
+                for _, row in seat_clusters.iterrows():
+                    status_emoji = "✅" if row['Sentiment'] == '추천' else "❌"
+
+                    st.markdown(f"**{status_emoji} 클러스터 {row['ClusterID']} ({row['Sentiment']})**")
+
+                    col1, col2, col3, col4 = st.columns(4)
+                    with col1:
+                        st.metric("고객 수", f"{row['Count']}명")
+                        st.metric("전체 평점", f"{row['AvgOverallRating']:.2f}")
+                    with col2:
+                        st.metric("좌석 편안함", f"{row['SeatComfort']:.2f}")
+                        st.metric("승무원 서비스", f"{row['CabinStaffService']:.2f}")
+                    with col3:
+                        st.metric("식음료", f"{row['Food&Beverages']:.2f}")
+                        st.metric("지상 서비스", f"{row['GroundService']:.2f}")
+                    with col4:
+                        st.metric("기내 엔터테인먼트", f"{row['InflightEntertainment']:.2f}")
+                        st.metric("주요 여행객", row['DominantTraveller'])
+
+                    # 대표 키워드 표시
+                    top_keywords = row['TopKeywords']
+                    if top_keywords:
+                        st.markdown(f"**🔑 대표 키워드:** {', '.join(top_keywords)}")
 
-    # 각 서비스 항목별 최고/최저 클러스터 찾기
-    service_analysis = {}
-    for i, col in enumerate(service_cols):
-        best_idx = cluster_stats_df[col].idxmax()
-        worst_idx = cluster_stats_df[col].idxmin()
-    
-        service_analysis[service_labels[i]] = {
-            'best': {
-                'cluster': cluster_stats_df.loc[best_idx, 'UniqueID'],
-                'score': cluster_stats_df.loc[best_idx, col],
-                'seat_type': cluster_stats_df.loc[best_idx, 'SeatType'],
-                'sentiment': cluster_stats_df.loc[best_idx, 'Sentiment']
-            },
-            'worst': {
-                'cluster': cluster_stats_df.loc[worst_idx, 'UniqueID'],
-                'score': cluster_stats_df.loc[worst_idx, col],
-                'seat_type': cluster_stats_df.loc[worst_idx, 'SeatType'],
-                'sentiment': cluster_stats_df.loc[worst_idx, 'Sentiment']
-            }
-        }
+                    st.markdown("---")
 
-    # 서비스별 최고/최저 성과 표시
-    for service, data in service_analysis.items():
-        col1, col2 = st.columns(2)
-        with col1:
-            st.success(f"""
-            **🏆 {service} 최고 성과**
-            - 클러스터: {data['best']['cluster']}
-            - 점수: {data['best']['score']:.2f}
-            - 좌석: {data['best']['seat_type']} ({data['best']['sentiment']})
-            """)
-        with col2:
-            st.error(f"""
-            **⚠️ {service} 개선 필요**
-            - 클러스터: {data['worst']['cluster']}
-            - 점수: {data['worst']['score']:.2f}
-            - 좌석: {data['worst']['seat_type']} ({data['worst']['sentiment']})
-            """)
 
-    # 4) 상위/하위 성과 클러스터 TOP 5
-    st.markdown("#### 🏅 전체 성과 순위")
+seat_classes = processed_df['SeatType'].unique().tolist()
+seat_class, selected_year, selected_month = selector(seat_classes, cube)
 
-    col1, col2 = st.columns(2)
+# 선택한 데이터 가져오기
+current_rating = cube.ratings(selected_year, selected_month, seat_class)
+current_traveller = cube.traveller_dist(selected_year, selected_month, seat_class)
 
-    with col1:
-        st.markdown("**⭐ TOP 5 우수 클러스터**")
-        top_clusters = cluster_stats_df.nlargest(5, 'AvgOverallRating')[
-            ['UniqueID', 'SeatType', 'Sentiment', 'AvgOverallRating', 'Count', 'DominantTraveller']
-        ]
-        for idx, row in top_clusters.iterrows():
-            st.success(f"""
-            **{row['UniqueID']}**
-            - 평점: {row['AvgOverallRating']:.2f} | 고객수: {row['Count']}명
-            - 주요 여행객: {row['DominantTraveller']}
-            """)
+# 데이터가 없는 경우 에러 처리
+if not current_rating or not current_traveller:
+    st.warning("선택한 조건에 해당하는 데이터가 없습니다.")
+    st.stop()
 
-    with col2:
-        st.markdown("**⚠️ 개선 필요 클러스터 TOP 5**")
-        bottom_clusters = cluster_stats_df.nsmallest(5, 'AvgOverallRating')[
-            ['UniqueID', 'SeatType', 'Sentiment', 'AvgOverallRating', 'Count', 'DominantTraveller']
-        ]
-        for idx, row in bottom_clusters.iterrows():
-            st.error(f"""
-            **{row['UniqueID']}**
-            - 평점: {row['AvgOverallRating']:.2f} | 고객수: {row['Count']}명
-            - 주요 여행객: {row['DominantTraveller']}
-            """)
-
-    # 5) 클러스터 세부 정보 (선택적 확장)
-    st.markdown("#### 🔍 클러스터 세부 분석")
-
-    # 좌석 타입별로 그룹화하여 표시
-    for seat_type in cluster_stats_df['SeatType'].unique():
-        seat_clusters = cluster_stats_df[cluster_stats_df['SeatType'] == seat_type]
-    
-        with st.expander(f"📋 {seat_type} 클러스터 상세 정보"):
-            for _, row in seat_clusters.iterrows():
-                cluster_data = cluster_df[
-                    (cluster_df['SeatType'] == row['SeatType']) & 
-                    (cluster_df['sentiment'] == row['Sentiment']) & 
-                    (cluster_df['ClusterID'] == row['ClusterID'])
-                ]
-            
-                status_emoji = "✅" if row['Sentiment'] == '추천' else "❌"
-            
-                st.markdown(f"**{status_emoji} 클러스터 {row['ClusterID']} ({row['Sentiment']})**")
-            
-                col1, col2, col3, col4 = st.columns(4)
-                with col1:
-                    st.metric("고객 수", f"{row['Count']}명")
-                    st.metric("전체 평점", f"{row['AvgOverallRating']:.2f}")
-                with col2:
-                    st.metric("좌석 편안함", f"{row['SeatComfort']:.2f}")
-                    st.metric("승무원 서비스", f"{row['CabinStaffService']:.2f}")
-                with col3:
-                    st.metric("식음료", f"{row['Food&Beverages']:.2f}")
-                    st.metric("지상 서비스", f"{row['GroundService']:.2f}")
-                with col4:
-                    st.metric("기내 엔터테인먼트", f"{row['InflightEntertainment']:.2f}")
-                    st.metric("주요 여행객", row['DominantTraveller'])
-
-                # 대표 키워드 표시
-                if len(cluster_data) > 0:
-                    cluster_nouns = []
-                    for nouns in cluster_data['Nouns']:
-                        cluster_nouns.extend(nouns)
-                
-                    if cluster_nouns:
-                        top_keywords = [word for word, _ in Counter(cluster_nouns).most_common(8)]
-                        st.markdown(f"**🔑 대표 키워드:** {', '.join(top_keywords)}")
-            
-                st.markdown("---")
+# 긍정/부정 리뷰 명사 빈도 계산 (문서-단어 행렬의 마스크 합)
+slice_mask = ((processed_df['SeatType'] == seat_class) &
+              (processed_df['year'] == selected_year) &
+              (processed_df['month'] == selected_month)).to_numpy()
+# 유사(복사/템플릿) 리뷰는 그룹당 한 번만 집계 (켰을 때만 유사 리뷰 그룹을 계산)
+dedup_keywords = st.sidebar.checkbox("유사 리뷰는 키워드 집계에 한 번만 반영", value=False)
+good_mask = slice_mask & (processed_df['sentiment'] == '추천').to_numpy()
+bad_mask = slice_mask & (processed_df['sentiment'] == '비추천').to_numpy()
+if dedup_keywords:
+    dup_groups = dup_groups_of(analysis)
+    good_mask = first_in_group(dup_groups, good_mask)
+    bad_mask = first_in_group(dup_groups, bad_mask)
+
+good_freq = keywords.frequencies(good_mask)
+bad_freq = keywords.frequencies(bad_mask)
+
+# 차트/워드클라우드는 (데이터셋 해시, 좌석, 연도, 월[, 모드]) 단위로 한 번만 만들고 세션 간 공유
+selection_key = (dataset_hash, seat_class, selected_year, selected_month)
+
+# 워드클라우드는 아래 차트들을 그리는 동안 백그라운드 스레드에서 미리 렌더링
+if st.session_state.get('visualization_mode', 'wordcloud') == 'wordcloud':
+    if good_freq:
+        request_wordcloud(selection_key + ('추천', dedup_keywords), good_freq, 'green')
+    if bad_freq:
+        request_wordcloud(selection_key + ('비추천', dedup_keywords), bad_freq, 'red')
+
+# plotly는 차트를 처음 그리는 시점에 import (업로드 안내/경고 화면은 plotly 없이 바로 표시)
+from src.figure_cache import (cached_figure, cluster_heatmap, keyword_bar, rating_change_bar,
+                              service_radar, traveller_pie)
+
+summary(selection_key, strengths, weaknesses, current_traveller)
+rating_sections(selection_key, cube, current_rating)
+keyword_section(selection_key, dedup_keywords, keywords, good_mask, bad_mask, good_freq, bad_freq)
+keyword_search(selection_key, keyword_index, processed_df)
+clustering(dataset_hash, cube, analysis["group_keywords"])
 
 # 7. 리포트 생성 페이지로 이동 버튼
 st.markdown("---")
@@ -1,37 +1,64 @@
 import streamlit as st
-import pandas as pd
-from src.report_generator import generate_reports
-import tempfile
 
 st.set_page_config(page_title="리포트 생성", page_icon="📝")
 st.title("GPT 기반 마케팅 리포트 생성")
 
-# CSV 파일이 세션에 있는지 확인
-if "uploaded_file" not in st.session_state:
+# 업로드한 데이터셋 핸들이 세션에 있는지 확인
+if "dataset" not in st.session_state:
     st.warning("메인 페이지에서 CSV 파일을 먼저 업로드해주세요.")
     st.stop()
 
-uploaded_file = st.session_state["uploaded_file"]
-uploaded_file.seek(0)
+# 세션 간 공유되는 DataFrame (임시 CSV로 다시 쓰지 않고 바로 사용)
+df_reviews = st.session_state["dataset"].frame()
 
-# Streamlit에서 바로 읽은 업로드 파일은 generate_reports에 쓸 수 없기 때문에, 임시 저장 필요
-with tempfile.NamedTemporaryFile(delete=False, suffix=".csv") as tmp:
-    tmp.write(st.session_state["uploaded_file"].read())
-    tmp_path = tmp.name
+# 같은 프롬프트는 저장된 리포트를 재사용 (체크하면 새로 생성)
+bypass_cache = st.checkbox("저장된 리포트 사용하지 않고 새로 생성")
+# 좌석 타입 × 추천 여부 × 클러스터별로 먼저 요약한 뒤 종합 (바뀐 세그먼트만 다시 요약)
+segmented = st.checkbox("세그먼트별 요약 후 종합 (map-reduce)")
 
 if st.button("리포트 생성하기"):
-    with st.spinner("GPT-4o로 리포트 생성 중..."):
-        try:
-            marketing_report, service_report = generate_reports(tmp_path)
+    try:
+        # GPT 클라이언트(openai/httpx)는 리포트를 실제로 생성할 때 import
+        from src.report_generator import build_report_prompts
+        from src.gpt_client import stream_chat, stream_report_from_gpt, stream_in_background, completion_cache, scheduler
+        from src.report_engine import build_reduce_messages, summarize_segments
 
-            st.success("리포트 생성 완료!")
-            st.subheader("마케팅 전략 리포트")
-            st.text_area("Marketing Report", marketing_report, height=400)
-            st.download_button("⬇다운로드", marketing_report, file_name="marketing_report.txt")
+        if segmented:
+            progress_bar = st.progress(0.0)
 
-            st.subheader("서비스 개선 전략 리포트")
-            st.text_area("Service Report", service_report, height=400)
-            st.download_button("⬇다운로드", service_report, file_name="service_report.txt")
+            def report_progress(done, total):
+                progress_bar.progress(done / total, text=f"세그먼트 요약 {done}/{total} 완료")
 
-        except Exception as e:
-            st.error(f"오류 발생: {e}")
\ No newline at end of file
+            summaries = summarize_segments(df_reviews, report_progress, use_cache=not bypass_cache)
+            progress_bar.empty()
+            marketing_stream = stream_chat(build_reduce_messages(summaries, "marketing"), use_cache=not bypass_cache)
+            service_stream = stream_chat(build_reduce_messages(summaries, "service"), use_cache=not bypass_cache)
+        else:
+            pos_prompt, neg_prompt = build_report_prompts(df_reviews)
+            marketing_stream = stream_report_from_gpt(pos_prompt, use_cache=not bypass_cache)
+            service_stream = stream_report_from_gpt(neg_prompt, use_cache=not bypass_cache)
+
+        # 두 리포트를 동시에 요청하고, 받은 토큰을 순서대로 화면에 출력
+        service_tokens = stream_in_background(service_stream)
+
+        st.subheader("마케팅 전략 리포트")
+        marketing_report = st.write_stream(marketing_stream)
+        if marketing_stream.time_to_first_token is not None:
+            st.caption(f"첫 토큰까지 {marketing_stream.time_to_first_token:.2f}초")
+        st.download_button("⬇다운로드", marketing_report, file_name="marketing_report.txt")
+
+        st.subheader("서비스 개선 전략 리포트")
+        service_report = st.write_stream(service_tokens)
+        if service_stream.time_to_first_token is not None:
+            st.caption(f"첫 토큰까지 {service_stream.time_to_first_token:.2f}초")
+        st.download_button("⬇다운로드", service_report, file_name="service_report.txt")
+
+        st.success("리포트 생성 완료!")
+        st.caption(f"리포트 캐시 적중률: {completion_cache.hit_rate:.1%} "
+                   f"(적중 {completion_cache.hits}회 / 미적중 {completion_cache.misses}회)")
+        metrics = scheduler.metrics()
+        st.caption(f"GPT 요청 대기열 {metrics['queue_depth']}건, 평균 대기 {metrics['avg_wait_sec']:.1f}초 "
+                   f"(최대 {metrics['max_wait_sec']:.1f}초, 429 재시도 {metrics['throttled']}회)")
+
+    except Exception as e:
+        st.error(f"오류 발생: {e}")
\ No newline at end of file
@@ -0,0 +1,71 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# 프로세스 전체에서 보관할 데이터셋(업로드 파일) 개수
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "4"))
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def frame_hash(df: pd.DataFrame) -> str:
+    """DataFrame 내용(컬럼명 + 값) 기준 해시"""
+    h = hashlib.sha256()
+    h.update(",".join(map(str, df.columns)).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class AnalysisCache:
+    """
+    업로드 파일 내용 해시 → 전처리된 DataFrame 및 분석 결과를 보관하는 LRU 캐시
+    - Streamlit 세션(스레드) 간에 공유되므로 lock으로 보호
+    - 최대 개수를 넘으면 가장 오래 사용되지 않은 항목부터 제거
+    """
+
+    def __init__(self, max_entries: int = ANALYSIS_CACHE_MAX_ENTRIES):
+        self.max_entries = max(1, max_entries)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_build(self, key, builder):
+        value = self.get(key)
+        if value is None:
+            # 빌드는 lock 밖에서 수행 (긴 전처리 동안 다른 세션을 막지 않도록)
+            value = builder()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+analysis_cache = AnalysisCache()
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from src.sqlite_lru import connect, evict_lru
+
+GPT_CACHE_PATH      = Path(os.getenv("GPT_CACHE_PATH", ".cache/gpt_completions.sqlite"))
+GPT_CACHE_MAX_MB    = float(os.getenv("GPT_CACHE_MAX_MB", "64"))
+GPT_CACHE_TTL_HOURS = float(os.getenv("GPT_CACHE_TTL_HOURS", "168"))
+GPT_CACHE_DISABLED  = os.getenv("GPT_CACHE_DISABLED", "false").lower() == "true"
+
+
+class CompletionCache:
+    """
+    GPT 응답 캐시 (SQLite, 여러 Streamlit 세션/프로세스가 같은 파일을 공유)
+    - key : (deployment, messages, temperature, max_tokens)의 해시
+    - 저장 후 ttl_hours가 지난 항목은 적중으로 치지 않고 삭제
+    - 전체 크기가 max_mb를 넘으면 가장 오래 사용되지 않은 항목부터 삭제
+    """
+
+    def __init__(self, path: Path = GPT_CACHE_PATH, max_mb: float = GPT_CACHE_MAX_MB,
+                 ttl_hours: float = GPT_CACHE_TTL_HOURS):
+        self.path = Path(path)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.ttl_sec = ttl_hours * 3600
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS completions ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+                " created REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        return connect(self.path)
+
+    @staticmethod
+    def make_key(deployment: str, messages: list[dict], temperature: float, max_tokens: int) -> str:
+        payload = json.dumps(
+            {"deployment": deployment, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+            ensure_ascii=False, sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT value, created FROM completions WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] > self.ttl_sec:
+                conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                row = None
+            if row:
+                conn.execute("UPDATE completions SET last_used = ? WHERE key = ?", (now, key))
+                self.hits += 1
+            else:
+                self.misses += 1
+        return row[0] if row else None
+
+    def put(self, key: str, value: str):
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO completions (key, value, size, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now: float):
+        conn.execute("DELETE FROM completions WHERE created < ?", (now - self.ttl_sec,))
+        evict_lru(conn, "completions", self.max_bytes)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
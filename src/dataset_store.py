@@ -0,0 +1,177 @@
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from src.analysis_cache import content_hash
+
+DATASET_STORE_DIR       = Path(os.getenv("DATASET_STORE_DIR", ".cache/datasets"))
+# 메모리에 올려 둘 데이터셋 전체 크기 상한 (넘으면 사용 중이 아닌 것부터 오래된 순으로 내림)
+DATASET_STORE_MEMORY_MB = int(os.getenv("DATASET_STORE_MEMORY_MB", "2048"))
+# 디스크에 보관할 데이터셋 파일 개수 (넘으면 사용 중이 아닌 것부터 오래된 순으로 삭제)
+DATASET_STORE_MAX_FILES = int(os.getenv("DATASET_STORE_MAX_FILES", "20"))
+
+
+class DatasetHandle:
+    """
+    세션(st.session_state)에 DataFrame 대신 보관하는 데이터셋 참조
+    - 만들어질 때 참조 수를 올리고, 세션이 끝나 핸들이 사라지거나 release()하면 내림
+    - frame()은 모든 세션이 공유하는 DataFrame이므로 수정하지 말고 필요하면 copy(deep=False) 후 사용
+    """
+
+    def __init__(self, store: "DatasetStore", dataset_hash: str, name: str = None):
+        self.dataset_hash = dataset_hash
+        self.name = name
+        self._store = store
+        store._acquire(dataset_hash)
+        self._release = weakref.finalize(self, store._release, dataset_hash)
+
+    def frame(self) -> pd.DataFrame:
+        return self._store.frame(self.dataset_hash)
+
+    def release(self):
+        self._release()
+
+
+class _Entry:
+    __slots__ = ("refs", "frame", "nbytes")
+
+    def __init__(self):
+        self.refs = 0
+        self.frame = None
+        self.nbytes = 0
+
+
+class DatasetStore:
+    """
+    프로세스 전체가 공유하는 내용 해시 기준 데이터셋 저장소
+    <root>/<데이터셋 해시>.arrow : Arrow IPC (비압축, 메모리 맵으로 읽음)
+    - 같은 내용의 데이터셋은 세션 수와 관계없이 파일 하나, 메모리에 DataFrame 하나만 둠
+    - 세션은 DatasetHandle만 가지고, 참조 수가 0인(어느 세션도 쓰지 않는) 데이터셋만 내보냄
+    - 메모리 상한을 넘으면 참조 수 0인 DataFrame을 오래 사용되지 않은 순으로 메모리에서 내림 (파일은 유지)
+    """
+
+    def __init__(self, root: Path = DATASET_STORE_DIR, memory_mb: int = DATASET_STORE_MEMORY_MB,
+                 max_files: int = DATASET_STORE_MAX_FILES):
+        self.root = Path(root)
+        self.memory_budget = max(0, memory_mb) * 1024 * 1024
+        self.max_files = max(1, max_files)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, dataset_hash: str) -> Path:
+        return self.root / f"{dataset_hash}.arrow"
+
+    def _entry(self, dataset_hash: str) -> _Entry:
+        entry = self._entries.get(dataset_hash)
+        if entry is None:
+            entry = self._entries[dataset_hash] = _Entry()
+        self._entries.move_to_end(dataset_hash)
+        return entry
+
+    def _acquire(self, dataset_hash: str):
+        with self._lock:
+            self._entry(dataset_hash).refs += 1
+
+    def _release(self, dataset_hash: str):
+        with self._lock:
+            entry = self._entries.get(dataset_hash)
+            if entry is not None:
+                entry.refs -= 1
+                self._evict()
+
+    # --- 저장 / 핸들 -----------------------------------------------
+    def has(self, dataset_hash: str) -> bool:
+        return self._path(dataset_hash).exists()
+
+    def handle(self, dataset_hash: str, name: str = None):
+        """이미 저장된 데이터셋의 핸들 (없으면 None)"""
+        if not self.has(dataset_hash):
+            return None
+        return DatasetHandle(self, dataset_hash, name)
+
+    def put(self, dataset_hash: str, df: pd.DataFrame, name: str = None, replace: bool = False) -> DatasetHandle:
+        """
+        df를 dataset_hash로 저장하고 핸들 반환 (같은 해시가 이미 있으면 다시 쓰지 않음)
+        replace=True: 같은 키의 내용을 새 df로 교체 (예: 다시 실행한 Azure ML 결과), 기존 핸들도 다음 frame()부터 새 내용을 읽음
+        """
+        if replace or not self.has(dataset_hash):
+            self.root.mkdir(parents=True, exist_ok=True)
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            path = self._path(dataset_hash)
+            tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+            with open(tmp, "wb") as f:
+                feather.write_feather(table, f, compression="uncompressed")
+            os.replace(tmp, path)
+            with self._lock:
+                if dataset_hash in self._entries:
+                    self._entries[dataset_hash].frame, self._entries[dataset_hash].nbytes = None, 0
+        else:
+            os.utime(self._path(dataset_hash))
+        handle = DatasetHandle(self, dataset_hash, name)
+        with self._lock:
+            self._evict_files()
+        return handle
+
+    def put_csv(self, uploaded_file) -> DatasetHandle:
+        """업로드 CSV 파일 → 핸들 (다른 세션이 같은 파일을 이미 올렸으면 CSV를 다시 읽지 않음)"""
+        dataset_hash = content_hash(uploaded_file.getvalue())
+        name = getattr(uploaded_file, "name", None)
+        handle = self.handle(dataset_hash, name)
+        if handle is None:
+            uploaded_file.seek(0)
+            handle = self.put(dataset_hash, pd.read_csv(uploaded_file), name)
+        return handle
+
+    # --- 읽기 ------------------------------------------------------
+    def frame(self, dataset_hash: str) -> pd.DataFrame:
+        with self._lock:
+            entry = self._entry(dataset_hash)
+            if entry.frame is not None:
+                return entry.frame
+        # 파일 읽기는 lock 밖에서 (동시에 같은 데이터셋을 읽으면 먼저 끝난 쪽을 공유)
+        # split_blocks: 결측 없는 숫자 컬럼은 복사 없이 메모리 맵 버퍼를 그대로 사용
+        df = feather.read_table(self._path(dataset_hash), memory_map=True).to_pandas(split_blocks=True)
+        nbytes = int(df.memory_usage(index=False, deep=True).sum())
+        os.utime(self._path(dataset_hash))
+        with self._lock:
+            entry = self._entry(dataset_hash)
+            if entry.frame is None:
+                entry.frame, entry.nbytes = df, nbytes
+                self._evict()
+            else:
+                df = entry.frame
+        return df
+
+    # --- 정리 ------------------------------------------------------
+    def memory_usage(self) -> int:
+        """메모리에 올라와 있는 데이터셋 크기 합 (bytes)"""
+        with self._lock:
+            return sum(entry.nbytes for entry in self._entries.values())
+
+    def _evict(self):
+        # 오래 사용되지 않은 순으로, 참조 수 0인 데이터셋만 메모리에서 내림
+        used = sum(entry.nbytes for entry in self._entries.values())
+        for dataset_hash, entry in list(self._entries.items()):
+            if used <= self.memory_budget:
+                break
+            if entry.refs <= 0 and entry.frame is not None:
+                used -= entry.nbytes
+                entry.frame, entry.nbytes = None, 0
+        for dataset_hash, entry in list(self._entries.items()):
+            if entry.refs <= 0 and entry.frame is None:
+                del self._entries[dataset_hash]
+
+    def _evict_files(self):
+        paths = sorted(self.root.glob("*.arrow"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for path in paths[self.max_files:]:
+            if self._entries.get(path.stem, _Entry()).refs <= 0:
+                path.unlink(missing_ok=True)
+
+
+dataset_store = DatasetStore()
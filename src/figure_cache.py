@@ -0,0 +1,130 @@
+import os
+
+import numpy as np
+import plotly.graph_objects as go
+
+from src.analysis_cache import AnalysisCache
+
+# (데이터셋 해시, 차트 종류, 좌석, 연도, 월, 모드)별로 보관할 차트 개수
+FIGURE_CACHE_MAX_ENTRIES = int(os.getenv("FIGURE_CACHE_MAX_ENTRIES", "256"))
+
+figure_cache = AnalysisCache(max_entries=FIGURE_CACHE_MAX_ENTRIES)
+
+
+def cached_figure(key, build) -> go.Figure:
+    """
+    key에 해당하는 go.Figure를 처음 요청될 때만 build()로 생성해 세션 간 공유
+    - st.plotly_chart는 go.Figure를 그대로 직렬화하고 변경하지 않으므로 같은 객체를 넘겨도 안전
+      (dict를 넘기면 st.plotly_chart가 go.Figure를 다시 만들고 검증해 생성보다 느려짐)
+    - 반환된 차트를 수정하지 말 것 (필요하면 go.Figure(fig)로 복사 후 수정)
+    """
+    return figure_cache.get_or_build(key, build)
+
+
+# --- 차트 생성 함수 (입력 값만으로 그림) ----------------------------
+def traveller_pie(traveller_dist: dict) -> go.Figure:
+    """여행객 유형 분포 파이 차트"""
+    return go.Figure(data=[go.Pie(
+        labels=list(traveller_dist.keys()),
+        values=list(traveller_dist.values()),
+        hole=0.3
+    )])
+
+
+def service_radar(seat_class, categories, month, ratings, prev_month=None, prev_ratings=None) -> go.Figure:
+    """서비스 항목별 평점 레이더 차트 (이전 달 평점이 있으면 함께 표시)"""
+    fig = go.Figure()
+    fig.add_trace(go.Scatterpolar(
+        r=ratings,
+        theta=categories,
+        fill='toself',
+        name=f'{month}월',
+        line_color='blue'
+    ))
+    if prev_ratings:
+        fig.add_trace(go.Scatterpolar(
+            r=prev_ratings,
+            theta=categories,
+            fill='toself',
+            name=f'{prev_month}월',
+            line_color='red'
+        ))
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=[0, 5]
+            )),
+        showlegend=True,
+        title=f"{seat_class} 서비스 항목별 평점 비교",
+        height=500
+    )
+    return fig
+
+
+def rating_change_bar(categories, changes, month, prev_month) -> go.Figure:
+    """전월 대비 평점 변화 막대그래프"""
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=categories,
+        y=changes,
+        marker_color=np.where(np.array(changes) >= 0, 'green', 'red'),
+        text=[f"{change:.2f}" for change in changes],
+        textposition='auto'
+    ))
+    fig.update_layout(
+        title=f"{prev_month}월 대비 {month}월 평점 변화",
+        yaxis_title="평점 변화",
+        height=400
+    )
+    return fig
+
+
+def keyword_bar(top_keywords, color: str, title: str) -> go.Figure:
+    """키워드 빈도 상위 목록 [(단어, 빈도), ...] 가로 막대그래프"""
+    words, counts = zip(*top_keywords)
+    fig = go.Figure(go.Bar(
+        x=list(counts),
+        y=list(words),
+        orientation='h',
+        marker_color=color,
+        text=list(counts),
+        textposition='auto'
+    ))
+    fig.update_layout(
+        title=title,
+        xaxis_title="빈도",
+        height=400,
+        yaxis={'categoryorder': 'total ascending'}
+    )
+    return fig
+
+
+def cluster_heatmap(cluster_stats_df) -> go.Figure:
+    """(좌석타입_추천여부) × 클러스터 평균 평점 히트맵"""
+    heatmap_data = cluster_stats_df.pivot_table(
+        index=['SeatType', 'Sentiment'],
+        columns='ClusterID',
+        values='AvgOverallRating'
+    ).fillna(0)
+
+    # 인덱스를 문자열로 변환
+    heatmap_labels = [f"{seat}_{sent}" for seat, sent in heatmap_data.index]
+
+    fig = go.Figure(data=go.Heatmap(
+        z=heatmap_data.values,
+        x=[f"클러스터 {i}" for i in heatmap_data.columns],
+        y=heatmap_labels,
+        colorscale='RdYlGn',
+        text=np.round(heatmap_data.values, 2),
+        texttemplate="%{text}",
+        textfont={"size": 10},
+        colorbar=dict(title="평점")
+    ))
+    fig.update_layout(
+        title="24개 군집별 전체 평점 히트맵",
+        height=600,
+        xaxis_title="클러스터 ID",
+        yaxis_title="좌석타입_추천여부"
+    )
+    return fig
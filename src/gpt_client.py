@@ -1,22 +1,219 @@
+import logging
 import os
-from openai import AzureOpenAI
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from openai import APIConnectionError, APIStatusError, InternalServerError, RateLimitError
 from dotenv import load_dotenv
+from src.completion_cache import CompletionCache, GPT_CACHE_DISABLED
+from src.llm_client import get_client
+from src.prompt_builder import count_tokens
+from src.rate_limiter import BATCH, INTERACTIVE, RateLimitScheduler
 
 load_dotenv()
 
-client = AzureOpenAI(
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-)
+logger = logging.getLogger(__name__)
+
+# 연결 풀을 공유하는 프로세스 공용 클라이언트 (llm_client.get_client)
+client = get_client()
 
 DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT")
 
-def get_report_from_gpt(prompt: str) -> str:
-    response = client.chat.completions.create(
-        model=DEPLOYMENT_NAME,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.5,
-        max_tokens=2048,
-    )
-    return response.choices[0].message.content
+# 프로세스 전체에서 동시에 보낼 수 있는 GPT 요청 수
+GPT_MAX_CONCURRENCY = int(os.getenv("GPT_MAX_CONCURRENCY", "4"))
+
+# AzureOpenAI(httpx) 클라이언트는 스레드 간에 공유 가능하므로 스레드 풀에서 동시에 호출
+_executor = ThreadPoolExecutor(max_workers=GPT_MAX_CONCURRENCY, thread_name_prefix="gpt")
+
+# 429(할당량 초과), 5xx/408/409, 타임아웃/연결 오류 시 재시도 횟수 (SDK 자체 재시도는 끔)
+GPT_MAX_RETRIES = int(os.getenv("GPT_MAX_RETRIES", "5"))
+# 우선순위를 지정하지 않은 요청의 기본값 (배치 프로세스는 batch로 지정)
+GPT_DEFAULT_PRIORITY = BATCH if os.getenv("GPT_DEFAULT_PRIORITY", "interactive") == "batch" else INTERACTIVE
+
+# 분당 요청/토큰 할당량과 우선순위를 관리하는 프로세스 공용 스케줄러
+scheduler = RateLimitScheduler()
+
+# 스트리밍 요청의 첫 토큰까지 걸린 시간(초) 기록
+time_to_first_token_history = deque(maxlen=100)
+
+# 같은 요청(deployment, messages, temperature, max_tokens)의 응답을 디스크에 보관
+completion_cache = CompletionCache()
+
+# 이 프로세스에서 사용한 누적 토큰 수 (캐시 적중은 제외)
+token_usage = {"prompt_tokens": 0, "completion_tokens": 0, "requests": 0}
+_usage_lock = threading.Lock()
+
+
+def _record_usage(usage):
+    with _usage_lock:
+        token_usage["requests"] += 1
+        if usage is not None:
+            token_usage["prompt_tokens"] += usage.prompt_tokens or 0
+            token_usage["completion_tokens"] += usage.completion_tokens or 0
+
+
+# 재시도할 상태 코드 (429/5xx 외에 SDK가 재시도하던 요청 시간 초과/충돌)
+RETRY_STATUS = {408, 409}
+
+
+def _is_retryable(error: Exception) -> bool:
+    # APITimeoutError는 APIConnectionError의 하위 클래스
+    if isinstance(error, (RateLimitError, InternalServerError, APIConnectionError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code in RETRY_STATUS
+
+
+def _retry_after(error: Exception, attempt: int) -> float:
+    # Azure는 retry-after-ms 또는 retry-after(초) 헤더로 대기 시간을 알려줌 (없으면 지수 백오프)
+    response = getattr(error, "response", None)
+    headers = response.headers if response is not None else {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return min(60.0, 2 ** attempt)
+
+def create_completion(messages: list[dict], temperature: float, max_tokens: int,
+                      stream: bool = False, priority: int = None):
+    """
+    스케줄러에서 차례/할당량을 받은 뒤 호출하고, 429·5xx·408/409·타임아웃·연결 오류면
+    Retry-After(없으면 지수 백오프)만큼 전체 요청을 멈춘 뒤 재시도
+    예상 토큰 수 = 프롬프트 토큰 + max_tokens (Azure도 max_tokens 기준으로 할당량을 계산)
+    """
+    priority = GPT_DEFAULT_PRIORITY if priority is None else priority
+    estimated = sum(count_tokens(str(m["content"])) for m in messages) + max_tokens
+    for attempt in range(GPT_MAX_RETRIES + 1):
+        scheduler.acquire(estimated, priority)
+        try:
+            response = client.chat.completions.create(
+                model=DEPLOYMENT_NAME,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=stream,
+            )
+        except (APIStatusError, APIConnectionError) as e:
+            if attempt == GPT_MAX_RETRIES or not _is_retryable(e):
+                raise
+            wait = _retry_after(e, attempt)
+            logger.warning("GPT 호출 실패(%s) → %.1f초 후 재시도 (%d/%d)", type(e).__name__, wait, attempt + 1, GPT_MAX_RETRIES)
+            scheduler.backoff(wait)
+            continue
+        if not stream and response.usage is not None:
+            scheduler.settle(estimated, response.usage.total_tokens)
+        return response
+
+def complete_chat(messages: list[dict], temperature: float = 0.5, max_tokens: int = 2048,
+                  use_cache: bool = True, priority: int = None) -> str:
+    """use_cache=False(또는 GPT_CACHE_DISABLED)면 캐시를 건너뛰고 새로 생성"""
+    use_cache = use_cache and not GPT_CACHE_DISABLED
+    key = CompletionCache.make_key(DEPLOYMENT_NAME, messages, temperature, max_tokens)
+    if use_cache and (cached := completion_cache.get(key)) is not None:
+        return cached
+
+    response = create_completion(messages, temperature, max_tokens, priority=priority)
+    _record_usage(response.usage)
+    content = response.choices[0].message.content
+    if content is not None:
+        completion_cache.put(key, content)
+    return content
+
+def submit_task(fn, *args, **kwargs):
+    """GPT 호출을 포함한 작업을 GPT 스레드 풀에 제출 (동시 호출 수 제한을 함께 적용)"""
+    return _executor.submit(fn, *args, **kwargs)
+
+def submit_report(prompt: str, use_cache: bool = True):
+    """프롬프트 하나를 스레드 풀에 제출하고 Future 반환"""
+    return _executor.submit(complete_chat, [{"role": "user", "content": prompt}], use_cache=use_cache)
+
+def get_reports_from_gpt(prompts: list[str], use_cache: bool = True) -> list[str]:
+    """여러 프롬프트를 동시에(최대 GPT_MAX_CONCURRENCY개) 호출하고, 입력 순서대로 결과 반환"""
+    futures = [submit_report(prompt, use_cache) for prompt in prompts]
+    return [future.result() for future in futures]
+
+def get_report_from_gpt(prompt: str, use_cache: bool = True) -> str:
+    return submit_report(prompt, use_cache).result()
+
+
+class CompletionStream:
+    """
+    stream=True 응답을 토큰(문자열 조각) 단위로 내보내는 이터레이터
+    - 순회가 끝나면 text에 전체 텍스트가 남음
+    - time_to_first_token: 요청 시작부터 첫 토큰까지 걸린 시간(초)
+    - 캐시에 같은 요청이 있으면 저장된 텍스트를 한 번에 내보냄
+    """
+
+    def __init__(self, messages: list[dict], temperature: float, max_tokens: int, use_cache: bool = True,
+                 priority: int = None):
+        self.messages = messages
+        self.priority = priority
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.use_cache = use_cache and not GPT_CACHE_DISABLED
+        self.text = ""
+        self.time_to_first_token = None
+        self.cached = False
+
+    def __iter__(self):
+        key = CompletionCache.make_key(DEPLOYMENT_NAME, self.messages, self.temperature, self.max_tokens)
+        if self.use_cache and (cached := completion_cache.get(key)) is not None:
+            self.text = cached
+            self.cached = True
+            yield cached
+            return
+
+        started = time.perf_counter()
+        response = create_completion(self.messages, self.temperature, self.max_tokens,
+                                     stream=True, priority=self.priority)
+        parts = []
+        for chunk in response:
+            # Azure는 콘텐츠 필터 결과 등 choices가 빈 청크를 먼저 보내기도 함
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            if self.time_to_first_token is None:
+                self.time_to_first_token = time.perf_counter() - started
+                time_to_first_token_history.append(self.time_to_first_token)
+            parts.append(chunk.choices[0].delta.content)
+            yield parts[-1]
+        self.text = "".join(parts)
+        if self.text:
+            completion_cache.put(key, self.text)
+
+def stream_chat(messages: list[dict], temperature: float = 0.5, max_tokens: int = 2048,
+                use_cache: bool = True, priority: int = None) -> CompletionStream:
+    return CompletionStream(messages, temperature, max_tokens, use_cache, priority)
+
+def stream_report_from_gpt(prompt: str, use_cache: bool = True) -> CompletionStream:
+    return stream_chat([{"role": "user", "content": prompt}], use_cache=use_cache)
+
+def stream_in_background(stream: CompletionStream):
+    """
+    stream을 스레드 풀에서 미리 받아 두고, 받은 토큰을 순서대로 내보내는 제너레이터
+    (앞의 리포트를 화면에 그리는 동안 다음 리포트 생성을 동시에 진행할 때 사용)
+    """
+    tokens = queue.Queue()
+    done = object()
+
+    def pump():
+        try:
+            for token in stream:
+                tokens.put(token)
+        except Exception as e:
+            tokens.put(e)
+        finally:
+            tokens.put(done)
+
+    def drain():
+        while (item := tokens.get()) is not done:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    # 제너레이터를 순회하기 전에 바로 요청을 시작
+    _executor.submit(pump)
+    return drain()
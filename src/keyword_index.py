@@ -0,0 +1,123 @@
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+# 키워드 검색과 함께 사용할 수 있는 필터 컬럼
+FILTER_COLUMNS = ['SeatType', 'sentiment', 'year', 'month', 'ClusterID']
+
+
+class KeywordIndex:
+    """
+    키워드(명사/형용사) → 해당 키워드가 등장한 행 번호 역색인
+    - 문서-단어 행렬(KeywordMatrix)을 CSC로 변환해 단어별 정렬된 행 번호 배열(uint32)을 보관
+    - 필터 컬럼은 정수 코드로 미리 인코딩해 두어, 검색 결과 행에 대해서만 비교
+    """
+
+    def __init__(self, df: pd.DataFrame, keyword_matrices):
+        self.n_rows = len(df)
+
+        self._postings = []
+        for keywords in keyword_matrices:
+            csc = keywords.matrix.tocsc()
+            csc.sort_indices()
+            self._postings.append((keywords.vocab_index, csc.indptr, csc.indices.astype(np.uint32)))
+        self.vocabulary = sorted(set().union(*(keywords.vocab_index for keywords in keyword_matrices)))
+
+        self._filters = {}
+        for col in FILTER_COLUMNS:
+            if col in df.columns:
+                codes, uniques = pd.factorize(df[col])
+                self._filters[col] = (codes.astype(np.int32), {value: i for i, value in enumerate(uniques)})
+
+    def append(self, df: pd.DataFrame, keyword_matrices) -> "KeywordIndex":
+        """
+        df(기존 행 + 새 행) 기준 새 색인 (기존 객체는 그대로)
+        - keyword_matrices: 새 행까지 이어 붙인 KeywordMatrix 목록 (KeywordMatrix.append 결과)
+        - 새 행만 CSC로 변환해 단어별 행 번호 뒤에 붙임 (새 행 번호가 더 크므로 정렬 유지, 정렬/파싱은 새 행만)
+        - 필터 컬럼은 새 행 값만 기존 코드 번호로 인코딩
+        """
+        delta_df = df.iloc[self.n_rows:]
+        if set(self._filters) != {col for col in FILTER_COLUMNS if col in df.columns}:
+            return KeywordIndex(df, keyword_matrices)
+
+        index = KeywordIndex.__new__(KeywordIndex)
+        index.n_rows = len(df)
+
+        index._postings = []
+        for (_, indptr, indices), keywords in zip(self._postings, keyword_matrices):
+            delta = keywords.matrix[self.n_rows:].tocsc()
+            delta.sort_indices()
+            old_counts = np.zeros(len(keywords.vocab), dtype=np.int64)
+            old_counts[:len(indptr) - 1] = np.diff(indptr)
+            new_counts = np.diff(delta.indptr)
+            merged_indptr = np.zeros(len(keywords.vocab) + 1, dtype=np.int64)
+            np.cumsum(old_counts + new_counts, out=merged_indptr[1:])
+            # 단어 j의 기존 행 번호는 merged_indptr[j]부터, 새 행 번호는 그 뒤에 배치
+            merged = np.empty(merged_indptr[-1], dtype=np.uint32)
+            old_shift = np.repeat(merged_indptr[:len(indptr) - 1] - indptr[:-1], old_counts[:len(indptr) - 1])
+            merged[np.arange(len(indices)) + old_shift] = indices
+            new_shift = np.repeat(merged_indptr[:-1] + old_counts - delta.indptr[:-1], new_counts)
+            merged[np.arange(delta.nnz) + new_shift] = delta.indices + self.n_rows
+            index._postings.append((keywords.vocab_index, merged_indptr, merged))
+        index.vocabulary = sorted(set().union(*(keywords.vocab_index for keywords in keyword_matrices)))
+
+        index._filters = {}
+        for col, (codes, code_index) in self._filters.items():
+            delta_codes, uniques = pd.factorize(delta_df[col])
+            code_index = dict(code_index)
+            for value in uniques:
+                code_index.setdefault(value, len(code_index))
+            remap = np.array([code_index[value] for value in uniques], dtype=np.int32)
+            delta_codes = np.where(delta_codes >= 0, remap[delta_codes] if len(remap) else -1, -1)
+            index._filters[col] = (np.concatenate([codes, delta_codes.astype(np.int32)]), code_index)
+        return index
+
+    def levels(self, col: str) -> list:
+        """필터 컬럼에 존재하는 값 목록"""
+        return list(self._filters[col][1]) if col in self._filters else []
+
+    def postings(self, word: str) -> np.ndarray:
+        """word가 등장한 행 번호 (오름차순)"""
+        found = []
+        for vocab_index, indptr, indices in self._postings:
+            j = vocab_index.get(word)
+            if j is not None:
+                found.append(indices[indptr[j]:indptr[j + 1]])
+        if not found:
+            return np.zeros(0, dtype=np.uint32)
+        if len(found) == 1:
+            return found[0]
+        return np.unique(np.concatenate(found))
+
+    def search(self, words, mode: str = 'and', filters: dict = None) -> np.ndarray:
+        """
+        words를 AND/OR로 결합한 뒤 filters({컬럼: 값}, 값이 None이면 무시)를 적용한 행 번호
+        """
+        postings = [self.postings(word) for word in words]
+        if not postings:
+            rows = np.arange(self.n_rows, dtype=np.uint32)
+        elif mode == 'and':
+            # 짧은 목록부터 교집합을 구해 중간 결과를 최소화
+            postings.sort(key=len)
+            rows = reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), postings)
+        elif mode == 'or':
+            rows = reduce(np.union1d, postings)
+        else:
+            raise ValueError(f"Unknown search mode: {mode}")
+
+        for col, value in (filters or {}).items():
+            if value is None or col not in self._filters:
+                continue
+            codes, code_index = self._filters[col]
+            code = code_index.get(value)
+            if code is None:
+                return np.zeros(0, dtype=np.uint32)
+            rows = rows[codes[rows] == code]
+        return rows
+
+    @staticmethod
+    def page(df: pd.DataFrame, rows: np.ndarray, page: int = 0, page_size: int = 20) -> pd.DataFrame:
+        """검색 결과 행 중 page번째 페이지의 원본 리뷰 행"""
+        start = page * page_size
+        return df.iloc[rows[start:start + page_size]]
@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from src.review_cube import expand_levels, factorize_dims, union_levels
+
+
+class KeywordMatrix:
+    """
+    쉼표로 구분된 키워드 컬럼(Nouns 등)을 한 번에 파싱한 희소 문서-단어 행렬
+    - matrix[i, j] : i번째 행(리뷰)에서 vocab[j] 단어가 등장한 횟수
+    - 행 순서는 입력 Series의 위치(position)와 같음
+    """
+
+    def __init__(self, keywords: pd.Series):
+        tokens = (
+            keywords.reset_index(drop=True)
+            .fillna('')
+            .astype(str)
+            .str.split(',')
+            .explode()
+            .str.strip()
+        )
+        tokens = tokens[tokens != '']
+
+        word_codes, vocab = pd.factorize(tokens)
+        matrix = sparse.csr_matrix(
+            (np.ones(len(word_codes), dtype=np.int32), (tokens.index.to_numpy(), word_codes)),
+            shape=(len(keywords), len(vocab)),
+        )
+        self._set(vocab, matrix)
+
+    @classmethod
+    def from_parts(cls, vocab, matrix: sparse.csr_matrix) -> "KeywordMatrix":
+        """저장해 둔 단어 목록과 행렬(스냅샷 등)로 복원"""
+        keywords = cls.__new__(cls)
+        keywords._set(vocab, matrix)
+        return keywords
+
+    def _set(self, vocab, matrix):
+        self.vocab = np.asarray(vocab, dtype=object)
+        self.vocab_index = {word: i for i, word in enumerate(self.vocab)}
+        self.matrix = matrix
+        # 전체 데이터 기준 단어 빈도
+        self.total_counts = np.asarray(self.matrix.sum(axis=0)).ravel()
+
+    def append(self, keywords: pd.Series) -> "KeywordMatrix":
+        """
+        새 행을 아래에 이어 붙인 새 행렬 (기존 객체는 그대로)
+        - 새 행만 파싱하고, 처음 보는 단어는 단어 목록 끝에 추가 (기존 단어 번호 유지)
+        - 전체 단어 빈도는 새 행의 빈도만 더해 갱신
+        """
+        delta = KeywordMatrix(keywords)
+        new_words = [word for word in delta.vocab if word not in self.vocab_index]
+        vocab = np.concatenate([self.vocab, np.asarray(new_words, dtype=object)])
+
+        appended = KeywordMatrix.__new__(KeywordMatrix)
+        appended.vocab = vocab
+        appended.vocab_index = {**self.vocab_index, **{word: len(self.vocab) + i for i, word in enumerate(new_words)}}
+        # 새 행의 열 번호를 합친 단어 목록 기준으로 변환
+        columns = np.array([appended.vocab_index[word] for word in delta.vocab], dtype=np.int32)
+        delta_matrix = sparse.csr_matrix(
+            (delta.matrix.data, columns[delta.matrix.indices], delta.matrix.indptr),
+            shape=(len(delta), len(vocab)),
+        )
+        matrix = sparse.csr_matrix(
+            (self.matrix.data, self.matrix.indices, self.matrix.indptr), shape=(len(self), len(vocab))
+        )
+        appended.matrix = sparse.vstack([matrix, delta_matrix], format='csr')
+        appended.total_counts = np.r_[self.total_counts, np.zeros(len(new_words), dtype=self.total_counts.dtype)]
+        np.add.at(appended.total_counts, columns, delta.total_counts)
+        return appended
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def counts(self, mask=None) -> np.ndarray:
+        """mask(불리언 배열)에 해당하는 행들의 단어별 빈도"""
+        if mask is None:
+            return self.total_counts
+        rows = np.flatnonzero(np.asarray(mask))
+        return np.asarray(self.matrix[rows].sum(axis=0)).ravel()
+
+    def top_k(self, mask=None, k: int = 10):
+        """빈도 상위 k개 (단어, 빈도) 리스트"""
+        counts = self.counts(mask)
+        nonzero = np.flatnonzero(counts)
+        if len(nonzero) == 0:
+            return []
+        order = nonzero[np.argsort(-counts[nonzero], kind='stable')][:k]
+        return [(self.vocab[j], int(counts[j])) for j in order]
+
+    def frequencies(self, mask=None) -> dict:
+        """워드클라우드 등에 쓰는 {단어: 빈도} 딕셔너리"""
+        counts = self.counts(mask)
+        nonzero = np.flatnonzero(counts)
+        return {self.vocab[j]: int(counts[j]) for j in nonzero}
+
+
+class GroupKeywordCounts:
+    """
+    (좌석, 추천여부, 클러스터) 그룹별 단어 빈도 = 더할 수 있는 부분 집계
+    - counts[s, e, c, j] : 그룹에 속한 리뷰에서 vocab[j] 단어가 등장한 횟수 (각 축의 마지막 칸은 결측값)
+    - 단어 순서는 KeywordMatrix와 같아서 빈도가 같을 때 top_k 순서도 같음
+    """
+
+    dims = ['SeatType', 'sentiment', 'ClusterID']
+
+    def __init__(self, df: pd.DataFrame, keywords: KeywordMatrix):
+        self.levels, codes = factorize_dims(df, self.dims)
+        shape = tuple(len(self.levels[dim]) + 1 for dim in self.dims)
+        groups = np.ravel_multi_index(codes, shape) if len(df) else np.zeros(0, dtype=np.intp)
+        indicator = sparse.csr_matrix(
+            (np.ones(len(groups), dtype=np.int32), (groups, np.arange(len(groups)))),
+            shape=(int(np.prod(shape)), len(groups)),
+        )
+        counts = (indicator @ keywords.matrix).toarray()
+        self._set(keywords.vocab, counts.reshape(shape + (len(keywords.vocab),)))
+
+    @classmethod
+    def from_parts(cls, levels: dict, vocab, counts: np.ndarray) -> "GroupKeywordCounts":
+        group_counts = cls.__new__(cls)
+        group_counts.levels = levels
+        group_counts._set(vocab, counts)
+        return group_counts
+
+    def _set(self, vocab, counts):
+        self.vocab = np.asarray(vocab, dtype=object)
+        self.counts = counts
+        self._index = {dim: {value: i for i, value in enumerate(self.levels[dim])} for dim in self.dims}
+
+    def merge(self, other: "GroupKeywordCounts", vocab) -> "GroupKeywordCounts":
+        """
+        두 부분 집계를 더한 새 집계
+        vocab: 두 단어 목록을 모두 포함하고 앞부분이 self.vocab과 같은 단어 목록 (KeywordMatrix.append 결과)
+        """
+        levels = union_levels(self.levels, other.levels)
+        counts = expand_levels(self.counts, self.levels, levels)
+        counts = np.concatenate(
+            [counts, np.zeros(counts.shape[:-1] + (len(vocab) - len(self.vocab),), dtype=counts.dtype)], axis=-1
+        )
+        vocab_index = pd.Index(vocab)
+        counts[..., vocab_index.get_indexer(other.vocab)] += expand_levels(other.counts, other.levels, levels)
+        return GroupKeywordCounts.from_parts(levels, vocab, counts)
+
+    def top_k(self, k: int = 10, **groups):
+        """groups({축: 값}, 지정하지 않은 축은 전체 합산)의 빈도 상위 k개 (단어, 빈도) 리스트"""
+        selection = []
+        for dim in self.dims:
+            if dim not in groups:
+                selection.append(slice(None))
+                continue
+            i = self._index[dim].get(groups[dim])
+            if i is None:
+                return []
+            selection.append(i)
+        counts = self.counts[tuple(selection)]
+        # 지정하지 않은 축 합산 (단어가 하나도 없는 데이터도 처리되도록 reshape 대신 축 합계)
+        counts = counts.sum(axis=tuple(range(counts.ndim - 1)))
+        nonzero = np.flatnonzero(counts)
+        order = nonzero[np.argsort(-counts[nonzero], kind='stable')][:k]
+        return [(self.vocab[j], int(counts[j])) for j in order]
@@ -0,0 +1,65 @@
+import importlib.util
+import logging
+import os
+import threading
+
+import httpx
+from dotenv import load_dotenv
+from openai import AzureOpenAI
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# 연결 풀 / keep-alive / 타임아웃 설정 (프로세스 전체가 하나의 풀을 공유)
+GPT_HTTP_MAX_CONNECTIONS    = int(os.getenv("GPT_HTTP_MAX_CONNECTIONS", "20"))
+GPT_HTTP_MAX_KEEPALIVE      = int(os.getenv("GPT_HTTP_MAX_KEEPALIVE", "10"))
+GPT_HTTP_KEEPALIVE_EXPIRY   = float(os.getenv("GPT_HTTP_KEEPALIVE_EXPIRY", "60"))
+GPT_HTTP_CONNECT_TIMEOUT    = float(os.getenv("GPT_HTTP_CONNECT_TIMEOUT", "10"))
+GPT_HTTP_TIMEOUT            = float(os.getenv("GPT_HTTP_TIMEOUT", "120"))
+# HTTP/2는 h2 패키지(pip install "httpx[http2]")가 있어야 사용 가능
+GPT_HTTP2                   = os.getenv("GPT_HTTP2", "false").lower() == "true"
+
+_client = None
+_lock = threading.Lock()
+
+
+def _http2_available() -> bool:
+    if not GPT_HTTP2:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("GPT_HTTP2=true 이지만 h2 패키지가 없어 HTTP/1.1로 연결합니다.")
+        return False
+    return True
+
+
+def build_http_client() -> httpx.Client:
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=GPT_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=GPT_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=GPT_HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(GPT_HTTP_TIMEOUT, connect=GPT_HTTP_CONNECT_TIMEOUT),
+        http2=_http2_available(),
+    )
+
+
+def get_client() -> AzureOpenAI:
+    """
+    프로세스에 하나뿐인 AzureOpenAI 클라이언트 (처음 호출할 때 생성)
+    모든 리포트 호출/세션이 같은 연결 풀을 써서 TCP/TLS 연결을 재사용
+    """
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = AzureOpenAI(
+                    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+                    api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
+                    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+                    http_client=build_http_client(),
+                    # 429·5xx·408/409·타임아웃·연결 오류 재시도는 gpt_client가 스케줄러와 함께 처리
+                    max_retries=0,
+                )
+    return _client
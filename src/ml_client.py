@@ -0,0 +1,308 @@
+import gzip
+import io
+import logging
+import os
+import random
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+from src.analysis_cache import frame_hash
+from src.ml_result_cache import ScoreCache
+from src.near_duplicates import near_duplicate_groups, review_text_column
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+ML_ENDPOINT    = os.getenv("ML_ENDPOINT")
+ML_PRIMARY_KEY = os.getenv("ML_PRIMARY_KEY")
+
+# 배치 분할 / 동시 호출 / 재시도 설정
+ML_BATCH_SIZE     = int(os.getenv("ML_BATCH_SIZE", "1000"))
+ML_MAX_WORKERS    = int(os.getenv("ML_MAX_WORKERS", "4"))
+ML_MAX_RETRIES    = int(os.getenv("ML_MAX_RETRIES", "3"))
+ML_TIMEOUT        = int(os.getenv("ML_TIMEOUT", "300"))
+# 재시도 대기 시간 상한 (초, 429 응답의 Retry-After도 이 값을 넘지 않음)
+ML_MAX_BACKOFF    = float(os.getenv("ML_MAX_BACKOFF", "60"))
+ML_CHECKPOINT_DIR = Path(os.getenv("ML_CHECKPOINT_DIR", ".cache/azure_ml"))
+
+# 요청 인코딩 설정
+# - records : {"data": [{...}, ...]} (기존 스코어링 스크립트 형식)
+# - split   : {"data": {"columns": [...], "data": [[...], ...]}} (컬럼 기준, 키 반복 없음)
+# - arrow   : Arrow IPC 스트림 (스코어링 스크립트가 지원해야 함)
+ML_PAYLOAD_FORMAT = os.getenv("ML_PAYLOAD_FORMAT", "records")
+ML_PAYLOAD_GZIP   = os.getenv("ML_PAYLOAD_GZIP", "false").lower() == "true"
+
+# 유사(복사/템플릿) 리뷰는 그룹 대표 행만 스코어링하고 결과를 그룹 전체에 복사
+ML_DEDUP_NEAR_DUPLICATES = os.getenv("ML_DEDUP_NEAR_DUPLICATES", "false").lower() == "true"
+
+ARROW_STREAM_TYPE = "application/vnd.apache.arrow.stream"
+
+# 재시도할 HTTP 상태 코드
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# CSV 응답의 알려진 결과 컬럼 타입 (pyarrow 파서의 추론에 맡기지 않고 고정)
+# - 평점은 결측이 있어도 같은 타입이 되도록 float64, ClusterID는 결측을 허용하는 정수
+RESULT_DTYPES = {
+    'SeatType': 'str',
+    'Recommended': 'str',
+    'TypeOfTraveller': 'str',
+    'ClusterID': 'Int64',
+    'OverallRating': 'float64',
+    'SeatComfort': 'float64',
+    'CabinStaffService': 'float64',
+    'Food&Beverages': 'float64',
+    'GroundService': 'float64',
+    'InflightEntertainment': 'float64',
+    'Nouns': 'str',
+    'Adjectives/Adverbs': 'str',
+    'Review': 'str',
+}
+
+
+def _make_session() -> requests.Session:
+    # 워커 수만큼 keep-alive 연결을 재사용하는 세션
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=ML_MAX_WORKERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "Authorization": f"Bearer {ML_PRIMARY_KEY}"
+    })
+    return session
+
+
+session = _make_session()
+result_cache = ScoreCache()
+
+
+def encode_payload(df: pd.DataFrame, payload_format: str = ML_PAYLOAD_FORMAT, use_gzip: bool = ML_PAYLOAD_GZIP):
+    """
+    DataFrame → (요청 바디 bytes, 헤더)
+    JSON 형식은 pandas의 C 인코더(to_json)로 바로 직렬화 (NaN/Inf → null, 실수는 유효숫자 15자리)
+    """
+    if payload_format == "arrow":
+        # Inf → NaN (Arrow에서는 null로 전송)
+        df = df.replace([np.inf, -np.inf], np.nan)
+        sink = io.BytesIO()
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        body = sink.getvalue()
+        headers = {"Content-Type": ARROW_STREAM_TYPE}
+    elif payload_format in ("records", "split"):
+        if payload_format == "split":
+            data = df.to_json(orient="split", index=False, double_precision=15)
+        else:
+            data = df.to_json(orient="records", double_precision=15)
+        body = b'{"data":' + data.encode("utf-8") + b"}"
+        headers = {"Content-Type": "application/json"}
+    else:
+        raise ValueError(f"Unknown payload format: {payload_format}")
+
+    if use_gzip:
+        body = gzip.compress(body, compresslevel=1)
+        headers["Content-Encoding"] = "gzip"
+    return body, headers
+
+
+def result_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """알려진 결과 컬럼을 RESULT_DTYPES로 맞춤 (새 호출 / 결과 캐시 / 유사 리뷰 복사 경로의 타입을 통일)"""
+    return df.astype({col: dtype for col, dtype in RESULT_DTYPES.items() if col in df.columns})
+
+
+def decode_response(response: requests.Response) -> pd.DataFrame:
+    """Azure ML 응답 → DataFrame (Arrow 스트림 또는 {"csv_data": "..."} JSON)"""
+    if response.headers.get("Content-Type", "").startswith(ARROW_STREAM_TYPE):
+        return pa.ipc.open_stream(response.content).read_pandas()
+
+    result_json = response.json()
+    if "csv_data" not in result_json:
+        raise RuntimeError(f"Unexpected response format: {list(result_json)[:10]}")
+    # pyarrow CSV 파서로 멀티스레드 파싱 (알려진 컬럼은 타입 고정)
+    df = pd.read_csv(io.BytesIO(result_json["csv_data"].encode("utf-8")), engine="pyarrow", dtype=RESULT_DTYPES)
+    # 그 밖의 컬럼 중 pyarrow가 날짜로 읽은 컬럼은 기본 파서처럼 문자열로 유지
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].astype("str")
+    return df
+
+
+def _post_with_retry(body: bytes, headers: dict) -> requests.Response:
+    for attempt in range(ML_MAX_RETRIES + 1):
+        retry_after = None
+        try:
+            response = session.post(ML_ENDPOINT, data=body, headers=headers, timeout=ML_TIMEOUT)
+            if response.status_code not in RETRY_STATUS:
+                response.raise_for_status()
+                return response
+            retry_after = response.headers.get("Retry-After")
+            error = requests.HTTPError(f"{response.status_code} Error from Azure ML", response=response)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+
+        if attempt == ML_MAX_RETRIES:
+            raise error
+        # 지수 백오프 (+ jitter), 429 응답의 Retry-After가 있으면 우선
+        delay = float(retry_after) if retry_after and retry_after.isdigit() else 2 ** attempt + random.random()
+        delay = min(delay, ML_MAX_BACKOFF)
+        logger.warning("Azure ML 호출 실패(%s), %.1f초 후 재시도 (%d/%d)", error, delay, attempt + 1, ML_MAX_RETRIES)
+        time.sleep(delay)
+
+
+def _score_batch(batch: pd.DataFrame, checkpoint_path: Path) -> dict:
+    """배치 하나를 호출하고, 결과를 Arrow(Feather) 체크포인트 파일로 저장"""
+    started = time.perf_counter()
+    body, headers = encode_payload(batch)
+    encoded = time.perf_counter()
+    response = _post_with_retry(body, headers)
+    responded = time.perf_counter()
+    df_result = decode_response(response)
+    decoded = time.perf_counter()
+
+    # 중간에 중단되어도 깨진 파일이 남지 않도록 임시 파일에 쓴 뒤 교체
+    tmp_path = checkpoint_path.with_suffix(".tmp")
+    df_result.to_feather(tmp_path)
+    os.replace(tmp_path, checkpoint_path)
+
+    return {
+        "rows": len(batch),
+        "request_bytes": len(body),
+        "response_bytes": len(response.content),
+        "encode_sec": encoded - started,
+        "request_sec": responded - encoded,
+        "decode_sec": decoded - responded,
+    }
+
+
+def _score_frame(df_input: pd.DataFrame, progress=None) -> pd.DataFrame:
+    """
+    1) DataFrame → ML_BATCH_SIZE 행 단위 배치로 분할
+    2) 배치별 Azure ML 호출을 최대 ML_MAX_WORKERS개 동시에 수행 (실패 시 백오프 재시도)
+    3) 완료된 배치의 "csv_data"는 체크포인트로 저장 → 다시 실행하면 남은 배치만 호출
+    4) 모든 배치 결과를 원래 순서대로 합쳐 DataFrame으로 반환
+    progress(완료 배치 수, 전체 배치 수) 콜백으로 진행 상황을 알림
+    """
+    # 보낼 행이 없으면 호출하지 않음
+    if len(df_input) == 0:
+        if progress:
+            progress(1, 1)
+        return pd.DataFrame()
+
+    checkpoint_dir = ML_CHECKPOINT_DIR / f"{frame_hash(df_input)}_{ML_BATCH_SIZE}"
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+
+    starts = list(range(0, len(df_input), ML_BATCH_SIZE))
+    paths = [checkpoint_dir / f"batch_{i:06d}.arrow" for i in range(len(starts))]
+    pending = [i for i, path in enumerate(paths) if not path.exists()]
+    done = len(paths) - len(pending)
+
+    # 디버그용 로그: 전송 전 레코드/배치 수만 기록
+    logger.info("Azure ML 전송: 총 %d개 레코드를 %d개 배치로 전송 (형식: %s%s, 완료된 배치 %d개 재사용)",
+                len(df_input), len(paths), ML_PAYLOAD_FORMAT, "+gzip" if ML_PAYLOAD_GZIP else "", done)
+    started = time.perf_counter()
+    stats = []
+    if progress:
+        progress(done, len(paths))
+
+    with ThreadPoolExecutor(max_workers=ML_MAX_WORKERS) as executor:
+        futures = [
+            executor.submit(_score_batch, df_input.iloc[starts[i]:starts[i] + ML_BATCH_SIZE], paths[i])
+            for i in pending
+        ]
+        for future in as_completed(futures):
+            try:
+                stats.append(future.result())
+            except Exception:
+                # 아직 시작하지 않은 배치는 취소 (완료된 배치는 체크포인트에 남음)
+                for f in futures:
+                    f.cancel()
+                raise
+            done += 1
+            if progress:
+                progress(done, len(paths))
+
+    df_result = pd.concat([pd.read_feather(path) for path in paths], ignore_index=True)
+    shutil.rmtree(checkpoint_dir, ignore_errors=True)
+
+    # 디버그용 로그: 응답 전체 대신 크기/시간 요약만 기록
+    if stats:
+        logger.info("Azure ML 요약: 요청 %.2fMB / 응답 %.2fMB, 인코딩 %.2f초, 호출 %.2f초, 디코딩 %.2f초 (배치 합계)",
+                    sum(s['request_bytes'] for s in stats) / 1e6, sum(s['response_bytes'] for s in stats) / 1e6,
+                    sum(s['encode_sec'] for s in stats), sum(s['request_sec'] for s in stats),
+                    sum(s['decode_sec'] for s in stats))
+    logger.info("Azure ML 결과 %d행, 전체 %.2f초", len(df_result), time.perf_counter() - started)
+    return df_result
+
+
+def _call_cached(df_input: pd.DataFrame, progress=None, use_cache: bool = True) -> pd.DataFrame:
+    """
+    행 단위 결과 캐시(ScoreCache)를 거쳐 Azure ML 호출
+    1) 입력 행별 해시로 캐시 조회 → 캐시에 없는 행만 배치 호출
+    2) 새 결과를 캐시에 저장하고, 캐시된 결과와 합쳐 입력 순서대로 반환
+    """
+    if not use_cache or len(df_input) == 0:
+        return _score_frame(df_input, progress)
+
+    keys = result_cache.row_keys(df_input, namespace=ML_ENDPOINT or "")
+    cached = result_cache.get_many(keys)
+    hit_mask = np.fromiter((key in cached for key in keys), dtype=bool, count=len(keys))
+    logger.info("Azure ML 결과 캐시: %d행 적중 / %d행 호출 필요 (누적 적중률 %.1f%%)",
+                hit_mask.sum(), (~hit_mask).sum(), result_cache.hit_rate * 100)
+
+    parts = []
+    if hit_mask.any():
+        df_cached = ScoreCache.rows_to_frame([cached[key] for key in keys[hit_mask]])
+        df_cached.index = np.flatnonzero(hit_mask)
+        parts.append(df_cached)
+
+    if (~hit_mask).any():
+        df_fresh = _score_frame(df_input[~hit_mask], progress)
+        if len(df_fresh) != (~hit_mask).sum():
+            # 입력/결과 행이 1:1로 대응하지 않으면 행 단위 캐시를 쓸 수 없음 → 전체 호출
+            logger.warning("결과 행 수가 입력과 달라 캐시 없이 전체를 다시 호출합니다.")
+            return df_fresh if not hit_mask.any() else _score_frame(df_input, progress)
+        result_cache.put_many(keys[~hit_mask], df_fresh)
+        df_fresh.index = np.flatnonzero(~hit_mask)
+        parts.append(df_fresh)
+    elif progress:
+        progress(1, 1)
+
+    return pd.concat(parts).sort_index().reset_index(drop=True)
+
+
+
+def call_azure_ml(df_input: pd.DataFrame, progress=None, use_cache: bool = True,
+                  dedup: bool = ML_DEDUP_NEAR_DUPLICATES) -> pd.DataFrame:
+    """
+    dedup=True면 유사 리뷰 그룹(MinHash/LSH)의 대표 행만 호출하고 모델 출력 컬럼을 그룹 전체에 복사
+    (입력에 있던 컬럼은 각 행의 원래 값 유지)
+    결과에 DupGroup(그룹 id), DupWeight(대표 행의 그룹 크기, 나머지 0) 컬럼 추가
+    """
+    text_col = review_text_column(df_input)
+    if not dedup or text_col is None or len(df_input) == 0:
+        return result_dtypes(_call_cached(df_input, progress, use_cache))
+
+    group_ids, weights = near_duplicate_groups(df_input[text_col])
+    representatives = np.flatnonzero(weights > 0)
+    logger.info("유사 리뷰 제거: %d행 → 대표 %d행만 호출", len(df_input), len(representatives))
+
+    df_result = _call_cached(df_input.iloc[representatives], progress, use_cache)
+    if len(df_result) != len(representatives):
+        logger.warning("결과 행 수가 입력과 달라 유사 리뷰 제거 없이 전체를 다시 호출합니다.")
+        return result_dtypes(_call_cached(df_input, progress, use_cache))
+
+    # 대표 행의 모델 출력을 같은 그룹의 모든 행에 복사하고, 입력 컬럼(좌석, 평점 등)은 각 행의 값으로 되돌림
+    df_result = df_result.iloc[group_ids].reset_index(drop=True)
+    df_input = df_input.reset_index(drop=True)
+    for col in df_result.columns.intersection(df_input.columns):
+        df_result[col] = df_input[col]
+    return result_dtypes(df_result.assign(DupGroup=group_ids, DupWeight=weights))
\ No newline at end of file
@@ -0,0 +1,110 @@
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.sqlite_lru import connect, evict_lru
+
+ML_CACHE_PATH   = Path(os.getenv("ML_CACHE_PATH", ".cache/azure_ml_results.sqlite"))
+ML_CACHE_MAX_MB = float(os.getenv("ML_CACHE_MAX_MB", "512"))
+# 모델/스코어링 스크립트가 바뀌면 값을 올려 기존 캐시를 무효화
+ML_CACHE_VERSION = os.getenv("ML_CACHE_VERSION", "1")
+
+# SQLite IN (...) 절에 한 번에 넣을 키 개수
+_CHUNK = 900
+
+
+class ScoreCache:
+    """
+    Azure ML 스코어링 결과를 입력 행 단위로 보관하는 SQLite 캐시
+    - key  : (엔드포인트, 캐시 버전, 컬럼 목록, 행 값)의 해시
+    - row  : 결과 행 JSON
+    - size : 결과 행 JSON의 UTF-8 바이트 수
+    - 전체 크기가 max_mb를 넘으면 가장 오래 사용되지 않은 행부터 삭제
+    """
+
+    def __init__(self, path: Path = ML_CACHE_PATH, max_mb: float = ML_CACHE_MAX_MB):
+        self.path = Path(path)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY, row TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results(last_used)")
+
+    def _connect(self):
+        return connect(self.path)
+
+    @staticmethod
+    def row_keys(df: pd.DataFrame, namespace: str = "") -> np.ndarray:
+        """행별 캐시 키 (행 값의 64bit 해시 + 컬럼/버전 해시)"""
+        prefix = hashlib.sha256(
+            f"{namespace}|{ML_CACHE_VERSION}|{','.join(map(str, df.columns))}".encode("utf-8")
+        ).hexdigest()[:16]
+        row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        return np.array([f"{prefix}{h:016x}" for h in row_hashes.tolist()], dtype=object)
+
+    def get_many(self, keys) -> dict:
+        """{key: 결과 행 JSON} (캐시에 있는 키만)"""
+        unique_keys = list(dict.fromkeys(keys))
+        found = {}
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            for i in range(0, len(unique_keys), _CHUNK):
+                chunk = unique_keys[i:i + _CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(conn.execute(
+                    f"SELECT key, row FROM results WHERE key IN ({placeholders})", chunk
+                ).fetchall())
+                conn.execute(
+                    f"UPDATE results SET last_used = ? WHERE key IN ({placeholders})", [now, *chunk]
+                )
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    def put_many(self, keys, df_result: pd.DataFrame):
+        """keys[i] ↔ df_result의 i번째 행을 저장한 뒤 크기 제한에 맞게 정리"""
+        # 행마다 따로 직렬화 (리뷰 본문의 U+2028 등이 줄 구분으로 잘려 키와 행이 어긋나지 않도록)
+        # NaN/Timestamp 등은 to_json과 같은 규칙으로 바꾼 뒤 행별 JSON 문자열로 저장
+        records = json.loads(df_result.to_json(orient="records", force_ascii=False))
+        rows = [json.dumps(record, ensure_ascii=False) for record in records]
+        if len(rows) != len(keys):
+            raise ValueError(f"결과 행 수({len(rows)})가 키 수({len(keys)})와 다릅니다.")
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO results (key, row, size, last_used) VALUES (?, ?, ?, ?)",
+                [(key, row, len(row.encode("utf-8")), now) for key, row in zip(keys, rows)],
+            )
+            evict_lru(conn, "results", self.max_bytes)
+
+    @staticmethod
+    def rows_to_frame(rows) -> pd.DataFrame:
+        """저장된 결과 행 JSON 목록 → DataFrame"""
+        if not rows:
+            return pd.DataFrame()
+        return pd.read_json(io.StringIO("\n".join(rows)), lines=True, dtype=False, convert_dates=False)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate, "rows": count, "bytes": size}
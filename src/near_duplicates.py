@@ -0,0 +1,170 @@
+import copy
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+# MinHash 순열 수 / LSH 밴드 수 (밴드당 행 수 = 순열 수 ÷ 밴드 수)
+# 64 / 8 → 자카드 유사도 약 0.77 이상이면 대부분 같은 그룹으로 묶임
+DEDUP_NUM_PERM     = int(os.getenv("DEDUP_NUM_PERM", "64"))
+DEDUP_BANDS        = int(os.getenv("DEDUP_BANDS", "8"))
+# 단어 n-gram 크기 (이보다 짧은 리뷰는 단어 단위로 비교)
+DEDUP_SHINGLE_SIZE = int(os.getenv("DEDUP_SHINGLE_SIZE", "3"))
+
+# 유사 리뷰 판단에 쓸 리뷰 본문 컬럼
+# (명사/형용사 목록 컬럼은 서로 다른 리뷰도 같은 목록이 되기 쉬워 본문이 없으면 그룹화하지 않음)
+DEDUP_TEXT_COLUMNS = ['Review']
+
+# 한 번에 토큰화/MinHash를 계산할 행 수
+_CHUNK_ROWS = 50_000
+_SHIFT32 = np.uint64(32)
+
+
+def review_text_column(df: pd.DataFrame):
+    return next((col for col in DEDUP_TEXT_COLUMNS if col in df.columns), None)
+
+
+def _shingles(texts: pd.Series, shingle_size: int) -> tuple[np.ndarray, np.ndarray]:
+    """리뷰 문장 → (행 위치, 단어 n-gram 64bit 해시), 행 위치 기준 정렬"""
+    normalized = texts.astype(str).str.lower().str.replace(r"\W+", " ", regex=True).str.strip()
+    column = pa.array(normalized, type=pa.string())
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks()
+    split = pc.utf8_split_whitespace(column)
+    rows = pc.list_parent_indices(split).to_numpy()
+    words = pc.list_flatten(split).to_numpy(zero_copy_only=False).astype(object)
+    # 빈 문장은 토큰 없이 (서명 없는 단독 그룹)
+    nonempty = words != ""
+    rows, words = rows[nonempty], words[nonempty]
+    hashes = pd.util.hash_array(words)
+    if shingle_size <= 1 or len(hashes) == 0:
+        return rows, hashes
+
+    # 연속한 단어 해시를 다항식으로 합쳐 n-gram 해시 생성 (같은 행 안에서만)
+    span = len(hashes) - shingle_size + 1
+    grams = hashes[:max(span, 0)].copy()
+    with np.errstate(over="ignore"):
+        for j in range(1, shingle_size):
+            grams = grams * np.uint64(0x100000001B3) + hashes[j:j + span]
+    valid = rows[:span] == rows[shingle_size - 1:]
+    gram_rows = rows[:span][valid]
+
+    # n-gram이 하나도 없는 짧은 리뷰는 단어 해시를 그대로 사용
+    short = np.bincount(gram_rows, minlength=len(texts)) == 0
+    word_mask = short[rows]
+    all_rows = np.concatenate([gram_rows, rows[word_mask]])
+    all_hashes = np.concatenate([grams[valid], hashes[word_mask]])
+    order = np.argsort(all_rows, kind="stable")
+    return all_rows[order], all_hashes[order]
+
+
+class NearDuplicateIndex:
+    """
+    MinHash + LSH 밴딩 기반 유사(복사/템플릿) 리뷰 그룹화
+    - add(texts)로 청크 단위 입력 → 청크마다 서명을 계산하고 밴드 해시(행당 밴드 수 × 8바이트)만 보관
+    - groups()로 밴드 해시가 하나라도 같은 행끼리 연결해 그룹 id / 가중치 계산
+    - 리뷰가 추가되면 copy() 후 새 행만 extend() → 기존 행의 서명은 다시 계산하지 않음
+    """
+
+    def __init__(self, num_perm: int = DEDUP_NUM_PERM, bands: int = DEDUP_BANDS,
+                 shingle_size: int = DEDUP_SHINGLE_SIZE, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm은 bands의 배수여야 합니다.")
+        rng = np.random.default_rng(seed)
+        self.rows_per_band = num_perm // bands
+        self.shingle_size = shingle_size
+        self._a = rng.integers(1, 2**63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, num_perm, dtype=np.uint64)
+        self._band_mix = rng.integers(1, 2**63, self.rows_per_band, dtype=np.uint64) | np.uint64(1)
+        self._band_hashes = []  # 청크별 (행 수, 밴드 수) uint64
+        self._has_signature = []
+        self.n_rows = 0
+
+    def add(self, texts: pd.Series):
+        texts = texts.fillna("").reset_index(drop=True)
+        rows, hashes = _shingles(texts, self.shingle_size)
+        has_signature = np.bincount(rows, minlength=len(texts)) > 0
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]]) if len(rows) else np.array([], dtype=np.int64)
+
+        # 순열(해시 함수)별로 행 최소값 → 서명 (메모리: 청크 n-gram 수 × 8바이트)
+        signature = np.empty((len(starts), len(self._a)), dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for p in range(len(self._a)):
+                permuted = (hashes * self._a[p] + self._b[p]) >> _SHIFT32
+                signature[:, p] = np.minimum.reduceat(permuted, starts) if len(starts) else permuted[:0]
+
+            banded = signature.reshape(len(starts), -1, self.rows_per_band)
+            band_hashes = np.full((len(texts), banded.shape[1]), 0, dtype=np.uint64)
+            band_hashes[has_signature] = (banded * self._band_mix).sum(axis=2)
+
+        self._band_hashes.append(band_hashes)
+        self._has_signature.append(has_signature)
+        self.n_rows += len(texts)
+
+    def extend(self, texts: pd.Series, chunk_rows: int = _CHUNK_ROWS) -> "NearDuplicateIndex":
+        """texts를 chunk_rows 행씩 나눠 add (자기 자신 반환)"""
+        for start in range(0, len(texts), chunk_rows):
+            self.add(texts.iloc[start:start + chunk_rows])
+        return self
+
+    def copy(self) -> "NearDuplicateIndex":
+        """밴드 해시 목록만 새로 만든 복사본 (청크 배열은 공유, 이후 add는 원본에 영향 없음)"""
+        index = copy.copy(self)
+        index._band_hashes = list(self._band_hashes)
+        index._has_signature = list(self._has_signature)
+        return index
+
+    def groups(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (그룹 id, 가중치) 반환
+        - 그룹 id: 처음 나온 순서대로 0, 1, 2, ...
+        - 가중치: 그룹의 첫 행에 그룹 크기, 나머지 행은 0 (대표 행만 처리 후 가중치로 확장)
+        """
+        n = self.n_rows
+        if n == 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+        band_hashes = np.concatenate(self._band_hashes)
+        members = np.flatnonzero(np.concatenate(self._has_signature))
+
+        # 밴드마다 같은 해시를 가진 행 → 그 해시가 처음 나온 행으로 연결
+        src, dst = [], []
+        for band in range(band_hashes.shape[1]):
+            codes, _ = pd.factorize(band_hashes[members, band])
+            first = members[np.flatnonzero(~pd.Series(codes).duplicated().to_numpy())]
+            src.append(members)
+            dst.append(first[codes])
+        src, dst = np.concatenate(src), np.concatenate(dst)
+        graph = sparse.coo_matrix((np.ones(len(src), dtype=np.int8), (src, dst)), shape=(n, n))
+        _, labels = connected_components(graph, directed=False)
+
+        group_ids, _ = pd.factorize(labels)
+        first_rows = np.flatnonzero(~pd.Series(group_ids).duplicated().to_numpy())
+        weights = np.zeros(n, dtype=np.int64)
+        weights[first_rows] = np.bincount(group_ids)
+        return group_ids, weights
+
+
+def near_duplicate_groups(texts: pd.Series, chunk_rows: int = _CHUNK_ROWS) -> tuple[np.ndarray, np.ndarray]:
+    """리뷰 문장 Series → (그룹 id, 가중치), chunk_rows 행씩 나눠 서명 계산"""
+    return NearDuplicateIndex().extend(texts, chunk_rows).groups()
+
+
+def first_in_group(group_ids: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """mask에 포함된 행 중 그룹별 첫 행만 True (선택한 구간 안에서 유사 리뷰를 한 번만 집계)"""
+    rows = np.flatnonzero(mask)
+    keep = np.zeros(len(group_ids), dtype=bool)
+    keep[rows[~pd.Series(group_ids[rows]).duplicated().to_numpy()]] = True
+    return keep
+
+
+def mark_near_duplicates(df: pd.DataFrame, text_col: str = None) -> pd.DataFrame:
+    """DupGroup(유사 리뷰 그룹 id), DupWeight(대표 행의 그룹 크기, 나머지 0) 컬럼을 붙인 복사본"""
+    text_col = text_col or review_text_column(df)
+    if text_col is None:
+        return df.assign(DupGroup=np.arange(len(df)), DupWeight=1)
+    group_ids, weights = near_duplicate_groups(df[text_col])
+    return df.assign(DupGroup=group_ids, DupWeight=weights)
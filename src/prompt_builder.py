@@ -0,0 +1,135 @@
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from src.keyword_matrix import KeywordMatrix
+from src.review_cube import RATING_COLUMNS
+
+# 프롬프트에 넣을 데이터(표) 부분의 최대 토큰 수
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+
+# 군집 단위로 묶을 컬럼 (있는 컬럼만 사용)
+CLUSTER_KEYS = ['SeatType', 'Recommended', 'ClusterID']
+
+_encoding = None
+_encoding_failed = False
+
+
+def count_tokens(text: str) -> int:
+    """
+    tiktoken(o200k_base, gpt-4o 계열)으로 토큰 수 계산
+    tiktoken이 없거나 인코딩 파일을 받을 수 없으면 보수적인 근사값 사용
+    (ASCII 4글자당 1토큰, 그 외(한글 등) 1글자당 1토큰)
+    """
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _encoding_failed = True
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return -(-ascii_chars // 4) + (len(text) - ascii_chars)
+
+
+def summarize_clusters(df: pd.DataFrame, top_keywords: int = 5) -> pd.DataFrame:
+    """
+    결과 DataFrame → 군집(좌석 타입 × 추천 여부 × 클러스터)별 요약 표
+    리뷰 수, 평점 평균, 주요 여행객 유형, 대표 키워드를 한 번의 groupby로 계산
+    """
+    keys = [col for col in CLUSTER_KEYS if col in df.columns]
+    if not keys:
+        return pd.DataFrame()
+
+    grouped = df.groupby(keys, sort=True, dropna=False)
+    rating_cols = [col for col in RATING_COLUMNS if col in df.columns]
+    summary = grouped.size().rename('Count').to_frame()
+    if rating_cols:
+        summary = summary.join(grouped[rating_cols].mean().round(2))
+
+    group_ids = grouped.ngroup().to_numpy()
+    n_groups = len(summary)
+
+    if 'TypeOfTraveller' in df.columns:
+        traveller = pd.crosstab(group_ids, df['TypeOfTraveller'].to_numpy())
+        dominant = traveller.idxmax(axis=1).reindex(range(n_groups))
+        summary['DominantTraveller'] = dominant.to_numpy()
+
+    if 'Nouns' in df.columns and top_keywords > 0:
+        keywords = KeywordMatrix(df['Nouns'])
+        # 군집 지시 행렬(군집 × 행) @ 문서-단어 행렬 → 군집별 단어 빈도
+        membership = sparse.csr_matrix(
+            (np.ones(len(df), dtype=np.int32), (group_ids, np.arange(len(df)))),
+            shape=(n_groups, len(df)),
+        )
+        counts = (membership @ keywords.matrix).toarray()
+        top = np.argsort(-counts, axis=1, kind='stable')[:, :top_keywords]
+        summary['TopKeywords'] = [
+            ", ".join(keywords.vocab[j] for j in row if counts[i, j] > 0) for i, row in enumerate(top)
+        ]
+
+    return summary.reset_index()
+
+
+def _table_text(table: pd.DataFrame) -> str:
+    return table.to_csv(index=False)
+
+
+def _limit_keywords(summary: pd.DataFrame, top_keywords: int) -> pd.DataFrame:
+    if 'TopKeywords' not in summary.columns:
+        return summary
+    if top_keywords == 0:
+        return summary.drop(columns='TopKeywords')
+    limited = summary.copy()
+    limited['TopKeywords'] = limited['TopKeywords'].str.split(', ').str[:top_keywords].str.join(', ')
+    return limited
+
+
+def compact_result_table(df: pd.DataFrame, token_budget: int = PROMPT_TOKEN_BUDGET) -> tuple[str, str]:
+    """
+    프롬프트에 넣을 데이터 표를 토큰 예산 안에서 생성하고 (표 설명, 표 CSV) 반환
+    1) 군집별 요약 표 (대표 키워드 5개 → 3개 → 없음 순으로 축소)
+    2) 그래도 넘으면 리뷰 수가 많은 군집부터 예산까지만 포함
+    3) 군집 컬럼이 없으면 원본 행을 예산까지만 포함
+    """
+    full_summary = summarize_clusters(df, top_keywords=5)
+    summary = full_summary
+    for top_keywords in (5, 3, 0):
+        if full_summary.empty:
+            break
+        summary = _limit_keywords(full_summary, top_keywords)
+        text = _table_text(summary)
+        if count_tokens(text) <= token_budget:
+            return f"군집(좌석 타입 × 추천 여부 × 클러스터)별 요약 표 (전체 {len(df)}건)", text
+
+    if not summary.empty:
+        table = summary.sort_values('Count', ascending=False, kind='stable')
+        description = f"리뷰 수 상위 군집 요약 표 (전체 {len(df)}건, {len(table)}개 군집 중 일부)"
+    else:
+        table = df
+        description = f"원본 결과 일부 (전체 {len(df)}건 중 앞부분)"
+
+    return description, _table_text(table.head(_fit_rows(table, token_budget)))
+
+
+def _fit_rows(table: pd.DataFrame, token_budget: int) -> int:
+    """table.head(n)이 토큰 예산 안에 들어가는 최대 n (이분 탐색)"""
+    def fits(n):
+        return count_tokens(_table_text(table.head(n))) <= token_budget
+
+    low, high = 0, 1
+    while high <= len(table) and fits(high):
+        low, high = high, high * 2
+    high = min(high, len(table) + 1)
+    while high - low > 1:
+        mid = (low + high) // 2
+        if fits(mid):
+            low = mid
+        else:
+            high = mid
+    return low
@@ -0,0 +1,124 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+
+# Azure OpenAI 배포 할당량 (분당 요청 수 / 분당 토큰 수, 0이면 제한 없음)
+GPT_RPM_LIMIT = int(os.getenv("GPT_RPM_LIMIT", "0"))
+GPT_TPM_LIMIT = int(os.getenv("GPT_TPM_LIMIT", "0"))
+# 버킷 용량 = 몇 초 분량까지 몰아서 보낼 수 있는지 (Azure는 짧은 구간 단위로도 제한)
+GPT_BURST_SECONDS = float(os.getenv("GPT_BURST_SECONDS", "10"))
+
+# 우선순위 (값이 작을수록 먼저 처리)
+INTERACTIVE = 0
+BATCH = 1
+
+
+class TokenBucket:
+    """분당 rate_per_min만큼 채워지고 최대 capacity까지 쌓이는 토큰 버킷 (락은 호출하는 쪽에서 관리)"""
+
+    def __init__(self, rate_per_min: float, burst_seconds: float = GPT_BURST_SECONDS):
+        self.rate = rate_per_min / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """amount만큼 꺼낼 수 있을 때까지 남은 시간 (용량보다 큰 요청은 버킷이 가득 차면 허용)"""
+        self._refill(now)
+        need = min(amount, self.capacity)
+        return 0.0 if self.tokens >= need else (need - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        # 용량보다 큰 요청은 잔량을 음수로 만들어 이후 요청이 그만큼 기다리게 함
+        self.tokens -= amount
+
+
+class RateLimitScheduler:
+    """
+    프로세스 전체(모든 Streamlit 세션)가 공유하는 GPT 요청 스케줄러
+    - 분당 요청 수/토큰 수를 토큰 버킷으로 조절
+    - 대기 중인 요청은 우선순위(INTERACTIVE → BATCH) 후 도착 순서로 처리
+    - 429 응답의 Retry-After 동안은 모든 요청을 멈춤
+    """
+
+    def __init__(self, rpm: int = GPT_RPM_LIMIT, tpm: int = GPT_TPM_LIMIT):
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self._cond = threading.Condition()
+        self._queue = []  # (priority, seq)
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self.wait_history = deque(maxlen=200)
+        self.throttled = 0
+        self.dispatched = 0
+
+    def _wait_time(self, estimated_tokens: int, now: float) -> float:
+        wait = max(0.0, self._paused_until - now)
+        if self.requests:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens:
+            wait = max(wait, self.tokens.wait_time(estimated_tokens, now))
+        return wait
+
+    def acquire(self, estimated_tokens: int, priority: int = INTERACTIVE) -> float:
+        """차례가 오고 할당량이 남을 때까지 대기, 대기한 시간(초) 반환"""
+        started = time.monotonic()
+        entry = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._queue, entry)
+            try:
+                while True:
+                    if self._queue[0] == entry:
+                        wait = self._wait_time(estimated_tokens, time.monotonic())
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+            finally:
+                # 대기 중 예외(KeyboardInterrupt 등)가 나도 대기열에서 빼서 뒤 요청이 막히지 않도록 함
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+            if self.requests:
+                self.requests.take(1)
+            if self.tokens:
+                self.tokens.take(estimated_tokens)
+            self.dispatched += 1
+        waited = time.monotonic() - started
+        self.wait_history.append(waited)
+        return waited
+
+    def settle(self, estimated_tokens: int, actual_tokens: int):
+        """응답의 실제 토큰 수로 추정치와의 차이를 보정"""
+        if not self.tokens or actual_tokens is None:
+            return
+        with self._cond:
+            self.tokens.take(actual_tokens - estimated_tokens)
+            self._cond.notify_all()
+
+    def backoff(self, seconds: float):
+        """429 응답: seconds 동안 모든 요청을 멈춤"""
+        with self._cond:
+            self.throttled += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def metrics(self) -> dict:
+        with self._cond:
+            depth = len(self._queue)
+        waits = list(self.wait_history)
+        return {
+            "queue_depth": depth,
+            "avg_wait_sec": sum(waits) / len(waits) if waits else 0.0,
+            "max_wait_sec": max(waits, default=0.0),
+            "dispatched": self.dispatched,
+            "throttled": self.throttled,
+        }
@@ -0,0 +1,131 @@
+import hashlib
+import os
+from concurrent.futures import as_completed
+
+import pandas as pd
+
+from src.analysis_cache import frame_hash
+from src.completion_cache import GPT_CACHE_DISABLED
+from src.gpt_client import DEPLOYMENT_NAME, complete_chat, completion_cache, submit_task
+from src.rate_limiter import BATCH
+from src.prompt_builder import summarize_clusters
+from src.review_sampler import sample_reviews
+
+# 세그먼트 요약 프롬프트를 바꾸면 값을 올려 기존 세그먼트 요약을 무효화
+SEGMENT_PROMPT_VERSION = "2"
+# 세그먼트 프롬프트에 넣을 리뷰 문장의 최대 토큰 수
+SEGMENT_TOKEN_BUDGET = int(os.getenv("SEGMENT_TOKEN_BUDGET", "1500"))
+
+# 세그먼트(좌석 타입 × 추천 여부 × 클러스터)를 나누는 컬럼 후보
+SEGMENT_KEY_CANDIDATES = [['SeatType'], ['Recommended', 'sentiment'], ['ClusterID', 'cluster']]
+
+SEGMENT_SYSTEM_PROMPT = "You are a helpful assistant specialized in summarizing customer 리뷰 데이터 for business reports."
+
+REDUCE_INSTRUCTIONS = {
+    "marketing": "위 고객 군집 요약을 종합해 📈 마케팅 전략 리포트를 작성해주세요. 고객 세그먼트별 마케팅 제안을 포함해주세요.",
+    "service": "위 고객 군집 요약을 종합해 🛠️ 서비스 개선 전략 리포트를 작성해주세요. 서비스 항목별 개선 인사이트를 포함해주세요.",
+    "combined": (
+        "위 고객 군집 요약을 종합해 두 가지 리포트를 작성해주세요.\n\n"
+        "1) 📈 마케팅 전략 리포트\n   - 고객 세그먼트별 마케팅 제안\n"
+        "2) 🛠️ 서비스 개선 전략 리포트\n   - 서비스 항목별 개선 인사이트"
+    ),
+}
+
+
+def segment_keys(df: pd.DataFrame) -> list[str]:
+    keys = []
+    for candidates in SEGMENT_KEY_CANDIDATES:
+        found = next((col for col in candidates if col in df.columns), None)
+        if found:
+            keys.append(found)
+    return keys
+
+
+def segment_label(keys: list[str], values) -> str:
+    return " / ".join(f"{key}={value}" for key, value in zip(keys, values))
+
+
+def build_segment_messages(label: str, segment: pd.DataFrame) -> list[dict]:
+    stats = summarize_clusters(segment, top_keywords=8).to_csv(index=False)
+    reviews = "\n".join(f"- {text}" for text in sample_reviews(segment, SEGMENT_TOKEN_BUDGET))
+    prompt = f"""다음은 고객 군집 [{label}]의 데이터입니다.
+이 군집 고객의 특징, 만족 요인, 불만 요인을 5줄 이내로 요약해주세요.
+
+군집 통계 (CSV):
+{stats}
+대표 리뷰:
+{reviews or "- (리뷰 문장 없음)"}"""
+    return [
+        {"role": "system", "content": SEGMENT_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _segment_cache_key(segment: pd.DataFrame) -> str:
+    raw = f"segment|{SEGMENT_PROMPT_VERSION}|{DEPLOYMENT_NAME}|{frame_hash(segment)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _summarize_segment(label: str, segment: pd.DataFrame, use_cache: bool) -> str:
+    # 세그먼트 입력 데이터 해시로 캐시 → 데이터가 바뀐 세그먼트만 다시 요약
+    key = _segment_cache_key(segment)
+    if use_cache and not GPT_CACHE_DISABLED and (cached := completion_cache.get(key)) is not None:
+        return cached
+    # 세그먼트 요약은 여러 건을 한꺼번에 보내므로 화면에서 기다리는 요청보다 뒤로
+    summary = complete_chat(build_segment_messages(label, segment), temperature=0.3, max_tokens=400,
+                            use_cache=False, priority=BATCH)
+    if summary:
+        completion_cache.put(key, summary)
+    return summary
+
+
+def summarize_segments(df: pd.DataFrame, progress=None, use_cache: bool = True) -> list[tuple[str, str]]:
+    """
+    map 단계: 세그먼트별 요약을 GPT 스레드 풀에서 동시에 생성
+    [(세그먼트 라벨, 요약)]을 세그먼트 순서대로 반환, progress(완료 수, 전체 수)로 진행 상황을 알림
+    """
+    keys = segment_keys(df)
+    if keys:
+        segments = [
+            (segment_label(keys, values if isinstance(values, tuple) else (values,)), group)
+            for values, group in df.groupby(keys, sort=True, dropna=False)
+        ]
+    else:
+        segments = [("전체", df)]
+
+    futures = {
+        submit_task(_summarize_segment, label, segment, use_cache): i
+        for i, (label, segment) in enumerate(segments)
+    }
+    summaries = [None] * len(segments)
+    for done, future in enumerate(as_completed(futures), start=1):
+        summaries[futures[future]] = future.result()
+        if progress:
+            progress(done, len(segments))
+    return [(label, summary) for (label, _), summary in zip(segments, summaries)]
+
+
+def build_reduce_messages(summaries: list[tuple[str, str]], report_type: str) -> list[dict]:
+    """reduce 단계: 세그먼트 요약을 모아 최종 리포트 프롬프트 생성"""
+    body = "\n\n".join(f"### {label}\n{summary}" for label, summary in summaries)
+    prompt = f"""다음은 고객 군집(좌석 타입 × 추천 여부 × 클러스터)별 리뷰 분석 요약입니다.
+
+{body}
+
+{REDUCE_INSTRUCTIONS[report_type]}"""
+    return [
+        {"role": "system", "content": "You are a helpful assistant specialized in writing business reports based on customer 리뷰 데이터."},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def generate_segment_reports(df: pd.DataFrame, report_types=("marketing", "service"),
+                             progress=None, use_cache: bool = True) -> dict:
+    """세그먼트 요약(map) 후 리포트 종류별 최종 리포트(reduce)를 동시에 생성"""
+    summaries = summarize_segments(df, progress, use_cache)
+    futures = {
+        report_type: submit_task(complete_chat, build_reduce_messages(summaries, report_type),
+                                 temperature=0.5, max_tokens=2048, use_cache=use_cache)
+        for report_type in report_types
+    }
+    return {report_type: future.result() for report_type, future in futures.items()}
@@ -1,25 +1,43 @@
 import pandas as pd
-from src.gpt_client import get_report_from_gpt
+from src.gpt_client import get_reports_from_gpt
+from src.report_engine import generate_segment_reports
+from src.review_sampler import sample_reviews
 
-def load_reviews(file_path: str):
-    df = pd.read_csv(file_path)
-    pos_reviews = df[df["Recommended"] == "yes"]["Adjectives/Adverbs"].dropna().tolist()
-    neg_reviews = df[df["Recommended"] == "no"]["Adjectives/Adverbs"].dropna().tolist()
+# 리포트 프롬프트(build_prompt 등)를 바꾸면 값을 올려 배치 모드(main.py)가 다시 생성하도록 함
+REPORT_PROMPT_VERSION = "1"
+
+def load_reviews(file_path):
+    # 층화 추출에 쓰도록 좌석 타입/클러스터 컬럼을 포함한 DataFrame으로 반환
+    # (이미 읽어 둔 DataFrame을 넘기면 그대로 사용)
+    df = file_path if isinstance(file_path, pd.DataFrame) else pd.read_csv(file_path)
+    pos_reviews = df[df["Recommended"] == "yes"]
+    neg_reviews = df[df["Recommended"] == "no"]
     return pos_reviews, neg_reviews
 
-def build_prompt(reviews: list[str], report_type: str):
-    sample = "\n".join(f"- {r}" for r in reviews[:20])  # 상위 20개만 사용
+def build_prompt(reviews: pd.DataFrame, report_type: str):
+    # 앞 20개 대신 좌석 타입 × 클러스터별로 중복 없이 고른 대표 리뷰 (토큰 예산 내)
+    sample = "\n".join(f"- {r}" for r in sample_reviews(reviews))
     if report_type == "marketing":
         return f"""다음은 고객의 긍정 리뷰입니다. 아래 내용을 기반으로 마케팅 전략 리포트를 작성해주세요:\n\n{sample}"""
     else:
         return f"""다음은 고객의 부정 리뷰입니다. 아래 내용을 기반으로 서비스 개선 전략 리포트를 작성해주세요:\n\n{sample}"""
 
-def generate_reports(file_path: str):
+def build_report_prompts(file_path):
     pos_reviews, neg_reviews = load_reviews(file_path)
     pos_prompt = build_prompt(pos_reviews, "marketing")
     neg_prompt = build_prompt(neg_reviews, "service")
+    return pos_prompt, neg_prompt
 
-    marketing_report = get_report_from_gpt(pos_prompt)
-    service_report = get_report_from_gpt(neg_prompt)
+def generate_reports(file_path: str):
+    pos_prompt, neg_prompt = build_report_prompts(file_path)
 
-    return marketing_report, service_report
\ No newline at end of file
+    # 마케팅/서비스 리포트는 서로 독립적이므로 동시에 호출
+    marketing_report, service_report = get_reports_from_gpt([pos_prompt, neg_prompt])
+
+    return marketing_report, service_report
+
+def generate_segmented_reports(file_path: str, progress=None, use_cache: bool = True):
+    # 세그먼트(좌석 타입 × 추천 여부 × 클러스터)별 요약 후 종합 → 바뀐 세그먼트만 다시 요약
+    df = pd.read_csv(file_path)
+    reports = generate_segment_reports(df, ("marketing", "service"), progress, use_cache)
+    return reports["marketing"], reports["service"]
\ No newline at end of file
@@ -0,0 +1,169 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.keyword_index import KeywordIndex
+from src.keyword_matrix import GroupKeywordCounts, KeywordMatrix
+from src.near_duplicates import NearDuplicateIndex, review_text_column
+from src.review_cube import ReviewCube
+
+SEAT_TYPE_MAPPING = {
+    'Business Class': '비즈니스',
+    'Economy Class': '이코노미',
+    'First Class': '퍼스트',
+    'Premium Economy': '프리미엄 이코노미'
+}
+
+
+# 1. 데이터 전처리 함수
+def preprocess_data(df, start: int = 0):
+    """start: 이어 붙일 행의 시작 번호 (append_analysis에서 기존 행 수를 넘겨 행 번호/월 구분을 전체 재분석과 맞춤)"""
+    # 컬럼명 공백 제거
+    df.columns = df.columns.str.strip()
+    df.index = pd.RangeIndex(start, start + len(df))
+
+    # SeatType 열의 내용을 한글로 변경
+    df['SeatType'] = df['SeatType'].map(SEAT_TYPE_MAPPING).fillna(df['SeatType'])
+
+    # 날짜 생성: 홀수 행은 2025년 5월, 짝수 행은 2025년 6월
+    df['year'] = 2025
+    df['month'] = df.index.map(lambda x: 5 if x % 2 == 0 else 6)
+
+    # Recommended를 추천/비추천으로 매핑
+    df['sentiment'] = df['Recommended'].map({'yes': '추천', 'no': '비추천'})
+
+    return df
+
+
+# 2. 강점/약점 분석 함수
+def build_strengths_weaknesses(group_keywords: GroupKeywordCounts):
+    strengths = {}
+    weaknesses = {}
+
+    for seat_class in group_keywords.levels['SeatType']:
+        # 긍정/부정 리뷰 명사 상위 5개 (빈도순)
+        top_good = [word for word, _ in group_keywords.top_k(5, SeatType=seat_class, sentiment='추천')]
+        top_bad = [word for word, _ in group_keywords.top_k(5, SeatType=seat_class, sentiment='비추천')]
+        top_good = top_good or ["데이터 없음"]
+        top_bad = top_bad or ["데이터 없음"]
+
+        strengths[seat_class] = ", ".join(top_good)
+        weaknesses[seat_class] = ", ".join(top_bad)
+
+    return strengths, weaknesses
+
+
+_dup_lock = threading.Lock()
+
+
+def dup_groups_of(analysis) -> np.ndarray:
+    """
+    유사(복사/템플릿) 리뷰 그룹 id (키워드 집계를 그룹당 한 번만 하는 데 사용)
+    - MinHash/LSH는 10만 행당 수 초가 걸리므로 분석 생성 시에는 계산하지 않고, 처음 필요할 때 계산해 analysis에 보관
+    - 리뷰 본문 컬럼이 없으면 행마다 다른 그룹
+    - MinHash 색인(밴드 해시)도 analysis["dup_index"]에 보관해 리뷰 추가 시 새 행만 더함
+    """
+    if analysis.get("dup_groups") is None:
+        with _dup_lock:
+            if analysis.get("dup_groups") is None:
+                processed_df = analysis["processed_df"]
+                text_col = review_text_column(processed_df)
+                if text_col is None:
+                    analysis["dup_groups"] = np.arange(len(processed_df))
+                else:
+                    index = NearDuplicateIndex().extend(processed_df[text_col])
+                    analysis["dup_index"] = index
+                    analysis["dup_groups"], _ = index.groups()
+    return analysis["dup_groups"]
+
+
+def _finish(processed_df, cube, keyword_matrices, group_keywords, keyword_index=None, dup_index=None):
+    strengths, weaknesses = build_strengths_weaknesses(group_keywords)
+    return {
+        "processed_df": processed_df,
+        "cube": cube,
+        "keywords": keyword_matrices[0],
+        "keyword_matrices": keyword_matrices,
+        "group_keywords": group_keywords,
+        "keyword_index": keyword_index or KeywordIndex(processed_df, keyword_matrices),
+        "strengths": strengths,
+        "weaknesses": weaknesses,
+        "dup_groups": dup_index.groups()[0] if dup_index is not None else None,  # None이면 dup_groups_of()에서 처음 필요할 때 계산
+        "dup_index": dup_index,
+    }
+
+
+# 3. 업로드 1회당 한 번만 수행되는 전처리 및 분석
+def build_analysis(df):
+    # 데이터 전처리
+    processed_df = preprocess_data(df)
+
+    # 명사(Nouns)는 희소 문서-단어 행렬로 한 번만 파싱
+    keywords = KeywordMatrix(processed_df['Nouns'])
+    keyword_matrices = [keywords]
+    if 'Adjectives/Adverbs' in processed_df.columns:
+        keyword_matrices.append(KeywordMatrix(processed_df['Adjectives/Adverbs']))
+
+    # 분석 데이터 생성 (연도/월/좌석별 집계는 큐브 한 번으로 처리)
+    return _finish(
+        processed_df,
+        ReviewCube(processed_df),
+        keyword_matrices,
+        GroupKeywordCounts(processed_df, keywords),
+    )
+
+
+# 4. 새 리뷰(예: 다음 달 데이터)만 반영
+def append_analysis(analysis, df):
+    """
+    기존 분석 결과에 새 리뷰 행을 더한 새 분석 결과 (기존 dict는 그대로 → 캐시에 있는 결과를 공유해도 안전)
+    - 큐브(리뷰 수, 평점 합/제곱합/개수)와 그룹별 단어 빈도는 새 행만 집계해 더함
+    - 키워드 행렬은 새 행만 파싱해 이어 붙이고, 역색인도 새 행의 행 번호만 단어별로 덧붙임
+    - 유사 리뷰 그룹은 기존 MinHash 색인이 있으면 새 행의 서명만 더해 전체 행 기준으로 다시 묶고,
+      없으면 다음에 필요할 때 합친 전체 행 기준으로 계산 (어느 쪽이든 전체 재분석과 같은 결과)
+    한계: 파싱/집계는 새 행에 비례하지만, processed_df·키워드 행렬·역색인 배열은 새 객체로 만들면서
+    기존 행을 한 번 복사함 (정렬/파싱 없는 메모리 복사라 전체 재분석보다 훨씬 빠르지만 전체 행 수에 비례)
+    """
+    processed = analysis["processed_df"]
+    delta = preprocess_data(df, start=len(processed))
+    processed_df = pd.concat([processed, delta], ignore_index=True)
+
+    keyword_matrices = [analysis["keyword_matrices"][0].append(delta['Nouns'])]
+    if len(analysis["keyword_matrices"]) > 1:
+        adjectives = delta['Adjectives/Adverbs'] if 'Adjectives/Adverbs' in delta.columns else pd.Series('', index=delta.index)
+        keyword_matrices.append(analysis["keyword_matrices"][1].append(adjectives))
+
+    delta_keywords = KeywordMatrix.from_parts(
+        keyword_matrices[0].vocab, keyword_matrices[0].matrix[len(processed):]
+    )
+    group_keywords = analysis["group_keywords"].merge(
+        GroupKeywordCounts(delta, delta_keywords), keyword_matrices[0].vocab
+    )
+
+    dup_index = analysis.get("dup_index")
+    text_col = review_text_column(processed_df)
+    if dup_index is not None and text_col is not None:
+        dup_index = dup_index.copy().extend(processed_df[text_col].iloc[dup_index.n_rows:])
+    else:
+        dup_index = None
+
+    return _finish(
+        processed_df,
+        analysis["cube"].append(delta),
+        keyword_matrices,
+        group_keywords,
+        analysis["keyword_index"].append(processed_df, keyword_matrices),
+        dup_index,
+    )
+
+
+# 5. 전체 고객 군집 분석
+def build_cluster_stats(cube: ReviewCube, group_keywords: GroupKeywordCounts, top_k: int = 8) -> pd.DataFrame:
+    """큐브의 군집별 통계 + 군집별 대표 키워드(명사 빈도 상위 top_k개, TopKeywords 컬럼)"""
+    stats = cube.cluster_stats()
+    stats['TopKeywords'] = [
+        [word for word, _ in group_keywords.top_k(top_k, SeatType=seat, sentiment=sentiment, ClusterID=cluster)]
+        for seat, sentiment, cluster in zip(stats['SeatType'], stats['Sentiment'], stats['ClusterID'])
+    ]
+    return stats
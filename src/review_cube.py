@@ -0,0 +1,247 @@
+import numpy as np
+import pandas as pd
+
+# 서비스 항목 컬럼
+SERVICE_COLUMNS = ['SeatComfort', 'CabinStaffService', 'Food&Beverages', 'GroundService', 'InflightEntertainment']
+RATING_COLUMNS = SERVICE_COLUMNS + ['OverallRating']
+
+# 집계 축: 연도 × 월 × 좌석 × 추천여부 × 여행객 유형 × 클러스터
+CUBE_DIMENSIONS = ['year', 'month', 'SeatType', 'sentiment', 'TypeOfTraveller', 'ClusterID']
+
+
+def factorize_dims(df: pd.DataFrame, dims) -> tuple[dict, list]:
+    """축별 (정렬된 값 목록, 행별 코드), 결측값과 없는 컬럼은 마지막 칸(len(값 목록))으로 보냄"""
+    levels, codes = {}, []
+    for dim in dims:
+        column = df[dim] if dim in df.columns else pd.Series(np.nan, index=df.index)
+        dim_codes, uniques = pd.factorize(column, sort=True)
+        levels[dim] = uniques.tolist()
+        codes.append(np.where(dim_codes < 0, len(levels[dim]), dim_codes))
+    return levels, codes
+
+
+def union_levels(left: dict, right: dict) -> dict:
+    """두 집계의 축별 값 목록 합집합 (정렬 유지 → 전체 데이터로 다시 집계한 것과 같은 순서)"""
+    return {dim: pd.Index(left[dim]).union(pd.Index(right[dim])).tolist() for dim in left}
+
+
+def expand_levels(array: np.ndarray, levels: dict, new_levels: dict) -> np.ndarray:
+    """축 값 목록이 늘어난 집계 배열로 옮겨 담기 (앞쪽 축 = levels 순서, 뒤에 남는 축은 그대로)"""
+    if all(levels[dim] == new_levels[dim] for dim in levels):
+        return array
+    positions = []
+    for dim in levels:
+        index = pd.Index(new_levels[dim])
+        positions.append(np.r_[index.get_indexer(levels[dim]), len(index)])
+    shape = tuple(len(new_levels[dim]) + 1 for dim in levels) + array.shape[len(levels):]
+    expanded = np.zeros(shape, dtype=array.dtype)
+    expanded[np.ix_(*positions)] = array
+    return expanded
+
+
+class ReviewCube:
+    """
+    전처리된 리뷰 DataFrame을 한 번에 집계한 다차원 큐브
+    - counts[y, m, s, e, t, c]        : 리뷰 수
+    - rating_sums[y, m, s, e, t, c, r] : 평점 합계 (결측 제외)
+    - rating_sq_sums[...]              : 평점 제곱 합계 (표준편차 계산용)
+    - rating_counts[...]               : 평점이 있는 리뷰 수
+    각 축의 마지막 칸은 결측값(NaN) 자리이며 조회 대상에서 제외된다.
+    모든 값이 더할 수 있는 부분 집계라서 새 리뷰는 append()로 새 행만 집계해 더한다.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.levels, codes = factorize_dims(df, CUBE_DIMENSIONS)
+        self._index = {}
+        for dim in CUBE_DIMENSIONS:
+            self._index[dim] = {value: i for i, value in enumerate(self.levels[dim])}
+
+        self.shape = tuple(len(self.levels[dim]) + 1 for dim in CUBE_DIMENSIONS)
+        size = int(np.prod(self.shape))
+        flat = np.ravel_multi_index(codes, self.shape) if len(df) else np.zeros(0, dtype=np.intp)
+
+        self.counts = np.bincount(flat, minlength=size).reshape(self.shape)
+        self.rating_sums = np.zeros(self.shape + (len(RATING_COLUMNS),))
+        self.rating_sq_sums = np.zeros(self.shape + (len(RATING_COLUMNS),))
+        self.rating_counts = np.zeros(self.shape + (len(RATING_COLUMNS),))
+        self.missing_columns = [col for col in RATING_COLUMNS if col not in df.columns]
+        for r, col in enumerate(RATING_COLUMNS):
+            if col in self.missing_columns:
+                continue
+            values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)
+            valid = ~np.isnan(values)
+            self.rating_sums[..., r] = np.bincount(flat[valid], weights=values[valid], minlength=size).reshape(self.shape)
+            self.rating_sq_sums[..., r] = np.bincount(flat[valid], weights=values[valid] ** 2, minlength=size).reshape(self.shape)
+            self.rating_counts[..., r] = np.bincount(flat[valid], minlength=size).reshape(self.shape)
+
+        self._precompute()
+
+    @classmethod
+    def from_parts(cls, levels: dict, counts, rating_sums, rating_sq_sums, rating_counts, missing_columns) -> "ReviewCube":
+        """저장해 둔 집계 배열(스냅샷 등)로 큐브 복원"""
+        cube = cls.__new__(cls)
+        cube.levels = levels
+        cube._index = {dim: {value: i for i, value in enumerate(levels[dim])} for dim in CUBE_DIMENSIONS}
+        cube.shape = tuple(counts.shape)
+        cube.counts = counts
+        cube.rating_sums = rating_sums
+        cube.rating_sq_sums = rating_sq_sums
+        cube.rating_counts = rating_counts
+        cube.missing_columns = list(missing_columns)
+        cube._precompute()
+        return cube
+
+    def merge(self, other: "ReviewCube") -> "ReviewCube":
+        """두 큐브를 더한 새 큐브 (비용은 행 수가 아니라 큐브 크기에 비례)"""
+        levels = union_levels(self.levels, other.levels)
+        parts = [
+            expand_levels(getattr(self, name), self.levels, levels) + expand_levels(getattr(other, name), other.levels, levels)
+            for name in ('counts', 'rating_sums', 'rating_sq_sums', 'rating_counts')
+        ]
+        # 한쪽에라도 평점 컬럼이 있으면 그 값으로 평균을 계산
+        missing = [col for col in self.missing_columns if col in other.missing_columns]
+        return ReviewCube.from_parts(levels, *parts, missing)
+
+    def append(self, df: pd.DataFrame) -> "ReviewCube":
+        """새 리뷰 행만 집계해 더한 새 큐브 (기존 큐브는 그대로)"""
+        return self.merge(ReviewCube(df))
+
+    def _marginal(self, array: np.ndarray, keep) -> np.ndarray:
+        """keep에 있는 축만 남기고 나머지 집계 축을 합산 (평점 축 등 뒤쪽 축은 유지)"""
+        axes = tuple(i for i, dim in enumerate(CUBE_DIMENSIONS) if dim not in keep)
+        return array.sum(axis=axes)
+
+    def _precompute(self):
+        # 자주 쓰는 (연도, 월, 좌석) 단위 합계를 미리 계산
+        keep = ('year', 'month', 'SeatType')
+        self._ym_seat_counts = self._marginal(self.counts, keep)
+        self._ym_seat_rating_sums = self._marginal(self.rating_sums, keep)
+        self._ym_seat_rating_sq_sums = self._marginal(self.rating_sq_sums, keep)
+        self._ym_seat_rating_counts = self._marginal(self.rating_counts, keep)
+
+    # --- 조회 API ---------------------------------------------
+    def _cell(self, year, month, seat_class):
+        y = self._index['year'].get(year)
+        m = self._index['month'].get(month)
+        s = self._index['SeatType'].get(seat_class)
+        if y is None or m is None or s is None:
+            return None
+        return y, m, s
+
+    def years(self):
+        """좌석 정보가 있는 리뷰가 존재하는 연도 목록"""
+        seat_counts = self._ym_seat_counts[:-1, :-1, :-1]
+        return [year for y, year in enumerate(self.levels['year']) if seat_counts[y].sum() > 0]
+
+    def months(self, year):
+        y = self._index['year'].get(year)
+        if y is None:
+            return []
+        seat_counts = self._ym_seat_counts[y, :-1, :-1]
+        return [month for m, month in enumerate(self.levels['month']) if seat_counts[m].sum() > 0]
+
+    def count(self, year, month, seat_class) -> int:
+        cell = self._cell(year, month, seat_class)
+        return int(self._ym_seat_counts[cell]) if cell else 0
+
+    def ratings(self, year, month, seat_class):
+        """서비스 항목별 + 전체 평균 평점 (데이터가 없으면 None)"""
+        if not self.count(year, month, seat_class):
+            return None
+        cell = self._cell(year, month, seat_class)
+        sums = self._ym_seat_rating_sums[cell]
+        counts = self._ym_seat_rating_counts[cell]
+        means = {}
+        for r, col in enumerate(RATING_COLUMNS):
+            if col in self.missing_columns:
+                means[col] = 0.0  # 컬럼이 없는 경우 기본값
+            else:
+                means[col] = sums[r] / counts[r] if counts[r] else np.nan
+        return means
+
+    def rating_std(self, year, month, seat_class):
+        """서비스 항목별 + 전체 평점 표준편차 (제곱합 / 합 / 개수로 계산, 데이터가 없으면 None)"""
+        if not self.count(year, month, seat_class):
+            return None
+        cell = self._cell(year, month, seat_class)
+        sums = self._ym_seat_rating_sums[cell]
+        sq_sums = self._ym_seat_rating_sq_sums[cell]
+        counts = self._ym_seat_rating_counts[cell]
+        stds = {}
+        for r, col in enumerate(RATING_COLUMNS):
+            if col in self.missing_columns or not counts[r]:
+                stds[col] = np.nan
+            else:
+                mean = sums[r] / counts[r]
+                stds[col] = float(np.sqrt(max(sq_sums[r] / counts[r] - mean ** 2, 0.0)))
+        return stds
+
+    def _distribution(self, counts, levels):
+        counts = counts[:-1]
+        total = counts.sum()
+        if total == 0:
+            return {}
+        order = np.argsort(-counts, kind='stable')
+        return {levels[i]: counts[i] / total for i in order if counts[i] > 0}
+
+    def traveller_dist(self, year, month, seat_class):
+        """여행객 유형 분포 (비율)"""
+        cell = self._cell(year, month, seat_class)
+        if cell is None:
+            return {}
+        counts = self._marginal(self.counts, ('year', 'month', 'SeatType', 'TypeOfTraveller'))[cell]
+        return self._distribution(counts, self.levels['TypeOfTraveller'])
+
+    def sentiment_dist(self, year, month, seat_class):
+        """추천/비추천 분포 (비율)"""
+        cell = self._cell(year, month, seat_class)
+        if cell is None:
+            return {}
+        counts = self._marginal(self.counts, ('year', 'month', 'SeatType', 'sentiment'))[cell]
+        return self._distribution(counts, self.levels['sentiment'])
+
+    def overall_traveller_dist(self):
+        """전체 여행객 유형 분포"""
+        return self._distribution(self._marginal(self.counts, ('TypeOfTraveller',)), self.levels['TypeOfTraveller'])
+
+    def cluster_stats(self) -> pd.DataFrame:
+        """
+        (좌석, 추천여부, 클러스터) 군집별 통계 표 (리뷰가 있는 군집만, 좌석 → 추천여부 → 클러스터 순)
+        리뷰 수, 평균 평점, 추천 비율, 가장 많은 여행객 유형, 서비스 항목별 평균
+        """
+        keep = ('SeatType', 'sentiment', 'ClusterID')
+        # 결측값 칸을 뺀 (좌석, 추천여부, 클러스터[, 여행객 유형]) 단위 합계
+        counts = self._marginal(self.counts, keep)[:-1, :-1, :-1]
+        # 축 순서는 CUBE_DIMENSIONS를 따름: (좌석, 추천여부, 여행객 유형, 클러스터)
+        traveller_counts = self._marginal(self.counts, keep + ('TypeOfTraveller',))[:-1, :-1, :-1, :-1]
+        sums = self._marginal(self.rating_sums, keep)[:-1, :-1, :-1]
+        rating_counts = self._marginal(self.rating_counts, keep)[:-1, :-1, :-1]
+
+        s, e, c = np.nonzero(counts)
+        seats = np.asarray(self.levels['SeatType'], dtype=object)[s]
+        sentiments = np.asarray(self.levels['sentiment'], dtype=object)[e]
+        clusters = pd.Index(self.levels['ClusterID'])[c]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = sums[s, e, c] / rating_counts[s, e, c]
+        for r, col in enumerate(RATING_COLUMNS):
+            if col in self.missing_columns:
+                means[:, r] = 0.0  # 컬럼이 없는 경우 기본값
+
+        # 동률이면 정렬 순서상 앞의 값 (Series.mode()와 같음)
+        group_travellers = traveller_counts[s, e, :, c]
+        travellers = np.asarray(self.levels['TypeOfTraveller'] + ['N/A'], dtype=object)
+        dominant = np.where(group_travellers.sum(axis=1) > 0, group_travellers.argmax(axis=1), len(travellers) - 1)
+
+        stats = pd.DataFrame({
+            'SeatType': seats,
+            'Sentiment': sentiments,
+            'ClusterID': clusters,
+            'UniqueID': [f"{seat}_{sentiment}_{cluster}" for seat, sentiment, cluster in zip(seats, sentiments, clusters)],
+            'Count': counts[s, e, c],
+            'AvgOverallRating': means[:, RATING_COLUMNS.index('OverallRating')],
+            'RecommendationRate': (sentiments == '추천') * 100.0,
+            'DominantTraveller': travellers[dominant],
+        })
+        for col in SERVICE_COLUMNS:
+            stats[col] = means[:, RATING_COLUMNS.index(col)]
+        return stats
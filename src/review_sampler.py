@@ -0,0 +1,121 @@
+import os
+from collections import deque
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.prompt_builder import count_tokens
+
+# 프롬프트에 넣을 샘플 리뷰 문장의 최대 토큰 수
+REVIEW_SAMPLE_TOKEN_BUDGET = int(os.getenv("REVIEW_SAMPLE_TOKEN_BUDGET", "2000"))
+
+# 리뷰 문장으로 사용할 컬럼 후보 (앞에 있는 컬럼 우선)
+REVIEW_TEXT_COLUMNS = ['Review', 'Adjectives/Adverbs', 'TopAdjectives', 'Nouns']
+# 층화 추출 기준 컬럼 후보 (좌석 타입 × 클러스터, 있는 컬럼만 사용)
+STRATA_CANDIDATES = [['SeatType'], ['ClusterID', 'cluster']]
+
+# 층별 후보 수 = 예산에 들어갈 것으로 예상되는 문장 수 × 배수
+_POOL_FACTOR = 3
+
+
+def text_column(df: pd.DataFrame):
+    return next((col for col in REVIEW_TEXT_COLUMNS if col in df.columns), None)
+
+
+def strata_columns(df: pd.DataFrame) -> list[str]:
+    keys = []
+    for candidates in STRATA_CANDIDATES:
+        found = next((col for col in candidates if col in df.columns), None)
+        if found:
+            keys.append(found)
+    return keys
+
+
+def sample_reviews(df: pd.DataFrame, token_budget: int = REVIEW_SAMPLE_TOKEN_BUDGET,
+                   text_col: str = None, strata: list[str] = None) -> list[str]:
+    """
+    토큰 예산 안에서 중복 없이 다양한 리뷰 문장을 고르기
+    1) 대소문자/구두점/공백 정규화 후 같은 문장 제거 (해시 기반)
+    2) 희귀 키워드(idf)를 많이 담은 문장일수록 높은 점수 (길이 보정)
+    3) 층(좌석 타입 × 클러스터)별 상위 후보만 남긴 뒤, 층을 돌아가며
+       아직 나오지 않은 키워드가 있는 문장을 예산이 찰 때까지 선택
+    → 전체 행에 대해서는 정규화/토큰화/집계만 하므로 리뷰 수에 선형
+    """
+    text_col = text_col or text_column(df)
+    if text_col is None or df.empty:
+        return []
+    strata = strata_columns(df) if strata is None else strata
+    if 'DupWeight' in df.columns:
+        # 유사 리뷰 그룹(near_duplicates)은 대표 행만 사용
+        df = df[df['DupWeight'] > 0]
+    if not df.index.is_unique:
+        df = df.reset_index(drop=True)
+
+    texts = df[text_col].dropna().astype(str).str.strip()
+    texts = texts[texts != ""]
+    normalized = texts.str.lower().str.replace(r"\W+", " ", regex=True).str.strip()
+    keep = ~normalized.duplicated()
+    texts, normalized = texts[keep], normalized[keep]
+    if texts.empty:
+        return []
+    n = len(texts)
+
+    # (문장 위치, 키워드 코드) 쌍 → 문장별 중복 키워드 제거 → 문서 빈도 → idf
+    # 토큰화/사전 코드화는 pyarrow compute로 (문장별 파이썬 split 없이)
+    column = pa.array(normalized, type=pa.string())
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks()
+    split = pc.utf8_split_whitespace(column)
+    rows = pc.list_parent_indices(split).to_numpy()
+    encoded = pc.dictionary_encode(pc.list_flatten(split))
+    codes = encoded.indices.to_numpy()
+    vocab = encoded.dictionary
+    distinct = ~pd.Series(rows.astype(np.int64) * len(vocab) + codes).duplicated().to_numpy()
+    rows, codes = rows[distinct], codes[distinct]
+    doc_freq = np.bincount(codes, minlength=len(vocab))
+    idf = np.log(n / doc_freq)
+    # 희귀 키워드 커버리지 합 / √(키워드 수)
+    n_words = np.bincount(rows, minlength=n)
+    scores = np.bincount(rows, weights=idf[codes], minlength=n) / np.sqrt(np.maximum(n_words, 1))
+
+    if strata:
+        groups = df.loc[texts.index, strata].groupby(strata, sort=False, dropna=False).ngroup().to_numpy()
+    else:
+        groups = np.zeros(n, dtype=np.int64)
+    group_sizes = np.bincount(groups)
+
+    # 예산에 들어갈 문장 수를 평균 길이로 어림잡아 층별 후보 수 결정
+    avg_tokens = max(1, count_tokens(" ".join(texts.head(50))) // min(n, 50))
+    pool_size = max(1, -(-token_budget // (avg_tokens + 2)) * _POOL_FACTOR // len(group_sizes))
+
+    # 층별로 점수 상위 pool_size개만 후보로 (argpartition → 층마다 선형)
+    by_group = np.argsort(groups, kind="stable")
+    bounds = np.concatenate([[0], np.cumsum(group_sizes)])
+    queues = []
+    for g in np.argsort(-group_sizes, kind="stable"):  # 리뷰 수가 많은 층부터
+        members = by_group[bounds[g]:bounds[g + 1]]
+        if len(members) > pool_size:
+            members = members[np.argpartition(-scores[members], pool_size - 1)[:pool_size]]
+        queues.append(deque(members[np.argsort(-scores[members], kind="stable")]))
+
+    # 층을 돌아가며 아직 나오지 않은 키워드가 있는 문장을 한 개씩 선택
+    seen, selected, used = set(), [], 0
+    while queues and used < token_budget:
+        for q in list(queues):
+            while q:
+                i = q.popleft()
+                new_words = set(normalized.iat[i].split()) - seen
+                if not new_words:
+                    continue
+                cost = count_tokens(texts.iat[i]) + 2
+                if used + cost > token_budget:
+                    continue
+                selected.append(texts.iat[i])
+                seen |= new_words
+                used += cost
+                break
+            if not q:
+                queues.remove(q)
+    return selected
@@ -0,0 +1,206 @@
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+SNAPSHOT_DIR         = Path(os.getenv("SNAPSHOT_DIR", ".cache/snapshots"))
+# 보관할 데이터셋 스냅샷 개수 (넘으면 가장 오래 사용되지 않은 것부터 삭제)
+SNAPSHOT_MAX_ENTRIES = int(os.getenv("SNAPSHOT_MAX_ENTRIES", "20"))
+# 스냅샷 파일 구성이 바뀌면 값을 올림 (이전 버전 스냅샷은 읽지 않음)
+SNAPSHOT_VERSION = "4"
+
+META_FILE = "meta.json"
+
+
+class SnapshotStore:
+    """
+    데이터셋 해시별 분석 결과 스냅샷 (서버 재시작/새 세션에서도 업로드·재계산 없이 복원)
+    <root>/v<버전>/<데이터셋 해시>/
+    - meta.json                 : 이름, 행 수, 저장된 part 목록, 강점/약점, 큐브 축 값 (목록 조회마다 읽으므로 작게 유지)
+    - <part>.arrow              : DataFrame (Arrow IPC, 메모리 맵으로 읽음) - processed, ml_result 등
+    - cube.npz / keywords_i.npz : 집계 큐브, 키워드 문서-단어 행렬
+    - vocab_i.npy               : 키워드 행렬의 단어 목록 (유니코드 배열)
+    - group_keywords.npy        : (좌석, 추천여부, 클러스터) 그룹별 단어 빈도
+    - dup_groups.npy            : 유사 리뷰 그룹 id (저장 시점에 계산되어 있을 때만)
+    파일은 임시 이름으로 쓴 뒤 교체하고, meta.json을 마지막에 갱신해 중간 상태를 읽지 않도록 함
+    """
+
+    def __init__(self, root: Path = SNAPSHOT_DIR, max_entries: int = SNAPSHOT_MAX_ENTRIES):
+        self.root = Path(root) / f"v{SNAPSHOT_VERSION}"
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+
+    def _dir(self, dataset_hash: str) -> Path:
+        return self.root / dataset_hash
+
+    def _read_meta(self, dataset_hash: str):
+        path = self._dir(dataset_hash) / META_FILE
+        if not path.exists():
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_meta(self, dataset_hash: str, meta: dict):
+        meta["last_used"] = time.time()
+        path = self._dir(dataset_hash) / META_FILE
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def _update_meta(self, dataset_hash: str, **fields):
+        meta = self._read_meta(dataset_hash) or {"dataset_hash": dataset_hash, "created": time.time(), "parts": []}
+        parts = set(meta["parts"]) | set(fields.pop("parts", []))
+        meta.update(fields, parts=sorted(parts))
+        self._write_meta(dataset_hash, meta)
+
+    @staticmethod
+    def _replace(path: Path, write):
+        """임시 파일에 write(파일 객체)로 쓴 뒤 교체"""
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+
+    # --- DataFrame part ------------------------------------------
+    def save_frame(self, dataset_hash: str, part: str, df: pd.DataFrame, name: str = None):
+        """DataFrame 하나를 part 이름으로 저장 (예: ml_result)"""
+        with self._lock:
+            self._dir(dataset_hash).mkdir(parents=True, exist_ok=True)
+            self._write_frame(dataset_hash, part, df)
+            fields = {"parts": [part], f"{part}_rows": len(df)}
+            if name:
+                fields["name"] = name
+            self._update_meta(dataset_hash, **fields)
+            self._evict()
+
+    def _write_frame(self, dataset_hash: str, part: str, df: pd.DataFrame):
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        self._replace(self._dir(dataset_hash) / f"{part}.arrow",
+                      lambda f: feather.write_feather(table, f, compression="uncompressed"))
+
+    def load_frame(self, dataset_hash: str, part: str):
+        meta = self._read_meta(dataset_hash)
+        if not meta or part not in meta["parts"]:
+            return None
+        self._touch(dataset_hash, meta)
+        return self._read_frame(dataset_hash, part)
+
+    def _read_frame(self, dataset_hash: str, part: str) -> pd.DataFrame:
+        return feather.read_table(self._dir(dataset_hash) / f"{part}.arrow", memory_map=True).to_pandas()
+
+    # --- 분석 결과 (src.review_analysis.build_analysis) ---
+    # scipy와 분석 클래스는 분석 스냅샷을 다룰 때만 import (메인 페이지 첫 로딩을 가볍게 유지)
+    def save_analysis(self, dataset_hash: str, analysis: dict, name: str = None):
+        from scipy import sparse
+
+        folder = self._dir(dataset_hash)
+        with self._lock:
+            folder.mkdir(parents=True, exist_ok=True)
+            self._write_frame(dataset_hash, "processed", analysis["processed_df"])
+
+            cube = analysis["cube"]
+            self._replace(folder / "cube.npz", lambda f: np.savez(
+                f, counts=cube.counts, rating_sums=cube.rating_sums, rating_sq_sums=cube.rating_sq_sums,
+                rating_counts=cube.rating_counts,
+            ))
+            for i, keywords in enumerate(analysis["keyword_matrices"]):
+                self._replace(folder / f"keywords_{i}.npz",
+                              lambda f: sparse.save_npz(f, keywords.matrix, compressed=False))
+                self._replace(folder / f"vocab_{i}.npy",
+                              lambda f: np.save(f, np.array(keywords.vocab.tolist(), dtype=str)))
+            group_keywords = analysis["group_keywords"]
+            self._replace(folder / "group_keywords.npy", lambda f: np.save(f, group_keywords.counts))
+            if analysis.get("dup_groups") is not None:
+                self._replace(folder / "dup_groups.npy", lambda f: np.save(f, analysis["dup_groups"]))
+            else:
+                (folder / "dup_groups.npy").unlink(missing_ok=True)
+
+            fields = {
+                "parts": ["processed", "analysis"],
+                "processed_rows": len(analysis["processed_df"]),
+                "cube_levels": cube.levels,
+                "cube_missing_columns": cube.missing_columns,
+                "keyword_matrix_count": len(analysis["keyword_matrices"]),
+                "group_keyword_levels": group_keywords.levels,
+                "strengths": analysis["strengths"],
+                "weaknesses": analysis["weaknesses"],
+            }
+            if name:
+                fields["name"] = name
+            self._update_meta(dataset_hash, **fields)
+            self._evict()
+
+    def load_analysis(self, dataset_hash: str):
+        """저장된 분석 결과 dict (없으면 None), 키워드 색인은 저장된 행렬로 다시 구성"""
+        from scipy import sparse
+
+        from src.keyword_index import KeywordIndex
+        from src.keyword_matrix import GroupKeywordCounts, KeywordMatrix
+        from src.review_cube import CUBE_DIMENSIONS, ReviewCube
+
+        meta = self._read_meta(dataset_hash)
+        if not meta or "analysis" not in meta["parts"]:
+            return None
+        folder = self._dir(dataset_hash)
+        processed_df = self._read_frame(dataset_hash, "processed")
+
+        with np.load(folder / "cube.npz") as arrays:
+            levels = {dim: meta["cube_levels"][dim] for dim in CUBE_DIMENSIONS}
+            cube = ReviewCube.from_parts(levels, arrays["counts"], arrays["rating_sums"], arrays["rating_sq_sums"],
+                                         arrays["rating_counts"], meta["cube_missing_columns"])
+        keyword_matrices = [
+            KeywordMatrix.from_parts(np.load(folder / f"vocab_{i}.npy").tolist(),
+                                     sparse.load_npz(folder / f"keywords_{i}.npz"))
+            for i in range(meta["keyword_matrix_count"])
+        ]
+        group_keywords = GroupKeywordCounts.from_parts(
+            meta["group_keyword_levels"], keyword_matrices[0].vocab, np.load(folder / "group_keywords.npy")
+        )
+        self._touch(dataset_hash, meta)
+        return {
+            "processed_df": processed_df,
+            "cube": cube,
+            "keywords": keyword_matrices[0],
+            "keyword_matrices": keyword_matrices,
+            "group_keywords": group_keywords,
+            "keyword_index": KeywordIndex(processed_df, keyword_matrices),
+            "strengths": meta["strengths"],
+            "weaknesses": meta["weaknesses"],
+            "dup_groups": np.load(folder / "dup_groups.npy") if (folder / "dup_groups.npy").exists() else None,
+            "dup_index": None,  # MinHash 색인은 저장하지 않음 (리뷰 추가 후 필요하면 전체 행 기준으로 다시 계산)
+        }
+
+    # --- 목록 / 정리 -----------------------------------------------
+    def has(self, dataset_hash: str, part: str) -> bool:
+        meta = self._read_meta(dataset_hash)
+        return bool(meta) and part in meta["parts"]
+
+    def list(self, part: str = None) -> list[dict]:
+        """저장된 스냅샷 meta 목록 (최근 사용 순), part를 주면 그 part가 있는 것만"""
+        if not self.root.exists():
+            return []
+        metas = []
+        for folder in self.root.iterdir():
+            meta = self._read_meta(folder.name) if folder.is_dir() else None
+            if meta and (part is None or part in meta["parts"]):
+                metas.append(meta)
+        return sorted(metas, key=lambda meta: -meta.get("last_used", 0))
+
+    def _touch(self, dataset_hash: str, meta: dict):
+        with self._lock:
+            self._write_meta(dataset_hash, meta)
+
+    def _evict(self):
+        for meta in self.list()[self.max_entries:]:
+            shutil.rmtree(self._dir(meta["dataset_hash"]), ignore_errors=True)
+
+
+snapshot_store = SnapshotStore()
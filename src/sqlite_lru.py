@@ -0,0 +1,31 @@
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+
+
+@contextmanager
+def connect(path: Path):
+    """작업 하나에 쓰는 SQLite 연결 (프로세스/세션 간 공유를 위해 작업마다 열고 닫음, 블록이 끝나면 commit)"""
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def evict_lru(conn, table: str, max_bytes: int):
+    """
+    table(key, size, last_used 컬럼)의 size 합이 max_bytes를 넘으면 가장 오래 사용되지 않은 행부터 삭제
+    한도의 90%까지 줄여 매번 삭제가 일어나지 않도록 함
+    """
+    total = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {table}").fetchone()[0]
+    if total <= max_bytes:
+        return
+    excess = total - int(max_bytes * 0.9)
+    conn.execute(
+        f"DELETE FROM {table} WHERE key IN ("
+        f" SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY last_used, key) - size AS before FROM {table})"
+        " WHERE before < ?)",
+        (excess,),
+    )
@@ -0,0 +1,92 @@
+"""
+Streamlit 진입 스크립트의 시작(import) 시간 측정
+- 스크립트마다 새 파이썬 프로세스에서 모듈 최상단 import 문을 순서대로 실행하며 문장별 시간을 기록
+- streamlit은 서버가 이미 올려 둔 상태이므로 측정 전에 미리 import (예산에서 제외)
+- 스크립트별 합계가 예산(STARTUP_IMPORT_BUDGET_MS)을 넘거나 import가 하나라도 실패하면 종료 코드 1
+
+사용법: python -m src.startup_benchmark [--budget-ms 1000] [--output startup.json]
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+ENTRY_POINTS = [
+    "streamlit_app.py",
+    "pages/1_review_upload_and_analysis.py",
+    "pages/2_generate_report.py",
+]
+# 진입 스크립트별 최상단 import 합계 예산 (밀리초, streamlit 제외)
+STARTUP_IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "1000"))
+
+_RUNNER = """
+import json, sys, time
+import streamlit
+results = []
+for stmt in json.loads(sys.argv[1]):
+    started = time.perf_counter()
+    try:
+        exec(stmt, {})
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    results.append((stmt, (time.perf_counter() - started) * 1000, error))
+print(json.dumps(results))
+"""
+
+
+def top_level_imports(path: Path) -> list[str]:
+    """모듈 최상단의 import 문만 (함수/분기 안의 지연 import는 제외)"""
+    source = path.read_text(encoding="utf-8")
+    tree = ast.parse(source)
+    return [
+        ast.get_source_segment(source, node)
+        for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    ]
+
+
+def measure(entry: str) -> dict:
+    statements = top_level_imports(ROOT / entry)
+    completed = subprocess.run(
+        [sys.executable, "-c", _RUNNER, json.dumps(statements)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONPATH": str(ROOT)},
+    )
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {
+        "entry": entry,
+        "total_ms": round(sum(ms for _, ms, _ in timings), 1),
+        "imports": [{"statement": stmt, "ms": round(ms, 1), "error": error} for stmt, ms, error in timings],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streamlit 진입 스크립트 import 시간 측정")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_IMPORT_BUDGET_MS)
+    parser.add_argument("--output", help="결과를 저장할 JSON 경로")
+    args = parser.parse_args()
+
+    results = [measure(entry) for entry in ENTRY_POINTS]
+    over_budget = [r for r in results if r["total_ms"] > args.budget_ms]
+    failed = [r for r in results if any(item["error"] for item in r["imports"])]
+    for r in results:
+        status = "실패" if r in failed else "초과" if r in over_budget else "OK"
+        print(f"[{status}] {r['entry']}: {r['total_ms']:.1f}ms (예산 {args.budget_ms:.0f}ms)")
+        for item in sorted(r["imports"], key=lambda item: -item["ms"]):
+            error = f"  (실패: {item['error']})" if item["error"] else ""
+            print(f"    {item['ms']:8.1f}ms  {item['statement']}{error}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"budget_ms": args.budget_ms, "results": results}, f, ensure_ascii=False, indent=2)
+
+    sys.exit(1 if over_budget or failed else 0)
+
+
+if __name__ == "__main__":
+    main()
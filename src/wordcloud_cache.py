@@ -0,0 +1,63 @@
+import io
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from src.analysis_cache import AnalysisCache
+
+# (데이터셋 해시, 좌석, 연도, 월, 추천여부)별로 보관할 워드클라우드 이미지 개수
+WORDCLOUD_CACHE_MAX_ENTRIES = int(os.getenv("WORDCLOUD_CACHE_MAX_ENTRIES", "64"))
+
+# 추천/비추천 워드클라우드 색상 범위 (hue)
+HUE_RANGES = {
+    "green": (90, 150),
+    "red": (0, 30),
+}
+
+wordcloud_cache = AnalysisCache(max_entries=WORDCLOUD_CACHE_MAX_ENTRIES)
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="wordcloud")
+
+
+def _color_func(color: str):
+    hue_min, hue_max = HUE_RANGES[color]
+
+    # 단어 문자열의 해시로 색을 정해 매번 같은 색이 나오도록 함
+    def color_func(word, **kwargs):
+        h = zlib.crc32(word.encode("utf-8"))
+        hue = hue_min + h % (hue_max - hue_min)
+        saturation = 70 + (h >> 8) % 30
+        lightness = 30 + (h >> 16) % 40
+        return f"hsl({hue}, {saturation}%, {lightness}%)"
+
+    return color_func
+
+
+def render_wordcloud(frequencies: dict, color: str) -> bytes:
+    """단어 빈도로 워드클라우드를 그려 PNG 바이트로 반환"""
+    # wordcloud(+matplotlib)는 처음 그릴 때 렌더링 스레드에서 import (페이지 첫 로딩을 막지 않음)
+    from wordcloud import WordCloud
+
+    wordcloud = WordCloud(
+        width=400,
+        height=300,
+        scale=2,
+        background_color="white",
+        color_func=_color_func(color),
+        random_state=0,
+    ).generate_from_frequencies(frequencies)
+
+    buffer = io.BytesIO()
+    wordcloud.to_image().save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def request_wordcloud(key, frequencies: dict, color: str):
+    """
+    key에 해당하는 워드클라우드 PNG를 백그라운드 스레드에서 렌더링하는 Future 반환
+    - 이미 요청된 key면 캐시된 Future를 그대로 반환 (세션 간 공유)
+    """
+    future = wordcloud_cache.get(key)
+    if future is None or (future.done() and future.exception() is not None):
+        future = _executor.submit(render_wordcloud, frequencies, color)
+        wordcloud_cache.put(key, future)
+    return future
@@ -1,86 +1,42 @@
+import logging
+import os
+
 import streamlit as st
 import pandas as pd
-import numpy as np
-import requests
-import io
-import openai
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
-import os
 from dotenv import load_dotenv
 
+from src.dataset_store import dataset_store
+from src.snapshot_store import snapshot_store
+
+# 시각화(matplotlib, wordcloud)와 Azure 클라이언트(requests, openai) 모듈은
+# 해당 메뉴/섹션을 처음 그릴 때 import해서 첫 화면 로딩을 가볍게 유지
+
 # -----------------------------------
 # 1) .env 환경변수 로드
 # -----------------------------------
+# (Azure OpenAI 연결 설정은 src/llm_client.py의 공용 클라이언트에서 읽음)
 load_dotenv()
 
-ML_ENDPOINT    = os.getenv("ML_ENDPOINT")
-ML_PRIMARY_KEY = os.getenv("ML_PRIMARY_KEY")
-
-AZURE_OPENAI_ENDPOINT    = os.getenv("AZURE_OPENAI_ENDPOINT")
-AZURE_OPENAI_API_KEY     = os.getenv("AZURE_OPENAI_API_KEY")
-AZURE_OPENAI_DEPLOYMENT  = os.getenv("AZURE_OPENAI_DEPLOYMENT")
-AZURE_OPENAI_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION")
-
-openai.api_type    = "azure"
-openai.api_base    = AZURE_OPENAI_ENDPOINT
-openai.api_version = AZURE_OPENAI_API_VERSION
-openai.api_key     = AZURE_OPENAI_API_KEY
-
-# -----------------------------------
-# 2) Azure ML 호출 함수
-# -----------------------------------
-def call_azure_ml(df_input: pd.DataFrame) -> pd.DataFrame:
-    """
-    1) 원본 DataFrame → JSON 페이로드 ({"data":[…]})
-    2) Azure ML 호출 → JSON 응답({ "csv_data": "...CSV 문자열..."})
-    3) "csv_data" 필드를 판독하여 DataFrame으로 반환
-    """
-    # 1) Inf → NaN → None(→JSON으로 보낼 때 null)
-    df = df_input.copy()
-    df = df.replace([np.inf, -np.inf], np.nan)
-    records = df.where(pd.notnull(df), None).to_dict(orient="records")
-    payload = {"data": records}
-
-    # 디버그용 로그: 전송 전 payload 확인(레코드 수만 출력)
-    print(">>> Sending payload to Azure ML:")
-    print(f"  ▶ 총 {len(records)}개 레코드를 전송합니다.")
-
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {ML_PRIMARY_KEY}"
-    }
-
-    # 2) Azure ML 호출
-    response = requests.post(ML_ENDPOINT, headers=headers, json=payload, timeout=300)
-    response.raise_for_status()
-    result_json = response.json()
-
-    # 디버그용 로그: 받은 JSON 출력
-    print("===== Azure ML returned JSON =====")
-    print(result_json)
-
-    # 3) "csv_data" 키가 있으면 DataFrame으로 변환하여 반환
-    if "csv_data" in result_json:
-        csv_text = result_json["csv_data"]
-        # StringIO로 CSV 파싱
-        return pd.read_csv(io.StringIO(csv_text))
-    else:
-        raise RuntimeError(f"Unexpected response format: {result_json}")
+# src 모듈의 진행/재시도 로그를 콘솔에 출력 (LOG_LEVEL=WARNING이면 경고만)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger(__name__)
 
 # -----------------------------------
-# 3) Azure OpenAI 호출 함수 (필요 시 사용)
+# 2) Azure OpenAI 호출 함수 (필요 시 사용)
 # -----------------------------------
-def call_azure_openai(df_result: pd.DataFrame) -> str:
+def call_azure_openai(df_result: pd.DataFrame, stream: bool = False, use_cache: bool = True):
     """
     Azure ML 결과 DataFrame을 GPT 프롬프트로 보내고, 생성된 리포트 문자열 반환
+    stream=True면 토큰 단위로 내보내는 CompletionStream 반환 (use_cache=False면 응답 캐시 무시)
     """
-    csv_buffer = io.StringIO()
-    df_result.to_csv(csv_buffer, index=False)
-    csv_text = csv_buffer.getvalue()
+    from src.gpt_client import complete_chat, stream_chat
+    from src.prompt_builder import compact_result_table
+
+    # 원본 행 대신 군집별 요약 표를 토큰 예산(PROMPT_TOKEN_BUDGET) 안에서 생성
+    table_description, csv_text = compact_result_table(df_result)
 
     prompt = f"""
-다음은 Azure ML 분석 결과 CSV입니다.
+다음은 Azure ML 분석 결과를 요약한 CSV입니다.
 이 데이터를 바탕으로 두 가지 리포트를 작성해주세요.
 
 1) 📈 마케팅 전략 리포트  
@@ -88,7 +44,7 @@ def call_azure_openai(df_result: pd.DataFrame) -> str:
 2) 🛠️ 서비스 개선 전략 리포트  
    - 서비스 항목별 개선 인사이트  
 
-아래는 CSV 전체 내용입니다:
+아래는 {table_description}입니다:
 ---
 {csv_text}
 ---"""
@@ -98,60 +54,100 @@ def call_azure_openai(df_result: pd.DataFrame) -> str:
         {"role": "user", "content": prompt}
     ]
 
-    completion = openai.ChatCompletion.create(
-        engine=AZURE_OPENAI_DEPLOYMENT,
-        messages=messages,
-        max_tokens=1500,
-        temperature=0.7
-    )
-    return completion.choices[0].message.content
+    if stream:
+        return stream_chat(messages, temperature=0.7, max_tokens=1500, use_cache=use_cache)
+
+    return complete_chat(messages, temperature=0.7, max_tokens=1500, use_cache=use_cache)
 
 # -----------------------------------
-# 4) Streamlit 설정 및 UI
+# 3) Streamlit 설정 및 UI
 # -----------------------------------
 st.set_page_config(page_title="Review Report Generator", page_icon="🛫", layout="wide")
 st.title("리뷰 기반 리포트 생성기")
 
-# 4.1) CSV 업로드 위젯 (원본 데이터)
+# 3.1) CSV 업로드 위젯 (원본 데이터)
 uploaded_file = st.file_uploader("📥 원본 리뷰 CSV 파일 업로드", type=["csv"])
 if uploaded_file:
     try:
-        df_raw = pd.read_csv(uploaded_file)
+        # 세션에는 DataFrame 대신 공유 데이터셋 저장소의 핸들만 보관 (같은 파일은 세션 간 한 벌만 유지)
+        dataset = st.session_state.get("dataset")
+        if dataset is None or getattr(uploaded_file, "file_id", None) != st.session_state.get("dataset_file_id"):
+            dataset = dataset_store.put_csv(uploaded_file)
+            st.session_state["dataset"] = dataset
+            st.session_state["dataset_file_id"] = getattr(uploaded_file, "file_id", None)
         st.success("✅ 원본 CSV 업로드 완료! 사이드바 메뉴를 선택하세요.")
-        st.session_state["df_raw"] = df_raw
     except Exception as e:
         st.error(f"CSV 읽기 실패: {e}")
         st.stop()
+    dataset_hash = dataset.dataset_hash
 else:
-    st.info("먼저 리뷰 원본 CSV 파일을 업로드해주세요.")
-    st.stop()
+    # 업로드 없이 저장된 Azure ML 분석 스냅샷을 바로 열 수 있음
+    saved = {meta["dataset_hash"]: meta for meta in snapshot_store.list("ml_result")}
+    st.info("먼저 리뷰 원본 CSV 파일을 업로드해주세요." + (" 또는 저장된 분석 결과를 선택하세요." if saved else ""))
+    dataset_hash = saved and st.selectbox(
+        "💾 저장된 분석 결과",
+        [None, *saved],
+        format_func=lambda h: "선택 안 함" if h is None else f"{saved[h].get('name', h[:12])} ({saved[h]['ml_result_rows']:,}행)",
+    )
+    if not dataset_hash:
+        st.stop()
+    st.session_state.pop("dataset", None)
+    st.session_state.pop("dataset_file_id", None)
+
+# 데이터셋이 바뀌면 같은 내용의 Azure ML 결과를 공유 저장소 → 스냅샷 순으로 불러옴 (없으면 이전 결과 제거)
+if st.session_state.get("df_result_hash") != dataset_hash:
+    result_key = f"{dataset_hash}.ml_result"
+    df_result = dataset_store.handle(result_key)
+    if df_result is None:
+        saved_result = snapshot_store.load_frame(dataset_hash, "ml_result")
+        df_result = None if saved_result is None else dataset_store.put(result_key, saved_result)
+    if df_result is None:
+        st.session_state.pop("df_result", None)
+    else:
+        st.session_state["df_result"] = df_result
+    st.session_state["df_result_hash"] = dataset_hash
 
-# 4.2) 사이드바 메뉴
+# 3.2) 사이드바 메뉴
 menu = st.sidebar.selectbox("🔍 기능 선택", (
     "리뷰 분석",
     "GPT 리포트 생성"
 ))
 
 # -----------------------------------
-# 5) "리뷰 분석" 페이지
+# 4) "리뷰 분석" 페이지
 # -----------------------------------
 if menu == "리뷰 분석":
     st.header("🔍 1. 리뷰 분석 (Azure ML 호출)")
 
-    # df_raw가 세션에 없으면 업로드부터 다시 안내
-    if "df_raw" not in st.session_state:
+    # 원본도 저장된 결과도 없으면 업로드부터 다시 안내
+    if "dataset" not in st.session_state and "df_result" not in st.session_state:
         st.error("원본 CSV를 업로드해야 합니다.")
         st.stop()
 
-    df_raw = st.session_state["df_raw"]
+    dataset = st.session_state.get("dataset")
+    from src.ml_client import call_azure_ml, result_cache
 
-    # ML 호출 버튼
-    if st.button("🔄 Azure ML 분석 실행"):
+    # ML 호출 버튼 (저장된 스냅샷만 연 경우에는 원본이 없어 재실행 불가)
+    if dataset is None:
+        st.caption("💾 저장된 분석 결과를 표시합니다.")
+    elif st.button("🔄 Azure ML 분석 실행"):
         with st.spinner("Azure ML 앤드포인트 호출 중..."):
+            progress_bar = st.progress(0.0)
+
+            def report_progress(done, total):
+                progress_bar.progress(done / total, text=f"배치 {done}/{total} 완료")
+
             try:
-                df_result = call_azure_ml(df_raw)
-                st.session_state["df_result"] = df_result
+                df_result = call_azure_ml(dataset.frame(), progress=report_progress)
+                st.session_state["df_result"] = dataset_store.put(f"{dataset_hash}.ml_result", df_result, replace=True)
+                try:
+                    snapshot_store.save_frame(dataset_hash, "ml_result", df_result, name=dataset.name)
+                except Exception as e:
+                    logger.exception("분석 결과 스냅샷 저장 실패")
+                    st.warning(f"분석 결과를 디스크에 저장하지 못했습니다. 이 세션에서는 계속 사용할 수 있습니다. ({e})")
                 st.success("✅ Azure ML 분석 완료!")
+                st.caption(f"결과 캐시 적중률: {result_cache.hit_rate:.1%} "
+                           f"(적중 {result_cache.hits}행 / 미적중 {result_cache.misses}행)")
             except Exception as e:
                 st.error(f"Azure ML 호출 오류: {e}")
                 st.stop()
@@ -161,7 +157,9 @@ if menu == "리뷰 분석":
     # 시각화: df_result가 있으면 기존 시각화 함수 호출
     if "df_result" in st.session_state:
         st.subheader("📊 분석 결과 시각화")
-        df_result = st.session_state["df_result"]
+        df_result = st.session_state["df_result"].frame()
+        import matplotlib.pyplot as plt
+        from wordcloud import WordCloud
 
         # 예시 시각화: DataFrame 미리보기
         st.write("#### 결과 데이터 미리보기")
@@ -191,7 +189,7 @@ if menu == "리뷰 분석":
                 st.pyplot(fig_wc)
 
 # -----------------------------------
-# 6) "GPT 리포트 생성" 페이지
+# 5) "GPT 리포트 생성" 페이지
 # -----------------------------------
 elif menu == "GPT 리포트 생성":
     st.header("📝 2. GPT 리포트 생성")
@@ -200,18 +198,44 @@ elif menu == "GPT 리포트 생성":
         st.warning("먼저 ‘리뷰 분석’ 메뉴에서 Azure ML 분석을 완료해주세요.")
         st.stop()
 
-    df_result = st.session_state["df_result"]
+    df_result = st.session_state["df_result"].frame()
+    from src.gpt_client import scheduler, stream_chat
+    from src.report_engine import build_reduce_messages, summarize_segments
+
+    # 같은 결과 데이터는 저장된 리포트를 재사용 (체크하면 새로 생성)
+    bypass_cache = st.checkbox("저장된 리포트 사용하지 않고 새로 생성")
+    # 좌석 타입 × 추천 여부 × 클러스터별로 먼저 요약한 뒤 종합 (바뀐 세그먼트만 다시 요약)
+    segmented = st.checkbox("세그먼트별 요약 후 종합 (map-reduce)")
 
     # 리포트 생성 버튼
     if st.button("🖋️ 리포트 생성"):
-        with st.spinner("GPT-4o-mini 호출 중..."):
-            try:
-                report_text = call_azure_openai(df_result)
-                st.session_state["report_text"] = report_text
-                st.success("✅ GPT 리포트 생성 완료!")
-            except Exception as e:
-                st.error(f"GPT 호출 오류: {e}")
-                st.stop()
+        # 생성 중에는 토큰을 바로 출력하고, 완료되면 아래 리포트 영역으로 교체
+        stream_placeholder = st.empty()
+        try:
+            with stream_placeholder.container():
+                if segmented:
+                    progress_bar = st.progress(0.0)
+
+                    def report_progress(done, total):
+                        progress_bar.progress(done / total, text=f"세그먼트 요약 {done}/{total} 완료")
+
+                    summaries = summarize_segments(df_result, report_progress, use_cache=not bypass_cache)
+                    report_stream = stream_chat(build_reduce_messages(summaries, "combined"),
+                                                temperature=0.7, max_tokens=1500, use_cache=not bypass_cache)
+                else:
+                    report_stream = call_azure_openai(df_result, stream=True, use_cache=not bypass_cache)
+                report_text = st.write_stream(report_stream)
+            stream_placeholder.empty()
+            st.session_state["report_text"] = report_text
+            st.success("✅ GPT 리포트 생성 완료!")
+            if report_stream.time_to_first_token is not None:
+                st.caption(f"첫 토큰까지 {report_stream.time_to_first_token:.2f}초")
+            metrics = scheduler.metrics()
+            st.caption(f"GPT 요청 대기열 {metrics['queue_depth']}건, 평균 대기 {metrics['avg_wait_sec']:.1f}초 "
+                       f"(429 재시도 {metrics['throttled']}회)")
+        except Exception as e:
+            st.error(f"GPT 호출 오류: {e}")
+            st.stop()
     else:
         st.info("“🖋️ 리포트 생성” 버튼을 눌러주세요.")
 
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+SEATS = ['Business Class', 'Economy Class', 'First Class', 'Premium Economy']
+TRAVELLERS = ['Solo Leisure', 'Business', 'Couple Leisure', 'Family Leisure']
+NOUNS = ['seat', 'food', 'staff', 'legroom', 'delay', 'lounge', 'meal', 'crew', 'wifi', 'screen']
+ADJECTIVES = ['good', 'bad', 'late', 'clean', 'rude', 'kind']
+# 유사 리뷰 그룹이 생기도록 템플릿 문장을 반복 사용
+TEMPLATES = [
+    "the flight from seoul to {} was on time and the crew were very kind to us",
+    "terrible experience the {} was dirty and nobody helped us at the gate at all",
+    "average trip nothing special about the {} but the price was fair enough",
+]
+
+
+def make_reviews(n: int, seed: int = 0) -> pd.DataFrame:
+    """업로드 CSV와 같은 컬럼의 합성 리뷰 데이터 (명사/형용사 일부 결측, 템플릿 리뷰 포함)"""
+    rng = np.random.default_rng(seed)
+
+    def keywords(vocab):
+        return ', '.join(rng.choice(vocab, rng.integers(0, 4)))
+
+    df = pd.DataFrame({
+        'SeatType': rng.choice(SEATS, n),
+        'Recommended': rng.choice(['yes', 'no'], n),
+        'TypeOfTraveller': rng.choice(TRAVELLERS, n),
+        'OverallRating': rng.integers(1, 11, n),
+        'SeatComfort': rng.integers(1, 6, n).astype(float),
+        'CabinStaffService': rng.integers(1, 6, n).astype(float),
+        'Food&Beverages': rng.integers(1, 6, n).astype(float),
+        'GroundService': rng.integers(1, 6, n).astype(float),
+        'InflightEntertainment': rng.integers(1, 6, n).astype(float),
+        'ClusterID': rng.integers(0, 3, n),
+        'Nouns': [keywords(NOUNS) for _ in range(n)],
+        'Adjectives/Adverbs': [keywords(ADJECTIVES) for _ in range(n)],
+        'Review': [
+            rng.choice(TEMPLATES).format(rng.choice(NOUNS)) if rng.random() < 0.6
+            else ' '.join(rng.choice(NOUNS + ADJECTIVES, 12))
+            for _ in range(n)
+        ],
+    })
+    df.loc[::7, 'Nouns'] = np.nan
+    df.loc[::11, 'GroundService'] = np.nan
+    return df
+
+
+@pytest.fixture
+def reviews() -> pd.DataFrame:
+    return make_reviews(600)
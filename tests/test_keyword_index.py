@@ -0,0 +1,78 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from src.keyword_index import KeywordIndex
+from src.keyword_matrix import KeywordMatrix
+from src.review_analysis import append_analysis, build_analysis
+
+
+def row_words(df) -> list[set]:
+    """행별 키워드 집합 (명사 + 형용사, 쉼표 구분)"""
+    words = []
+    for nouns, adjectives in zip(df['Nouns'].fillna(''), df['Adjectives/Adverbs'].fillna('')):
+        words.append({word.strip() for word in f"{nouns},{adjectives}".split(',') if word.strip()})
+    return words
+
+
+def brute_force_search(df, words, mode, filters) -> np.ndarray:
+    rows = []
+    for i, found in enumerate(row_words(df)):
+        if words and not (set(words) <= found if mode == 'and' else set(words) & found):
+            continue
+        if any(value is not None and df[col].iloc[i] != value for col, value in filters.items()):
+            continue
+        rows.append(i)
+    return np.array(rows, dtype=np.uint32)
+
+
+QUERIES = [[], ['seat'], ['food', 'good'], ['wifi', 'rude', 'meal'], ['no-such-word'], ['seat', 'no-such-word']]
+FILTERS = [
+    {},
+    {'SeatType': '이코노미'},
+    {'sentiment': '추천', 'month': 6},
+    {'SeatType': '퍼스트', 'ClusterID': 2, 'sentiment': None},
+    {'SeatType': '없는 좌석'},
+]
+
+
+@pytest.fixture
+def analysis(reviews):
+    return build_analysis(reviews.copy())
+
+
+@pytest.mark.parametrize("mode", ['and', 'or'])
+@pytest.mark.parametrize("words, filters", list(itertools.product(QUERIES, FILTERS)))
+def test_search_matches_brute_force(analysis, words, mode, filters):
+    df = analysis["processed_df"]
+    expected = brute_force_search(df, words, mode, filters)
+    np.testing.assert_array_equal(analysis["keyword_index"].search(words, mode, filters), expected)
+
+
+def test_appended_index_matches_brute_force(reviews):
+    appended = append_analysis(build_analysis(reviews.iloc[:400].copy()), reviews.iloc[400:].copy())
+    df = appended["processed_df"]
+    for words, filters in itertools.product(QUERIES, FILTERS):
+        for mode in ['and', 'or']:
+            np.testing.assert_array_equal(appended["keyword_index"].search(words, mode, filters),
+                                          brute_force_search(df, words, mode, filters))
+
+
+def test_vocabulary_and_levels(analysis):
+    index = analysis["keyword_index"]
+    assert index.vocabulary == sorted(set().union(*row_words(analysis["processed_df"])))
+    assert sorted(index.levels('sentiment')) == ['비추천', '추천']
+    assert index.levels('없는 컬럼') == []
+
+
+def test_unknown_mode(analysis):
+    with pytest.raises(ValueError):
+        analysis["keyword_index"].search(['seat'], mode='xor')
+
+
+def test_word_in_both_columns_is_listed_once(reviews):
+    df = reviews.head(3).assign(**{'Nouns': ['good, seat', 'seat', ''], 'Adjectives/Adverbs': ['good', '', 'good']})
+    index = KeywordIndex(df, [KeywordMatrix(df['Nouns']), KeywordMatrix(df['Adjectives/Adverbs'])])
+    np.testing.assert_array_equal(index.postings('good'), [0, 2])
+    np.testing.assert_array_equal(KeywordIndex.page(df, index.postings('seat'), page_size=1).index, [0])
@@ -0,0 +1,78 @@
+import pytest
+
+from src import rate_limiter
+from src.rate_limiter import RateLimitScheduler
+
+
+class FakeClock:
+    """time.monotonic 대신 쓰는 시계 (대기하면 대기한 만큼 시간이 흐름)"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return clock
+
+
+def make_scheduler(clock, **limits) -> RateLimitScheduler:
+    scheduler = RateLimitScheduler(**{"rpm": 0, "tpm": 0, **limits})
+    # 단일 스레드 테스트: Condition.wait(timeout)은 실제로 기다리지 않고 시계만 진행
+    scheduler._cond.wait = lambda timeout=None: clock.sleep(timeout)
+    return scheduler
+
+
+def test_backoff_pauses_next_request(clock):
+    scheduler = make_scheduler(clock)
+    assert scheduler.acquire(100) == 0
+
+    scheduler.backoff(5)
+    assert scheduler.acquire(100) == pytest.approx(5)
+    assert clock.now == pytest.approx(1005)
+    # 멈춘 시간이 지나면 바로 보냄
+    assert scheduler.acquire(100) == 0
+    assert scheduler.metrics()["throttled"] == 1
+    assert scheduler.metrics()["dispatched"] == 3
+
+
+def test_shorter_backoff_does_not_shorten_pause(clock):
+    scheduler = make_scheduler(clock)
+    scheduler.backoff(10)
+    clock.sleep(2)
+    scheduler.backoff(3)
+
+    assert scheduler.acquire(1) == pytest.approx(8)
+    assert scheduler.metrics()["throttled"] == 2
+
+
+def test_backoff_combines_with_request_bucket(clock):
+    # 분당 60회 → 초당 1회, 버킷은 10초 분량 (10회)
+    scheduler = make_scheduler(clock, rpm=60)
+    for _ in range(10):
+        assert scheduler.acquire(1) == 0
+    assert scheduler.acquire(1) == pytest.approx(1)
+
+    # 429 동안 버킷이 다시 차므로 멈춘 시간만 기다림
+    scheduler.backoff(30)
+    assert scheduler.acquire(1) == pytest.approx(30)
+    for _ in range(8):
+        assert scheduler.acquire(1) == 0
+
+
+def test_token_limit_waits_for_refill(clock):
+    # 분당 6000토큰 → 초당 100토큰, 버킷 1000토큰
+    scheduler = make_scheduler(clock, tpm=6000)
+    assert scheduler.acquire(800) == 0
+    assert scheduler.acquire(500) == pytest.approx(3)
+    # 실제 사용량이 추정보다 적으면 돌려받음
+    scheduler.settle(500, 200)
+    assert scheduler.acquire(300) == 0
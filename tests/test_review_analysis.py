@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.review_analysis import append_analysis, build_analysis, dup_groups_of
+
+
+def assert_same_analysis(actual: dict, expected: dict):
+    pd.testing.assert_frame_equal(actual["processed_df"], expected["processed_df"])
+
+    assert actual["cube"].levels == expected["cube"].levels
+    for name in ['counts', 'rating_sums', 'rating_sq_sums', 'rating_counts']:
+        np.testing.assert_allclose(getattr(actual["cube"], name), getattr(expected["cube"], name), err_msg=name)
+
+    for got, want in zip(actual["keyword_matrices"], expected["keyword_matrices"], strict=True):
+        assert list(got.vocab) == list(want.vocab)
+        assert (got.matrix != want.matrix).nnz == 0
+    np.testing.assert_array_equal(actual["group_keywords"].counts, expected["group_keywords"].counts)
+    assert actual["strengths"] == expected["strengths"]
+    assert actual["weaknesses"] == expected["weaknesses"]
+
+    got_index, want_index = actual["keyword_index"], expected["keyword_index"]
+    assert got_index.vocabulary == want_index.vocabulary
+    for word in want_index.vocabulary:
+        np.testing.assert_array_equal(got_index.postings(word), want_index.postings(word), err_msg=word)
+
+
+@pytest.mark.parametrize("split", [1, 300, 599])
+def test_append_matches_full_rebuild(reviews, split):
+    base = build_analysis(reviews.iloc[:split].copy())
+    appended = append_analysis(base, reviews.iloc[split:].copy())
+    rebuilt = build_analysis(reviews.copy())
+
+    assert_same_analysis(appended, rebuilt)
+    # 기존 분석 결과는 그대로 (캐시에 있는 결과를 공유해도 안전)
+    assert len(base["processed_df"]) == split
+
+
+def test_append_twice_matches_full_rebuild(reviews):
+    analysis = build_analysis(reviews.iloc[:200].copy())
+    analysis = append_analysis(analysis, reviews.iloc[200:450].copy())
+    analysis = append_analysis(analysis, reviews.iloc[450:].copy())
+
+    assert_same_analysis(analysis, build_analysis(reviews.copy()))
+
+
+def test_dup_groups_are_lazy(reviews):
+    analysis = build_analysis(reviews.copy())
+    assert analysis["dup_groups"] is None
+
+    groups = dup_groups_of(analysis)
+    assert groups is analysis["dup_groups"]
+    assert len(groups) == len(reviews)
+    # 템플릿 리뷰가 있으므로 그룹 수는 행 수보다 적음
+    assert len(np.unique(groups)) < len(reviews)
+
+
+@pytest.mark.parametrize("index_before_append", [True, False])
+def test_appended_dup_groups_match_full_rebuild(reviews, index_before_append):
+    base = build_analysis(reviews.iloc[:350].copy())
+    if index_before_append:
+        dup_groups_of(base)
+    appended = append_analysis(base, reviews.iloc[350:].copy())
+
+    np.testing.assert_array_equal(dup_groups_of(appended), dup_groups_of(build_analysis(reviews.copy())))
+    if index_before_append:
+        # 기존 색인은 새 행을 더하지 않고 그대로
+        assert base["dup_index"].n_rows == 350
+
+
+def test_dup_groups_without_review_text(reviews):
+    analysis = build_analysis(reviews.drop(columns=['Review']))
+    np.testing.assert_array_equal(dup_groups_of(analysis), np.arange(len(reviews)))
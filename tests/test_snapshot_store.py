@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from src.review_analysis import build_analysis, dup_groups_of
+from src.snapshot_store import SnapshotStore
+from tests.test_review_analysis import assert_same_analysis
+
+
+def test_analysis_round_trip(tmp_path, reviews):
+    store = SnapshotStore(root=tmp_path)
+    analysis = build_analysis(reviews.copy())
+    dup_groups_of(analysis)
+    store.save_analysis("abc", analysis, name="reviews.csv")
+
+    loaded = store.load_analysis("abc")
+    assert_same_analysis(loaded, analysis)
+    np.testing.assert_array_equal(loaded["dup_groups"], analysis["dup_groups"])
+    assert store.list()[0]["name"] == "reviews.csv"
+
+
+def test_round_trip_keeps_dup_groups_lazy(tmp_path, reviews):
+    store = SnapshotStore(root=tmp_path)
+    analysis = build_analysis(reviews.copy())
+    store.save_analysis("abc", analysis)
+
+    loaded = store.load_analysis("abc")
+    assert loaded["dup_groups"] is None
+    np.testing.assert_array_equal(dup_groups_of(loaded), dup_groups_of(analysis))
+
+
+def test_frame_round_trip(tmp_path, reviews):
+    store = SnapshotStore(root=tmp_path)
+    store.save_frame("abc", "ml_result", reviews)
+
+    pd.testing.assert_frame_equal(store.load_frame("abc", "ml_result"), reviews)
+    assert store.has("abc", "ml_result")
+    assert not store.has("abc", "analysis")
+    assert store.load_analysis("abc") is None
+
+
+def test_missing_snapshot(tmp_path):
+    store = SnapshotStore(root=tmp_path)
+    assert store.load_analysis("missing") is None
+    assert store.load_frame("missing", "ml_result") is None